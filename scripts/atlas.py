@@ -0,0 +1,274 @@
+"""
+Texture atlas packing for the game's small assets.
+
+Frames are packed into power-of-two pages with a MaxRects bin packer
+(best-short-side-fit, no rotation) and described in Phaser's JSON hash
+atlas format, so PreloadScene can fetch one image and one JSON file
+instead of a request per texture, and the GPU binds one texture for all
+of them.
+
+Frames are trimmed to their alpha bbox and recorded with Phaser's
+spriteSourceSize/sourceSize offsets, so they render exactly as the padded
+originals. Pixel-identical frames share one stored region, and frames that
+are allowed to (static images, not animation frames) may also share a
+region with their mirror image plus a flip flag.
+
+Each stored region is surrounded by a one-pixel extrusion of its own edge
+pixels plus padding, so linear filtering at fractional scales never
+samples a neighbouring frame.
+"""
+
+from PIL import Image, ImageOps
+
+
+class MaxRectsBin:
+    """
+    A single bin packed with the MaxRects algorithm.
+    free holds maximal free rectangles as (x, y, w, h); they may overlap.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = [(0, 0, width, height)]
+
+    def insert(self, w, h):
+        """
+        Place a w x h rectangle using best-short-side-fit.
+        Returns its (x, y) position, or None if it does not fit.
+        """
+        best = None
+        best_score = None
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                score = (min(fw - w, fh - h), max(fw - w, fh - h))
+                if best_score is None or score < best_score:
+                    best, best_score = (fx, fy), score
+        if best is None:
+            return None
+        self._split(best[0], best[1], w, h)
+        return best
+
+    def _split(self, x, y, w, h):
+        """Carve the placed rectangle out of every free rectangle it overlaps."""
+        new_free = []
+        for fx, fy, fw, fh in self.free:
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                new_free.append((fx, fy, fw, fh))
+                continue
+            if x > fx:
+                new_free.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                new_free.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                new_free.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                new_free.append((fx, y + h, fw, fy + fh - y - h))
+        # Drop free rectangles fully contained in another one
+        self.free = [
+            a for i, a in enumerate(new_free)
+            if not any(
+                j != i
+                and a[0] >= b[0] and a[1] >= b[1]
+                and a[0] + a[2] <= b[0] + b[2] and a[1] + a[3] <= b[1] + b[3]
+                and (a != b or j < i)
+                for j, b in enumerate(new_free)
+            )
+        ]
+
+
+def _page_sizes(min_area, max_size):
+    """Power-of-two (w, h) page sizes up to max_size, smallest area first."""
+    sizes = []
+    w = 1
+    while w <= max_size:
+        h = 1
+        while h <= max_size:
+            if w * h >= min_area and max(w, h) <= 2 * min(w, h):
+                sizes.append((w, h))
+            h *= 2
+        w *= 2
+    return sorted(sizes, key=lambda s: (s[0] * s[1], s[0]))
+
+
+def _try_pack(items, width, height):
+    """Pack items into one bin; returns ({name: (x, y)}, leftover items)."""
+    bin_ = MaxRectsBin(width, height)
+    placed, leftover = {}, []
+    for name, w, h in items:
+        pos = bin_.insert(w, h)
+        if pos is None:
+            leftover.append((name, w, h))
+        else:
+            placed[name] = pos
+    return placed, leftover
+
+
+def pack_pages(items, max_size=1024):
+    """
+    Pack (name, w, h) items into as few power-of-two pages as possible.
+    Each page is the smallest power-of-two size (at most max_size square,
+    aspect ratio at most 2:1) that holds everything left to pack; if nothing
+    holds it all, a max_size page is filled and the rest spill to the next.
+    Returns a list of ((width, height), {name: (x, y)}) pages.
+    """
+    for name, w, h in items:
+        if w > max_size or h > max_size:
+            raise ValueError(f"{name} ({w}x{h}) is larger than a {max_size}px atlas page")
+
+    # Tallest-first ordering packs MaxRects noticeably tighter
+    remaining = sorted(items, key=lambda it: (-it[2], -it[1], it[0]))
+    pages = []
+    while remaining:
+        area = sum(w * h for _, w, h in remaining)
+        for width, height in _page_sizes(area, max_size):
+            placed, leftover = _try_pack(remaining, width, height)
+            if not leftover:
+                break
+        else:
+            width = height = max_size
+            placed, leftover = _try_pack(remaining, width, height)
+        pages.append(((width, height), placed))
+        remaining = leftover
+    return pages
+
+
+def _paste_extruded(page, frame, x, y, extrude):
+    """Paste frame at (x, y) and repeat its edge pixels extrude px outward."""
+    w, h = frame.size
+    page.paste(frame, (x, y))
+    for i in range(1, extrude + 1):
+        page.paste(frame.crop((0, 0, w, 1)), (x, y - i))
+        page.paste(frame.crop((0, h - 1, w, h)), (x, y + h - 1 + i))
+    # Columns are taken after the rows so the corners get extruded too
+    column_l = page.crop((x, y - extrude, x + 1, y + h + extrude))
+    column_r = page.crop((x + w - 1, y - extrude, x + w, y + h + extrude))
+    for i in range(1, extrude + 1):
+        page.paste(column_l, (x - i, y - extrude))
+        page.paste(column_r, (x + w - 1 + i, y - extrude))
+
+
+def trim_frame(img):
+    """
+    Crop a frame to its alpha bbox. Returns (trimmed, (x, y)), where (x, y)
+    is the trimmed region's offset in the original frame. A fully
+    transparent frame trims to a single transparent pixel.
+    """
+    bbox = img.getchannel("A").getbbox() or (0, 0, 1, 1)
+    return img.crop(bbox), bbox[:2]
+
+
+def dedupe_frames(frames, mirrorable=()):
+    """
+    Collapse frames with identical pixels onto one canonical frame.
+
+    Frames named in mirrorable may also be collapsed onto another mirrorable
+    frame they equal when flipped horizontally and/or vertically. Returns
+    {name: (canonical_name, flip_x, flip_y)} for every frame; canonical
+    frames map to themselves.
+    """
+    mirrorable = set(mirrorable)
+    seen = {}
+    seen_mirrorable = {}
+    aliases = {}
+    for name, img in frames.items():
+        key = (img.size, img.tobytes())
+        if key in seen:
+            aliases[name] = (seen[key], False, False)
+            continue
+        if name in mirrorable:
+            flips = [
+                (ImageOps.mirror(img), True, False),
+                (ImageOps.flip(img), False, True),
+                (img.rotate(180), True, True),
+            ]
+            match = next(((seen_mirrorable[(f.size, f.tobytes())], fx, fy) for f, fx, fy in flips
+                          if (f.size, f.tobytes()) in seen_mirrorable), None)
+            if match is not None:
+                aliases[name] = match
+                continue
+            seen_mirrorable[key] = name
+        seen[key] = name
+        aliases[name] = (name, False, False)
+    return aliases
+
+
+def build_atlas(frames, max_size=1024, padding=2, extrude=1, trim=True, mirrorable=()):
+    """
+    Pack named RGBA frames into atlas pages.
+
+    frames is an ordered {name: Image}. Identical frames (and, for names in
+    mirrorable, mirror images) are stored once; with trim, each stored frame
+    is cropped to its alpha bbox. Each stored frame occupies a slot of its
+    size plus extrude px on every side plus padding px on the right and
+    bottom.
+
+    Returns a list of (page_image, {name: info}) tuples, one per page, where
+    info has "frame" (x, y, w, h) of the un-extruded region on the page,
+    "source" (x, y, w, h) of that region within the original frame, and
+    "flip_x"/"flip_y" for frames drawn as a mirror of the stored region.
+    """
+    aliases = dedupe_frames(frames, mirrorable)
+    stored = {}
+    for name, (canonical, _, _) in aliases.items():
+        if canonical == name:
+            img = frames[name]
+            region, offset = trim_frame(img) if trim else (img, (0, 0))
+            stored[name] = (region, offset, img.size)
+
+    slot = 2 * extrude + padding
+    items = [(name, region.width + slot, region.height + slot)
+             for name, (region, _, _) in stored.items()]
+    pages = []
+    for (width, height), placed in pack_pages(items, max_size):
+        page = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        infos = {}
+        for name, (canonical, flip_x, flip_y) in aliases.items():
+            if canonical not in placed:
+                continue
+            region, (ox, oy), (sw, sh) = stored[canonical]
+            x, y = placed[canonical][0] + extrude, placed[canonical][1] + extrude
+            if canonical == name:
+                _paste_extruded(page, region, x, y, extrude)
+            infos[name] = {
+                "frame": (x, y, region.width, region.height),
+                "source": (ox, oy, sw, sh),
+                "flip_x": flip_x,
+                "flip_y": flip_y,
+            }
+        pages.append((page, infos))
+    return pages
+
+
+def phaser_atlas_json(image_name, page_size, infos):
+    """
+    Describe one atlas page in Phaser's JSON hash format. Frames stored as a
+    mirror of another carry extra "flipX"/"flipY" keys, which Phaser keeps
+    in frame.customData.
+    """
+    frames = {}
+    for name, info in infos.items():
+        x, y, w, h = info["frame"]
+        ox, oy, sw, sh = info["source"]
+        frames[name] = {
+            "frame": {"x": x, "y": y, "w": w, "h": h},
+            "rotated": False,
+            "trimmed": (w, h) != (sw, sh),
+            "spriteSourceSize": {"x": ox, "y": oy, "w": w, "h": h},
+            "sourceSize": {"w": sw, "h": sh},
+        }
+        if info["flip_x"]:
+            frames[name]["flipX"] = True
+        if info["flip_y"]:
+            frames[name]["flipY"] = True
+    return {
+        "frames": frames,
+        "meta": {
+            "app": "mathbuilder scripts/atlas.py",
+            "version": "1.0",
+            "image": image_name,
+            "format": "RGBA8888",
+            "size": {"w": page_size[0], "h": page_size[1]},
+            "scale": "1",
+        },
+    }
@@ -0,0 +1,210 @@
+"""
+Memory-bounded processing of very large backgrounds.
+
+process_background() normally holds the whole source as RGBA, plus the
+int16 copy a mask works on and the resized result, so its peak memory
+grows with the source's area. That is fine for 640px art but not for
+4K-wide parallax strips. Above BANDED_MIN_PIXELS it switches to the band
+pipeline here instead:
+
+- the source is read from its pixel_cache memory map in horizontal bands
+  of at most BAND_BYTES, so only one band is ever copied into memory;
+- anything a strategy measures on the whole image (crop rows, corner
+  colour, checkerboard pattern, the auto strategy's preview) is measured
+  first, from a few sampled lines or band by band (masks.fit_mask);
+- each band is masked (masks.band_keep) and fed to resize_bands(), which
+  follows the same resize_plan() as resize.resize() and emits output rows
+  as soon as the LANCZOS filter has seen every source row they need;
+- the output rows are written straight into the PNG
+  (png_optimize.write_png_bands), so the result is never assembled either.
+
+Memory therefore stays at a few bands whatever the source size (about
+100 MB for an 8K-wide source, against 520 MB in memory). The output
+matches the in-memory path except where the resize needs more than one
+window: Pillow recomputes each window's LANCZOS filter positions in
+floating point, which can move a premultiplied value by a level or two.
+"""
+
+import numpy as np
+from PIL import Image
+
+from masks import PREVIEW_SIZE, band_keep, choose_mask, fit_mask
+from resize import resize_plan
+
+# Budget for one band of source rows (RGBA bytes)
+BAND_BYTES = 4 << 20
+# Sources with more pixels than this are processed in bands
+BANDED_MIN_PIXELS = 4 << 20
+
+
+def band_rows(width, multiple=1, budget=BAND_BYTES):
+    """Rows per band of an RGBA image width pixels wide: a multiple of multiple within budget."""
+    rows = max(1, budget // (4 * width))
+    return max(multiple, rows // multiple * multiple)
+
+
+def iter_bands(pixels, top=0, bottom=None, multiple=1):
+    """
+    Yield (y, band) over rows top..bottom of an (h, w, 4) array or memory
+    map, each band an in-memory copy whose height is a multiple of multiple
+    (except the last).
+    """
+    bottom = pixels.shape[0] if bottom is None else bottom
+    rows = band_rows(pixels.shape[1], multiple)
+    for y in range(top, bottom, rows):
+        yield y, np.array(pixels[y:min(bottom, y + rows)])
+
+
+def first_row(pixels, test, top=0, bottom=None):
+    """
+    First row at or after top for which test(y, band) -> bool per row is
+    true, or None.
+    """
+    for y, band in iter_bands(pixels, top, bottom):
+        hits = np.flatnonzero(test(y, band))
+        if len(hits):
+            return y + int(hits[0])
+    return None
+
+
+def preview(pixels, size=PREVIEW_SIZE):
+    """masks.preview() of the image in pixels, box-reduced band by band."""
+    h, w = pixels.shape[:2]
+    factor = max(1, max(w, h) // size)
+    parts = []
+    for _, band in iter_bands(pixels, multiple=factor):
+        band = Image.fromarray(band).convert("RGB")
+        parts.append(np.asarray(band.reduce(factor) if factor > 1 else band))
+    return Image.fromarray(np.concatenate(parts))
+
+
+def auto_plan(pixels):
+    """
+    Plan (see banded_background) using the mask masks.select_mask() picks
+    from the preview and the full-resolution frame of pixels.
+    """
+    return {"mask": choose_mask(preview(pixels), pixels=pixels)}
+
+
+def _masked(band, y, mask, params, origin):
+    keep = band_keep(mask, band[..., :3].astype(np.int16), y - origin, params)
+    np.minimum(band[..., 3], keep, out=band[..., 3])
+    return band
+
+
+def masked_bands(pixels, top, bottom, mask=None, params=None, origin=0, multiple=1):
+    """
+    Yield RGBA bands of rows top..bottom with their alpha lowered to a mask
+    strategy's keep (see masks.band_keep), params fitted by fit_mask() on
+    the rows from origin.
+    """
+    for y, band in iter_bands(pixels, top, bottom, multiple):
+        yield band if mask is None else _masked(band, y, mask, params, origin)
+
+
+def _window(o, scale, size):
+    """Source rows [first, end) that LANCZOS reads for output row o (as Pillow computes them)."""
+    support = 3 * max(scale, 1.0)
+    center = (o + 0.5) * scale
+    return max(int(center - support + 0.5), 0), min(int(center + support + 0.5), size)
+
+
+def resize_bands(bands, src_size, dst_size):
+    """
+    Yield the rows of the src_size image arriving as RGBA bands resized to
+    dst_size, in bands, following resize_plan(): each band is box-reduced
+    by the plan's factors (band heights must be multiples of the vertical
+    factor), and the reduced rows are kept only until every output row
+    they contribute to has been filtered. Output bands stay within
+    BAND_BYTES too, however much the image is enlarged.
+    """
+    factor, resample = (1, 1), False
+    for op, arg in resize_plan(tuple(src_size), tuple(dst_size)):
+        if op == "reduce":
+            factor = arg
+        else:
+            resample = True
+    width = -(-src_size[0] // factor[0])
+    height = -(-src_size[1] // factor[1])
+    dst_w, dst_h = dst_size
+    scale = height / dst_h
+    max_rows = band_rows(dst_w)
+    held, start, next_row = [], 0, 0
+    for band in bands:
+        if factor == (1, 1) and not resample:
+            yield band
+            continue
+        img = Image.fromarray(band).convert("RGBa")
+        if factor != (1, 1):
+            img = img.reduce(factor)
+        if not resample:
+            yield np.asarray(img.convert("RGBA"))
+            continue
+        held.append(np.asarray(img))
+        have = start + sum(len(part) for part in held)
+        rows = np.concatenate(held)
+        while next_row < dst_h:
+            end = next_row
+            while (end < dst_h and end - next_row < max_rows
+                   and (have == height or _window(end, scale, height)[1] <= have)):
+                end += 1
+            if end == next_row:
+                break
+            first, last = _window(next_row, scale, height)[0], _window(end - 1, scale, height)[1]
+            window = Image.frombuffer("RGBa", (width, last - first), rows[first - start:last - start],
+                                      "raw", "RGBa", 0, 1)
+            out = window.resize((dst_w, end - next_row), Image.LANCZOS,
+                                box=(0, next_row * scale - first, width, end * scale - first))
+            yield np.asarray(out.convert("RGBA"))
+            next_row = end
+        keep_from = _window(next_row, scale, height)[0] if next_row < dst_h else height
+        held, start = [rows[keep_from - start:]], keep_from
+
+
+class BandedImage:
+    """
+    A processor result produced row band by row band: width x height RGBA,
+    with bands() returning a fresh iterator of (rows, width, 4) uint8
+    arrays from top to bottom. opaque promises every alpha is 255.
+    save_outputs() streams it into the PNG (png_optimize.write_png_bands).
+    """
+
+    def __init__(self, width, height, bands, opaque=False):
+        self.width = width
+        self.height = height
+        self.size = (width, height)
+        self.opaque = opaque
+        self._bands = bands
+
+    def bands(self):
+        return self._bands()
+
+
+def banded_background(pixels, size, plan=None):
+    """
+    BandedImage of the (h, w, 4) source memory map pixels resized to size.
+    A plan clears the background: rows plan["rows"] (default: all) masked
+    with strategy plan["mask"] and plan["params"], which are fitted on
+    those rows. With plan["crop"] the output starts at the first row the
+    mask leaves visible. No plan keeps the source opaque.
+    """
+    h = pixels.shape[0]
+    top, bottom = (0, h) if plan is None else plan.get("rows", (0, h))
+    origin, mask, params = top, None, None
+    if plan is not None:
+        mask = plan["mask"]
+        params = fit_mask(mask, pixels[top:bottom, :, :3], **plan.get("params", {}))
+    if plan is not None and plan.get("crop"):
+        def visible(y, band):
+            return _masked(band, y, mask, params, origin)[..., 3].any(axis=1)
+        content = first_row(pixels, visible, top, bottom)
+        top = top if content is None else content
+    src_size = (pixels.shape[1], bottom - top)
+    steps = resize_plan(src_size, tuple(size))
+    multiple = next((arg[1] for op, arg in steps if op == "reduce"), 1)
+
+    def bands():
+        return resize_bands(masked_bands(pixels, top, bottom, mask, params, origin, multiple),
+                            src_size, size)
+
+    return BandedImage(size[0], size[1], bands, opaque=mask is None)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the asset pipeline, with stored baselines.
+
+Each stage times one pipeline step on fixed inputs: a source image from
+resources/ decoded once up front, fixed parameters, and `random` and
+NumPy's global RNG reseeded from the stage name before every run (as the
+build's scheduler does per job). A stage is run `warmup` times untimed
+(the first run pays for fonts, lazy imports and the pixel cache) and then
+`repeat` times; the report gives the warm-up time and the min, median,
+mean, standard deviation and max of the timed runs.
+
+    python3 scripts/benchmark.py                  # run all, compare with the baseline
+    python3 scripts/benchmark.py grass-tile win   # run some stages
+    python3 scripts/benchmark.py --save           # record the results as the baseline
+
+Results are compared with scripts/benchmark_baseline.json: a stage whose
+median is more than --threshold (default 25%) slower than its baseline
+median is a regression, and the run exits with status 1. --save merges
+the stages just run into the baseline, which is committed. Timings only
+compare on the same kind of machine, so the baseline records the machine
+it was taken on and a mismatch is reported.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+import generate_audio
+import process_images
+from build_cache import BuildCache
+from scheduler import default_workers, job_seed
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(SCRIPT_DIR, "benchmark_baseline.json")
+BASELINE_VERSION = 1
+# Fail when a stage's median is this much slower than its baseline median
+DEFAULT_THRESHOLD = 0.25
+
+
+def load_source(rel):
+    """A source image from resources/ decoded into memory as RGBA."""
+    with Image.open(os.path.join(process_images.RESOURCES, rel)) as img:
+        return img.convert("RGBA")
+
+
+def _remove_background(stack):
+    img = load_source("player/botty-walk.png")
+    return lambda: process_images.remove_background(img)
+
+
+def _extract_sprites(stack):
+    img = load_source("player/botty-walk.png")
+    return lambda: process_images.extract_sprites(img, target_size=64)
+
+
+def _grass_tile(stack):
+    return lambda: process_images.create_grass_tile(64)
+
+
+def _math_input_bg(stack):
+    return lambda: process_images.create_math_input_bg()
+
+
+def _win(stack):
+    return generate_audio.generate_win
+
+
+def _write_wav(stack):
+    samples = generate_audio.generate_win()
+    path = os.path.join(stack.enter_context(tempfile.TemporaryDirectory(prefix="bench-wav-")),
+                        "win.wav")
+    return lambda: generate_audio.write_wav(path, samples)
+
+
+def _build(stack):
+    """
+    Every manifest output, forced, into a scratch output directory. Built
+    in-process: worker processes started by spawn or forkserver would
+    re-import process_images and write to its real OUTPUT.
+    """
+    assets = process_images.load_manifest()
+    scratch = stack.enter_context(tempfile.TemporaryDirectory(prefix="bench-build-"))
+    stack.callback(setattr, process_images, "OUTPUT", process_images.OUTPUT)
+    process_images.OUTPUT = scratch
+
+    def run():
+        shutil.rmtree(scratch)
+        os.makedirs(scratch)
+        cache = BuildCache(os.path.join(scratch, ".index.json"))
+        process_images.build_assets(assets, list(assets), cache, force=True, workers=1)
+    return run
+
+
+# name -> (setup, default warm-up runs, default repeats). setup(stack) returns
+# the timed callable and registers its cleanup on the contextlib.ExitStack
+STAGES = {
+    "remove-background": (_remove_background, 1, 10),
+    "extract-sprites": (_extract_sprites, 1, 10),
+    "grass-tile": (_grass_tile, 1, 10),
+    "math-input-bg": (_math_input_bg, 1, 10),
+    "win": (_win, 1, 10),
+    "write-wav": (_write_wav, 1, 10),
+    "build": (_build, 1, 3),
+}
+
+
+def time_stage(name, warmup=None, repeat=None):
+    """
+    Run one stage: its warm-up runs, then its timed runs. Returns
+    {"warmup", "runs", "min", "median", "mean", "stdev", "max"} in seconds.
+    Whatever the stage prints is discarded, and whatever its setup leaves
+    behind (scratch directories, patched globals) is cleaned up.
+    """
+    setup, default_warmup, default_repeat = STAGES[name]
+    warmup = default_warmup if warmup is None else warmup
+    repeat = default_repeat if repeat is None else repeat
+    times = []
+    with contextlib.ExitStack() as stack, contextlib.redirect_stdout(io.StringIO()):
+        run = setup(stack)
+        for _ in range(warmup + repeat):
+            random.seed(job_seed(name))
+            np.random.seed(job_seed(name))
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    runs = times[warmup:]
+    return {
+        "warmup": times[0] if warmup else None,
+        "runs": len(runs),
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.fmean(runs),
+        "stdev": statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        "max": max(runs),
+    }
+
+
+def machine():
+    """What a baseline's timings depend on."""
+    return {"platform": platform.platform(), "machine": platform.machine(),
+            "python": platform.python_version(), "cpus": default_workers()}
+
+
+def load_baseline(path):
+    """The baseline's {"machine", "stages"}; empty if missing or from another version."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {"machine": None, "stages": {}}
+    if data.get("version") != BASELINE_VERSION:
+        return {"machine": None, "stages": {}}
+    return data
+
+
+def save_baseline(path, results):
+    """Merge results into the baseline at path, recording this machine."""
+    data = load_baseline(path)
+    stages = dict(data.get("stages", {}))
+    stages.update(results)
+    with open(path, "w") as f:
+        json.dump({"version": BASELINE_VERSION, "machine": machine(), "stages": stages},
+                  f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(result, baseline, threshold):
+    """(change in median against baseline as a fraction, regressed?) or (None, False)."""
+    if baseline is None:
+        return None, False
+    change = result["median"] / baseline["median"] - 1
+    return change, change > threshold
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the asset pipeline stages.")
+    parser.add_argument("stages", nargs="*", metavar="STAGE",
+                        help=f"stages to run (default: all of {', '.join(STAGES)})")
+    parser.add_argument("--repeat", type=int, default=None,
+                        help="timed runs per stage (default: per stage)")
+    parser.add_argument("--warmup", type=int, default=None,
+                        help="untimed runs before them (default: 1)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fraction by which a median may exceed its baseline "
+                             f"(default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--baseline", default=BASELINE,
+                        help="baseline JSON file (default: scripts/benchmark_baseline.json)")
+    parser.add_argument("--save", action="store_true",
+                        help="record these results in the baseline instead of gating on it")
+    args = parser.parse_args()
+    unknown = [name for name in args.stages if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages {unknown}; choose from {', '.join(STAGES)}")
+    if args.repeat is not None and args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.threshold < 0:
+        parser.error("--threshold must not be negative")
+
+    baseline = load_baseline(args.baseline)
+    if not args.save and baseline["machine"] not in (None, machine()):
+        print(f"Note: the baseline was taken on {baseline['machine']}, not {machine()}")
+
+    print(f"{'stage':<18} {'warm-up':>9} {'runs':>4} {'min':>9} {'median':>9} "
+          f"{'mean':>9} {'stdev':>8} {'max':>9}  vs baseline (ms)")
+    results, regressed = {}, []
+    for name in args.stages or STAGES:
+        result = results[name] = time_stage(name, args.warmup, args.repeat)
+        change, slower = compare(result, baseline["stages"].get(name), args.threshold)
+        verdict = "new" if change is None else f"{100 * change:+.0f}%"
+        if slower and not args.save:
+            verdict += "  REGRESSION"
+            regressed.append(name)
+        print(f"{name:<18} {_ms(result['warmup']):>9} {result['runs']:>4} {_ms(result['min']):>9} "
+              f"{_ms(result['median']):>9} {_ms(result['mean']):>9} {_ms(result['stdev']):>8} "
+              f"{_ms(result['max']):>9}  {verdict}")
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Saved {len(results)} stages to {os.path.relpath(args.baseline)}")
+    elif regressed:
+        print(f"{len(regressed)} stage(s) more than {100 * args.threshold:.0f}% slower than "
+              f"the baseline: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
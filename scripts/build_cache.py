@@ -0,0 +1,155 @@
+"""
+Content-addressed build cache for the asset pipeline.
+
+Each output is keyed by a hash of everything that can change it: the
+processor's name and parameters, the bytes of every source image it reads,
+and the pipeline code itself. When an output's key matches the index and
+the file on disk is the one we wrote, the job is skipped.
+
+The index is a small JSON file:
+
+    {"version": 2,
+     "entries": {"atlas/atlas.png": {"key": ...,
+                                     "files": {"atlas/atlas.png": {"size": ..., "mtime_ns": ...,
+                                                                   "sha256": ...},
+                                               "atlas/atlas.json": {...}}}}}
+
+An entry lists every file its job wrote (usually just the output itself),
+and the job is only fresh while all of them are untouched. Stale entries
+(outputs the pipeline no longer produces, or files that vanished from
+disk) are evicted by evict().
+"""
+
+import hashlib
+import json
+import os
+
+CACHE_VERSION = 2
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_fingerprint(script_dir, modules):
+    """
+    Hash of the source of the named pipeline modules in script_dir (e.g.
+    "masks" for masks.py). Editing any of them invalidates all cached
+    outputs. The list is explicit so the key is the same whichever entry
+    point (build, --verify, benchmark) computes it, and whatever it has
+    imported so far.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(modules):
+        path = os.path.join(script_dir, name + ".py")
+        digest.update(os.path.basename(path).encode())
+        digest.update(file_sha256(path).encode())
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """On-disk index mapping each output to the key it was built from."""
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self.entries = {}
+        self._source_hashes = {}
+        if os.path.exists(index_path):
+            try:
+                with open(index_path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("entries", {})
+
+    def source_hash(self, path):
+        """
+        SHA-256 of a source file, memoised while its size and mtime are
+        unchanged (a watch-mode cache lives across edits).
+        """
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._source_hashes.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = self._source_hashes[path] = (stamp, file_sha256(path))
+        return cached[1]
+
+    def key_for(self, processor, params, sources, code_hash, formats=(), environment=None):
+        """
+        Build key for one output. sources maps a display name (stable across
+        checkouts) to the absolute path that is hashed; formats lists the
+        extra encodings written alongside each PNG. environment holds
+        anything else the output depends on, such as library versions.
+        """
+        payload = {
+            "processor": processor,
+            "params": params,
+            "formats": list(formats),
+            "sources": {name: self.source_hash(path) for name, path in sorted(sources.items())},
+            "code": code_hash,
+            "environment": environment or {},
+        }
+        blob = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(blob).hexdigest()
+
+    def is_fresh(self, output, key, output_root):
+        """True if output was built from key and none of its files were touched since."""
+        entry = self.entries.get(output)
+        if entry is None or entry["key"] != key:
+            return False
+        for rel, recorded in entry["files"].items():
+            try:
+                st = os.stat(os.path.join(output_root, rel))
+            except OSError:
+                return False
+            if st.st_size != recorded["size"] or st.st_mtime_ns != recorded["mtime_ns"]:
+                return False
+        return True
+
+    def record(self, output, key, output_root, files=None):
+        """Remember that output (and any extra files) were just written from key."""
+        entry = {"key": key, "files": {}}
+        for rel in files or [output]:
+            path = os.path.join(output_root, rel)
+            st = os.stat(path)
+            entry["files"][rel] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "sha256": file_sha256(path),
+            }
+        self.entries[output] = entry
+
+    def evict(self, live_outputs, output_root):
+        """
+        Drop entries for outputs that are no longer produced or whose files
+        have disappeared. Returns the evicted output names.
+        """
+        live_outputs = set(live_outputs)
+        stale = [
+            output for output, entry in self.entries.items()
+            if output not in live_outputs
+            or not all(os.path.exists(os.path.join(output_root, rel)) for rel in entry["files"])
+        ]
+        for output in stale:
+            del self.entries[output]
+        return stale
+
+    def clear(self):
+        """Forget every entry."""
+        self.entries = {}
+
+    def save(self):
+        """Write the index atomically."""
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries}, f,
+                      indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp, self.index_path)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Synthetic sprite sheets with known ground truth, and a scaling harness.
+
+The real sources in resources/ are a dozen 640px images, which says
+little about how the mask strategies (masks.py) and the sprite finder
+(sprite_index.find_sprite_blobs) scale with resolution, sprite count or
+noise. make_sheet() draws sheets like them at any size: N blue robots,
+in a grid or scattered, on a fake-transparency background (a two-grey
+checkerboard of any period, or near-white), optionally round-tripped
+through JPEG for its block noise. Every robot is drawn without
+antialiasing, so its pixels and bounding box are known exactly.
+
+    python3 scripts/corpus.py bench                       # every strategy, 64px to 8K
+    python3 scripts/corpus.py bench --sizes 256 1024 --layouts grid
+    python3 scripts/corpus.py generate /tmp/corpus        # write the sheets and truth
+    python3 scripts/corpus.py check                       # does auto pick a good mask?
+
+bench times each strategy on each sheet (the median of --repeat runs,
+reported in megapixels per second) and scores its mask against the truth:
+IoU of the kept pixels with the robots' pixels, and the share of pixels
+classified correctly. The sprite finder runs on the sheet with its true
+alpha and reports how many robots it found and the mean IoU of its boxes.
+
+check runs masks.select_mask() on a few sheets (CHECK_SIZES wide by
+default) and exits with status 1 if the mask it picks has an IoU more than
+--tolerance below the best strategy's on any of them, or if the sprite
+finder, given the true alpha, misses or merges a robot (mean box IoU below
+CHECK_BOX_IOU). CI runs it.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from masks import MASK_STRATEGIES, apply_mask, choose_mask
+from sprite_index import find_sprite_blobs
+
+# Sheet widths the harness runs by default; sheets are half as tall
+SIZES = (64, 256, 1024, 2048, 4096, 8192)
+# Sheet widths check runs by default
+CHECK_SIZES = (64, 256, 512, 2048)
+# How far auto's IoU may fall below the best strategy's in check
+CHECK_TOLERANCE = 0.05
+# Lowest mean box IoU of the sprite finder that check accepts
+CHECK_BOX_IOU = 0.9
+LAYOUTS = ("grid", "scattered")
+BACKGROUNDS = ("checkerboard", "white")
+
+# Robot palette: body, limbs, face screen, eyes
+BODY, LIMB, SCREEN, EYES = (52, 118, 232), (36, 88, 196), (22, 32, 84), (90, 220, 255)
+
+
+def draw_robot(h):
+    """An RGBA blue robot about h pixels tall (and 0.7 h wide), with hard edges."""
+    w = max(3, round(h * 0.7))
+    img = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+
+    def box(x0, y0, x1, y1, color):
+        draw.rectangle((round(x0 * w), round(y0 * h), max(round(x0 * w), round(x1 * w) - 1),
+                        max(round(y0 * h), round(y1 * h) - 1)), fill=color + (255,))
+
+    box(0.47, 0.0, 0.53, 0.1, LIMB)          # antenna
+    box(0.2, 0.08, 0.8, 0.42, BODY)          # head
+    box(0.3, 0.16, 0.7, 0.34, SCREEN)        # face screen
+    box(0.37, 0.21, 0.45, 0.27, EYES)
+    box(0.55, 0.21, 0.63, 0.27, EYES)
+    box(0.42, 0.42, 0.58, 0.46, LIMB)        # neck
+    box(0.22, 0.46, 0.78, 0.8, BODY)         # body
+    box(0.04, 0.48, 0.22, 0.56, LIMB)        # arms
+    box(0.78, 0.48, 0.96, 0.56, LIMB)
+    box(0.28, 0.8, 0.44, 1.0, LIMB)          # legs
+    box(0.56, 0.8, 0.72, 1.0, LIMB)
+    return img
+
+
+def _placements(size, robots, layout, rng):
+    """(x, y, height) of each robot on a size (w, h) sheet."""
+    w, h = size
+    if layout == "grid":
+        cols = max(1, math.ceil(math.sqrt(robots * w / h)))
+        rows = math.ceil(robots / cols)
+        cell_w, cell_h = w / cols, h / rows
+        height = max(4, int(min(cell_h, cell_w / 0.7) * 0.7))
+        return [(int(cell_w * (i % cols) + (cell_w - height * 0.7) / 2),
+                 int(cell_h * (i // cols) + (cell_h - height) / 2), height)
+                for i in range(robots)]
+    # Scattered: random sizes and positions, kept a gap apart from each other
+    base = math.sqrt(w * h / robots) * 0.5
+    placed = []
+    for _ in range(robots):
+        for _ in range(500):
+            height = max(4, int(base * rng.uniform(0.75, 1.25)))
+            rw = max(3, round(height * 0.7))
+            gap = max(2, height // 8)
+            if rw + 2 * gap > w or height + 2 * gap > h:
+                continue
+            x = int(rng.integers(gap, w - rw - gap + 1))
+            y = int(rng.integers(gap, h - height - gap + 1))
+            if all(x + rw + gap <= px or px + pw + gap <= x or y + height + gap <= py or py + ph + gap <= y
+                   for px, py, pw, ph in placed):
+                placed.append((x, y, rw, height))
+                break
+    return [(x, y, height) for x, y, _, height in placed]
+
+
+def checkerboard(size, period, colors):
+    """RGB (h, w, 3) two-colour checkerboard of square period pixels."""
+    w, h = size
+    parity = (np.arange(h)[:, None] // period + np.arange(w)[None, :] // period) % 2
+    return np.asarray(colors, dtype=np.uint8)[parity]
+
+
+def make_sheet(width, robots=6, layout="grid", background="checkerboard", period=None,
+               quality=85, seed=0):
+    """
+    A synthetic width x width/2 sheet. Returns (img, truth): img is RGB
+    (JPEG-compressed at quality, None for lossless) and truth holds
+    "mask", a boolean (h, w) array of the robots' pixels, and "boxes",
+    each robot's (left, top, right, bottom) in drawing order. period is
+    the checkerboard's square size (default: width / 40, at least 2).
+    """
+    rng = np.random.default_rng(seed)
+    size = (width, max(1, width // 2))
+    if background == "checkerboard":
+        light = int(rng.integers(228, 250))
+        dark = int(rng.integers(186, 206))
+        period = period or max(2, width // 40)
+        canvas = checkerboard(size, period, [(light,) * 3, (dark,) * 3])
+    else:
+        canvas = np.full((size[1], size[0], 3), int(rng.integers(246, 256)), dtype=np.uint8)
+    sheet = Image.fromarray(canvas).convert("RGBA")
+    mask = np.zeros((size[1], size[0]), dtype=bool)
+    boxes = []
+    for x, y, height in _placements(size, robots, layout, rng):
+        robot = draw_robot(height)
+        sheet.alpha_composite(robot, (x, y))
+        alpha = np.asarray(robot.getchannel("A")) > 0
+        mask[y:y + robot.height, x:x + robot.width] |= alpha
+        ys, xs = np.nonzero(alpha)
+        boxes.append((x + int(xs.min()), y + int(ys.min()), x + int(xs.max()) + 1, y + int(ys.max()) + 1))
+    img = sheet.convert("RGB")
+    if quality is not None:
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=quality)
+        img = Image.open(buf).convert("RGB")
+    return img, {"mask": mask, "boxes": boxes}
+
+
+def mask_scores(keep, truth):
+    """(IoU of kept and true robot pixels, share of pixels classified correctly)."""
+    kept = keep >= 128
+    union = np.count_nonzero(kept | truth)
+    iou = np.count_nonzero(kept & truth) / union if union else 1.0
+    return iou, np.count_nonzero(kept == truth) / truth.size
+
+
+def _box_iou(a, b):
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    inter = max(0, w) * max(0, h)
+    area = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / area if area else 0.0
+
+
+def box_scores(found, boxes):
+    """Mean over the true boxes of the best IoU of any found box."""
+    if not boxes:
+        return 1.0
+    return statistics.fmean(max((_box_iou(box, f) for f in found), default=0.0) for box in boxes)
+
+
+def timed(func, repeat):
+    """(last result, median seconds) of repeat runs of func(); its output is discarded."""
+    times = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def bench_sheet(img, truth, strategies, repeat=3):
+    """
+    [(name, MP/s, IoU, accuracy)] of each mask strategy on img ("auto" picks
+    one by masks.select_mask() and times the pick too), then of the sprite
+    finder as ("blobs", MP/s, found count, mean box IoU).
+    """
+    mp = img.width * img.height / 1e6
+    rows = []
+    for name in strategies:
+        if name == "auto":
+            out, seconds = timed(lambda: apply_mask(img, choose_mask(img)), repeat)
+            name = f"auto ({_picked(img)})"
+        else:
+            out, seconds = timed(lambda: apply_mask(img, name), repeat)
+        keep = np.asarray(out.getchannel("A"))
+        rows.append((name, mp / seconds, *mask_scores(keep, truth["mask"])))
+    clean = _true_alpha(img, truth)
+    found, seconds = timed(lambda: find_sprite_blobs(clean), repeat)
+    rows.append(("blobs", mp / seconds, len(found), box_scores(found, truth["boxes"])))
+    return rows
+
+
+def _true_alpha(img, truth):
+    """img as RGBA with the robots' pixels opaque and the rest transparent."""
+    clean = img.convert("RGBA")
+    clean.putalpha(Image.fromarray(np.where(truth["mask"], 255, 0).astype(np.uint8)))
+    return clean
+
+
+def _picked(img):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return choose_mask(img)
+
+
+def bench(sizes, layouts, backgrounds, robots, quality, period, strategies, repeat):
+    """Print bench_sheet()'s rows for every sheet of the corpus."""
+    print(f"{'sheet':<34} {'strategy':<26} {'MP/s':>8} {'IoU':>6} {'acc':>7}")
+    for width in sizes:
+        for layout in layouts:
+            for background in backgrounds:
+                img, truth = make_sheet(width, robots, layout, background, period, quality)
+                sheet = f"{img.width}x{img.height} {layout} {background}"
+                for name, rate, a, b in bench_sheet(img, truth, strategies, repeat):
+                    if name == "blobs":
+                        print(f"{sheet:<34} {name:<26} {rate:>8.1f} {b:>6.3f} "
+                              f"{a:>3}/{len(truth['boxes']):<3}")
+                    else:
+                        print(f"{sheet:<34} {name:<26} {rate:>8.1f} {a:>6.3f} {100 * b:>6.2f}%")
+
+
+def check(sizes, layouts, backgrounds, robots, quality, period, tolerance):
+    """
+    Print the mask choose_mask() picks on every sheet of the corpus next to
+    the best strategy by IoU, and what the sprite finder makes of the sheet
+    with its true alpha. Returns the number of sheets where the pick is
+    more than tolerance worse or the finder fails (see CHECK_BOX_IOU).
+    """
+    print(f"{'sheet':<34} {'picked':<14} {'IoU':>6} {'best':<14} {'IoU':>6} {'blobs':>7} {'box IoU':>7}")
+    failures = 0
+    for width in sizes:
+        for layout in layouts:
+            for background in backgrounds:
+                img, truth = make_sheet(width, robots, layout, background, period, quality)
+                ious = {name: mask_scores(np.asarray(apply_mask(img, name).getchannel("A")),
+                                          truth["mask"])[0]
+                        for name in MASK_STRATEGIES}
+                best = max(ious, key=ious.get)
+                picked = _picked(img)
+                found = find_sprite_blobs(_true_alpha(img, truth))
+                box_iou = box_scores(found, truth["boxes"])
+                ok = (ious[picked] >= ious[best] - tolerance and len(found) == len(truth["boxes"])
+                      and box_iou >= CHECK_BOX_IOU)
+                failures += not ok
+                sheet = f"{img.width}x{img.height} {layout} {background}"
+                print(f"{sheet:<34} {picked:<14} {ious[picked]:>6.3f} {best:<14} {ious[best]:>6.3f} "
+                      f"{len(found):>3}/{len(truth['boxes']):<3} {box_iou:>7.3f}{'' if ok else '  FAIL'}")
+    return failures
+
+
+def generate(out_dir, sizes, layouts, backgrounds, robots, quality, period):
+    """Write every sheet as <name>.png with <name>.mask.png and <name>.json (its boxes)."""
+    os.makedirs(out_dir, exist_ok=True)
+    for width in sizes:
+        for layout in layouts:
+            for background in backgrounds:
+                img, truth = make_sheet(width, robots, layout, background, period, quality)
+                name = f"{width}-{layout}-{background}"
+                # Lossless, so the sheet on disk is exactly the one the truth describes,
+                # JPEG noise included
+                path = os.path.join(out_dir, f"{name}.png")
+                img.save(path)
+                Image.fromarray(truth["mask"]).save(os.path.join(out_dir, f"{name}.mask.png"))
+                with open(os.path.join(out_dir, f"{name}.json"), "w") as f:
+                    json.dump({"size": list(img.size), "boxes": truth["boxes"]}, f)
+                    f.write("\n")
+                print(f"  Wrote {path} ({len(truth['boxes'])} robots)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic sprite sheets and a scaling harness.")
+    parser.add_argument("command", choices=["bench", "generate", "check"])
+    parser.add_argument("out_dir", nargs="?", help="where generate writes the corpus")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None,
+                        help="sheet widths in pixels (default: 64 to 8192; check: "
+                             f"{', '.join(map(str, CHECK_SIZES))})")
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument("--backgrounds", nargs="+", choices=BACKGROUNDS, default=list(BACKGROUNDS))
+    parser.add_argument("--robots", type=int, default=6, help="robots per sheet (default: 6)")
+    parser.add_argument("--quality", type=int, default=85,
+                        help="JPEG quality of the noise round trip; 0 keeps sheets lossless")
+    parser.add_argument("--period", type=int, default=None,
+                        help="checkerboard square size (default: width / 40)")
+    parser.add_argument("--strategies", nargs="+", default=[*MASK_STRATEGIES, "auto"],
+                        choices=[*MASK_STRATEGIES, "auto"])
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement")
+    parser.add_argument("--tolerance", type=float, default=CHECK_TOLERANCE,
+                        help="how far below the best IoU check lets auto's pick be "
+                             f"(default: {CHECK_TOLERANCE})")
+    args = parser.parse_args()
+    quality = args.quality or None
+    sizes = args.sizes or list(CHECK_SIZES if args.command == "check" else SIZES)
+    if args.command == "check":
+        failures = check(sizes, args.layouts, args.backgrounds, args.robots, quality,
+                         args.period, args.tolerance)
+        if failures:
+            print(f"{failures} sheet(s) failed: auto picked a mask more than {args.tolerance} "
+                  f"IoU below the best, or the sprite finder missed robots")
+            sys.exit(1)
+    elif args.command == "generate":
+        if not args.out_dir:
+            parser.error("generate needs an output directory")
+        generate(args.out_dir, sizes, args.layouts, args.backgrounds, args.robots,
+                 quality, args.period)
+    else:
+        bench(sizes, args.layouts, args.backgrounds, args.robots, quality, args.period,
+              args.strategies, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Alternative extraction strategies for the sprite sheets and backgrounds.
+
+These began as three one-off scripts (fix_sprites_and_bg.py,
+fix_remaining.py and fix_final.py). Each ran after process_images.py and
+overwrote botty-idle/walk/jump, hills and clouds with a different
+algorithm, so an output was decoded and encoded up to four times and the
+art depended on which scripts were run and in which order. They are now
+strategies that a manifest entry selects with its "strategy" param (see
+process_sprite_sheet and process_background), and the build writes each
+output exactly once.
+
+Sprite sheet strategies split the cleaned sheet into a known number of
+frames by its column profile. Background strategies return the cleaned
+and cropped image, leaving the resize to the processor. The background
+keys themselves are mask strategies in masks.py. Each background strategy
+also has a *_plan version that describes the same crop and mask for a
+source too large to load (see bands.banded_background).
+"""
+
+import numpy as np
+from PIL import Image
+
+from bands import first_row
+from masks import apply_mask
+from resize import resize
+from sprite_index import AlphaIndex, content_spans
+
+
+# ── Sprite sheets ──────────────────────────────────────────
+
+
+def fit_spans(spans, count):
+    """
+    Force a list of (start, end) column spans to exactly count entries by
+    merging the two closest neighbours or halving the widest span.
+    """
+    spans = list(spans)
+    while len(spans) > count:
+        gaps = [spans[i + 1][0] - spans[i][1] for i in range(len(spans) - 1)]
+        i = gaps.index(min(gaps))
+        spans[i:i + 2] = [(spans[i][0], spans[i + 1][1])]
+    while spans and len(spans) < count:
+        i = max(range(len(spans)), key=lambda j: (spans[j][1] - spans[j][0], j))
+        s, e = spans[i]
+        mid = (s + e) // 2
+        spans[i:i + 1] = [(s, mid), (mid, e)]
+    return spans
+
+
+def _merge_close(spans, gap):
+    merged = spans[:1]
+    for s, e in spans[1:]:
+        if s - merged[-1][1] < gap:
+            merged[-1] = (merged[-1][0], e)
+        else:
+            merged.append((s, e))
+    return merged
+
+
+def frame_bboxes(img, count, alpha_threshold=50, merge_gap=10, min_width=0,
+                 drop_before_merge=False, empty_bottom=0):
+    """
+    Bounding boxes of count sprites laid out left to right: column spans of
+    content, with gaps under merge_gap closed and spans narrower than
+    min_width dropped (before or after merging), fitted to count.
+    """
+    h = img.height
+    index = AlphaIndex(img, alpha_threshold=alpha_threshold)
+    spans = content_spans(index.column_profile())
+    if drop_before_merge:
+        spans = _merge_close([(s, e) for s, e in spans if e - s >= min_width], merge_gap)
+    else:
+        spans = [(s, e) for s, e in _merge_close(spans, merge_gap) if e - s > min_width]
+    print(f"    Found {len(spans)} content spans (need {count})")
+    bboxes = []
+    for sx, ex in fit_spans(spans, count):
+        top, bottom = index.span_bounds(sx, ex) or (h, empty_bottom)
+        bboxes.append((sx, top, ex, bottom))
+    return bboxes
+
+
+def stitch_frames(clean, bboxes, target_size=64, pad=2, fill=0.85, min_size=1):
+    """
+    Crop each box (plus pad) from clean, scale it to fill the given share
+    of a target_size frame, bottom-aligned 2px above the edge, and lay the
+    frames out as a horizontal strip. Boxes under min_size stay empty.
+    """
+    sheet = Image.new("RGBA", (target_size * len(bboxes), target_size), (0, 0, 0, 0))
+    for i, (left, top, right, bottom) in enumerate(bboxes):
+        sprite = clean.crop((max(0, left - pad), max(0, top - pad),
+                             min(clean.width, right + pad), min(clean.height, bottom + pad)))
+        sw, sh = sprite.size
+        if sw < min_size or sh < min_size:
+            continue
+        scale = min(target_size * fill / sw, target_size * fill / sh)
+        new_w = max(1, int(sw * scale))
+        new_h = max(1, int(sh * scale))
+        sprite = resize(sprite, (new_w, new_h))
+        # Masked twice (into the frame, then the sheet), which squares
+        # soft alpha, as the original scripts did
+        frame = Image.new("RGBA", (target_size, target_size), (0, 0, 0, 0))
+        frame.paste(sprite, ((target_size - new_w) // 2, target_size - new_h - 2), sprite)
+        sheet.paste(frame, (i * target_size, 0), frame)
+    return sheet
+
+
+def generous_sheet(img, frames, target_size=64):
+    """Near-white/grey removal, frames filling 88% (was fix_sprites_and_bg.py)."""
+    clean = apply_mask(img, "generous")
+    bboxes = frame_bboxes(clean, frames, alpha_threshold=30, merge_gap=8, empty_bottom=1)
+    return stitch_frames(clean, bboxes, target_size, pad=2, fill=0.88)
+
+
+def checkerboard_sheet(img, frames, target_size=64):
+    """Checkerboard color removal (was fix_remaining.py)."""
+    clean = apply_mask(img, "checkerboard")
+    bboxes = frame_bboxes(clean, frames, merge_gap=5, min_width=15)
+    return stitch_frames(clean, bboxes, target_size, pad=3)
+
+
+def saturation_sheet(img, frames, target_size=64):
+    """Keep Botty's saturated blue and drop every grey pixel (was fix_final.py)."""
+    clean = apply_mask(img, "saturation")
+    bboxes = frame_bboxes(clean, frames, min_width=20, drop_before_merge=True)
+    return stitch_frames(clean, bboxes, target_size, pad=2, min_size=5)
+
+
+# ── Backgrounds ────────────────────────────────────────────
+
+
+def _crop_below_content_top(clean):
+    """Full-width crop from the first row with visible pixels down."""
+    bbox = clean.getbbox()
+    return clean.crop((0, bbox[1], clean.width, clean.height)) if bbox else clean
+
+
+def _green_rows(rgb):
+    """Per row of rgb (int16), whether any tenth column holds green, non-white content."""
+    r, g, b = (rgb[:, ::10, c] for c in range(3))
+    green = (g > 80) & (g > r) & (g > b * 0.8) & ~((r > 230) & (g > 230) & (b > 230))
+    return green.any(axis=1)
+
+
+def green_hills(img):
+    """
+    Crop to 20px above the first row with green content, then clear
+    near-white and grey (was fix_sprites_and_bg.fix_hills).
+    """
+    pixels = np.array(img.convert("RGBA"), dtype=np.uint8)
+    rows = np.flatnonzero(_green_rows(pixels[..., :3].astype(np.int16)))
+    content_top = int(rows[0]) if len(rows) else img.height
+    crop = Image.fromarray(pixels).crop((0, max(0, content_top - 20), img.width, img.height))
+    return apply_mask(crop, "generous", threshold=232)
+
+
+def cloud_strip(img):
+    """The middle 45% of the image with near-white and grey cleared (was fix_clouds)."""
+    strip_h = int(img.height * 0.45)
+    top = (img.height - strip_h) // 2
+    return apply_mask(img.crop((0, top, img.width, top + strip_h)), "generous", threshold=230)
+
+
+def checkerboard_background(img):
+    """Checkerboard color removal, cropped to content (was fix_remaining.fix_hills)."""
+    return _crop_below_content_top(apply_mask(img, "checkerboard", extra_threshold=40))
+
+
+def saturation_background(img):
+    """Soft saturation key, cropped to content (was fix_final.fix_hills)."""
+    return _crop_below_content_top(apply_mask(img, "saturation", low=20, high=35))
+
+
+# ── Background band plans ──────────────────────────────────
+
+
+def green_hills_plan(pixels):
+    """green_hills() for an (h, w, 4) memory map."""
+    h = pixels.shape[0]
+    content_top = first_row(pixels, lambda y, band: _green_rows(band[..., :3].astype(np.int16)))
+    content_top = h if content_top is None else content_top
+    return {"rows": (max(0, content_top - 20), h), "mask": "generous", "params": {"threshold": 232}}
+
+
+def cloud_strip_plan(pixels):
+    """cloud_strip() for an (h, w, 4) memory map."""
+    h = pixels.shape[0]
+    strip_h = int(h * 0.45)
+    top = (h - strip_h) // 2
+    return {"rows": (top, top + strip_h), "mask": "generous", "params": {"threshold": 230}}
+
+
+def checkerboard_background_plan(pixels):
+    """checkerboard_background() for an (h, w, 4) memory map."""
+    return {"mask": "checkerboard", "params": {"extra_threshold": 40}, "crop": True}
+
+
+def saturation_background_plan(pixels):
+    """saturation_background() for an (h, w, 4) memory map."""
+    return {"mask": "saturation", "params": {"low": 20, "high": 35}, "crop": True}
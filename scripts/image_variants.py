@@ -0,0 +1,124 @@
+"""
+WebP and AVIF variants of the pipeline's PNG outputs.
+
+A manifest entry can ask for extra formats with "formats": ["webp", "avif"].
+Each PNG the entry writes is then also encoded as lossless WebP and
+near-lossless AVIF next to it (atlas.png -> atlas.webp, atlas.avif),
+inside the same build job. Formats the local Pillow build cannot encode
+are skipped with a note in the log.
+
+The game fetches whichever format is smallest, so a variant must look like
+the PNG: every variant is decoded again and dropped, with a note, if any
+channel of any pixel is off by more than VARIANT_MAX_ERROR or a fully
+transparent pixel is no longer transparent.
+
+format_manifest() collects the byte size of every variant for the image
+manifest the game reads to fetch the smallest format the browser can
+decode (src/game/systems/ImageFormats.js).
+"""
+
+import json
+import os
+
+import numpy as np
+from PIL import Image, features
+
+from png_optimize import canonical_rgba
+
+# Pillow save() arguments per variant. WebP is lossless; quality only sets
+# encoder effort there. Pillow cannot write lossless (identity-matrix) AVIF,
+# so AVIF is q100 with full-resolution chroma, which leaves only YUV
+# rounding: at q90 edges were off by up to 66 levels and transparent
+# pixels picked up alpha.
+VARIANT_ENCODERS = {
+    "webp": {"format": "WEBP", "lossless": True, "quality": 50, "method": 6},
+    "avif": {"format": "AVIF", "quality": 100, "subsampling": "4:4:4", "speed": 6},
+}
+# Largest per-channel difference from the PNG a variant may decode to
+VARIANT_MAX_ERROR = 2
+
+
+def available_formats():
+    """The variant formats this Pillow build can encode."""
+    return [fmt for fmt in VARIANT_ENCODERS if features.check(fmt)]
+
+
+def variant_path(png_path, fmt):
+    """Path of the fmt variant of a .png path."""
+    return os.path.splitext(png_path)[0] + "." + fmt
+
+
+def variant_error(path, pixels):
+    """
+    (largest per-channel difference, transparent pixels made visible) of
+    the image at path against the canonical RGBA pixels it was encoded from.
+    The colour of pixels that stay fully transparent is never seen, so it
+    is not compared.
+    """
+    with Image.open(path) as variant:
+        decoded = canonical_rgba(variant).astype(np.int16)
+    error = int(np.abs(decoded - pixels).max())
+    leaked = int(np.count_nonzero((pixels[..., 3] == 0) & (decoded[..., 3] != 0)))
+    return error, leaked
+
+
+def save_variants(img, png_path, formats):
+    """
+    Write the requested variants of img next to png_path, deleting any that
+    decode too far from img (see VARIANT_MAX_ERROR).
+    Returns [(path, description)] for each variant written.
+    """
+    written = []
+    supported = available_formats()
+    # Same transparent-pixel cleanup as the PNG, so all variants match
+    pixels = canonical_rgba(img)
+    rgba = Image.fromarray(pixels)
+    for fmt in formats:
+        if fmt not in supported:
+            print(f"    Skipping {fmt.upper()} variant: not supported by this Pillow build")
+            continue
+        options = dict(VARIANT_ENCODERS[fmt])
+        path = variant_path(png_path, fmt)
+        rgba.save(path, options.pop("format"), **options)
+        error, leaked = variant_error(path, pixels.astype(np.int16))
+        if error > VARIANT_MAX_ERROR or leaked:
+            os.remove(path)
+            print(f"    Dropping {fmt.upper()} variant of {os.path.basename(png_path)}: "
+                  f"off by up to {error} levels, {leaked} transparent pixels visible")
+            continue
+        written.append((path, f"{img.width}x{img.height} {fmt.upper()}, "
+                              f"{os.path.getsize(path)} bytes"))
+    return written
+
+
+def format_manifest(output_root, variants):
+    """
+    Byte size of each format of each PNG. variants maps a PNG path relative
+    to output_root to the variant formats built for it. Returns, keyed by
+    that path:
+
+        {"atlas/atlas.png": {"png": 113961, "webp": 89426, "avif": 45617}}
+    """
+    manifest = {}
+    for rel, formats in sorted(variants.items()):
+        path = os.path.join(output_root, rel)
+        if not os.path.exists(path):
+            continue
+        sizes = {"png": os.path.getsize(path)}
+        for fmt in formats:
+            if os.path.exists(variant_path(path, fmt)):
+                sizes[fmt] = os.path.getsize(variant_path(path, fmt))
+        manifest[rel] = sizes
+    return manifest
+
+
+def write_format_manifest(path, manifest):
+    """Write the manifest as JSON, leaving the file untouched if unchanged. Returns True if written."""
+    text = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == text:
+                return False
+    with open(path, "w") as f:
+        f.write(text)
+    return True
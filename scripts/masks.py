@@ -0,0 +1,474 @@
+"""
+Background-removal masks for the fake-transparent source images.
+
+Every way the pipeline clears a background is a mask strategy in
+MASK_STRATEGIES with the same interface:
+
+    strategy(rgb, **params) -> keep
+
+rgb is an int16 (h, w, 3) array, so channel differences can go negative,
+and keep is a uint8 (h, w) coverage: 255 keeps a pixel, 0 clears it and
+values in between make a soft edge. apply_mask() lowers an image's alpha
+to keep.
+
+Which strategy suits a source depends on how its background was faked
+(white, flat colour, two-shade checkerboard, grey around a saturated
+character). select_mask() picks one without a full-resolution run of each,
+and auto_mask() then runs only the winner on the full image. Every
+strategy is scored on the image's outer frame, which is always background
+in these sources, at full resolution. A strategy with a background model
+(the corner colour, the estimated checkerboard) scores by how much of the
+frame that model explains; a generic mask scores lower, by how much of the
+frame it clears and how coherent its mask of a small preview is. When
+nothing scores MIN_SCORE the pick falls back to FALLBACK_MASK, with a
+warning. `corpus.py check` tests the picks against synthetic sheets.
+
+Two strategies measure something on the whole image first: the corner
+colour and the checkerboard pattern. fit_mask() measures those once and
+band_keep() then masks any horizontal band of the image with them, which
+is how sources too large to hold in memory are processed (see bands.py).
+"""
+
+import numpy as np
+from PIL import Image
+
+# Longest side of the preview that select_mask() scores strategies on
+PREVIEW_SIZE = 128
+# Masks keeping less or more than this share of the preview are degenerate
+MIN_KEPT, MAX_KEPT = 0.005, 0.98
+# Width in pixels of the image frame that masks are expected to clear
+BORDER_WIDTH = 2
+# Per-channel distance within which a background model explains a pixel
+MODEL_TOLERANCE = 16
+# Highest score of a mask without a background model (see score_mask)
+GENERIC_WEIGHT = 0.9
+# Below this score no strategy is trusted and choose_mask() falls back
+MIN_SCORE = 0.5
+FALLBACK_MASK = "white-grey"
+
+
+def _channels(rgb):
+    return rgb[..., 0], rgb[..., 1], rgb[..., 2]
+
+
+def _neutral(r, g, b, tolerance):
+    return (np.abs(r - g) < tolerance) & (np.abs(g - b) < tolerance)
+
+
+def _planar(rgb):
+    """
+    rgb with each channel stored as a contiguous plane (a copy unless it
+    already is), for masks that test every channel several times.
+    """
+    return np.moveaxis(np.ascontiguousarray(np.moveaxis(rgb, 2, 0)), 0, 2)
+
+
+def _keep(clear):
+    return np.where(clear, 0, 255).astype(np.uint8)
+
+
+def white_grey_mask(rgb, threshold=240):
+    """
+    Clear near-white pixels and every neutral grey from dark to light, which
+    covers both shades of the generated checkerboard (~83 to ~250). Safe for
+    Botty, whose blue has large r/g vs b differences.
+    """
+    r, g, b = _channels(rgb)
+    white = (r > threshold) & (g > threshold) & (b > threshold)
+    grey = _neutral(r, g, b, 15) & (r > 30) & (r < 252)
+    return _keep(white | grey)
+
+
+def corner_color(rgb):
+    """Average colour sampled near the four corners, as an int64 array."""
+    h, w = rgb.shape[:2]
+    corners = rgb[[2, 2, h - 3, h - 3], [2, w - 3, 2, w - 3]].astype(np.int64)
+    return corners.sum(axis=0) // 4
+
+
+def color_match(rgb, color, tolerance):
+    """Pixels within tolerance of color in every channel, as a boolean array."""
+    r, g, b = _channels(rgb)
+    return ((np.abs(r - color[0]) < tolerance) &
+            (np.abs(g - color[1]) < tolerance) &
+            (np.abs(b - color[2]) < tolerance))
+
+
+def corner_mask(rgb, tolerance=30, color=None):
+    """
+    Clear pixels within tolerance of color, by default the average colour
+    sampled near the four corners (corner_color).
+    """
+    return _keep(color_match(rgb, corner_color(rgb) if color is None else color, tolerance))
+
+
+def generous_mask(rgb, threshold=235):
+    """Clear near-white pixels and light neutral grey only."""
+    r, g, b = _channels(rgb)
+    white = (r > threshold) & (g > threshold) & (b > threshold)
+    return _keep(white | (_neutral(r, g, b, 15) & (r > 175)))
+
+
+def analyze_checkerboard(rgb):
+    """
+    Light and dark checkerboard colours, averaged from the light and mid-grey
+    pixels of the top-left 20x20 corner; grey defaults when one is missing.
+    Only a fallback for estimate_checkerboard, which looks at the whole frame.
+    """
+    corner = rgb[:20, :20].reshape(-1, 3).astype(np.int64)
+    brightness = corner.sum(axis=1) / 3
+    light = corner[brightness > 170]
+    dark = corner[(brightness > 100) & (brightness < 170)]
+    avg_light = tuple(int(c) for c in light.sum(axis=0) // len(light)) if len(light) else (204, 204, 204)
+    avg_dark = tuple(int(c) for c in dark.sum(axis=0) // len(dark)) if len(dark) else (153, 153, 153)
+    return avg_light, avg_dark
+
+
+def _edge_profile(rgb, axis, samples=512):
+    """
+    Mean absolute luminance (r + g + b) step across each column boundary
+    (axis=1) or row boundary (axis=0), averaged over at most `samples`
+    evenly spaced lines. Every square edge of a checkerboard lines up, so
+    its edges add up to a spike train while JPEG noise and content average
+    out. Only the sampled lines are read, which keeps 4K frames cheap.
+    """
+    lines = rgb.shape[1 - axis]
+    step = max(1, lines // samples)
+    sampled = rgb[::step] if axis == 1 else rgb[:, ::step]
+    lum = sampled.sum(axis=2, dtype=np.int16)
+    return np.abs(np.diff(lum, axis=axis)).mean(axis=1 - axis)
+
+
+def _period(profile, min_period=4):
+    """
+    (period, strength) of the strongest repeat in an edge profile, from its
+    FFT autocorrelation. Multiples of the period correlate as well as the
+    period itself, so the first local peak within 80% of the best one wins.
+    Generated checkerboards are often resized to a fractional square size,
+    so the period is then refined from the peaks near 2, 4, 8, ... times
+    it, each halving the error of the one before.
+    strength is the first peak's correlation, between 0 and 1.
+    """
+    n = len(profile)
+    if n // 2 <= min_period + 1:
+        return None, 0.0
+    centered = profile - profile.mean()
+    spectrum = np.fft.rfft(centered, 2 * n)
+    corr = np.fft.irfft(spectrum * np.conj(spectrum))[:n // 2 + 1]
+    if corr[0] <= 0:
+        return None, 0.0
+    corr /= corr[0]
+    lags = np.arange(min_period, n // 2)
+    peaks = lags[(corr[lags] >= corr[lags - 1]) & (corr[lags] >= corr[lags + 1])]
+    # No repeat at all: only anti-correlated bumps (tiny or flat images)
+    if not len(peaks) or corr[peaks].max() <= 0:
+        return None, 0.0
+    first = int(peaks[corr[peaks] >= 0.8 * corr[peaks].max()][0])
+    period, multiple = float(first), 1
+    while 2 * multiple * period + 2 < n // 2:
+        multiple *= 2
+        lag = int(round(multiple * period))
+        lag += int(corr[lag - 1:lag + 2].argmax()) - 1
+        a, b, c = corr[lag - 1], corr[lag], corr[lag + 1]
+        # Parabolic interpolation of the peak between neighbouring lags
+        offset = 0.5 * (a - c) / (a - 2 * b + c) if a - 2 * b + c < 0 else 0.0
+        period = (lag + offset) / multiple
+    return period, float(corr[first])
+
+
+def _phase(profile, period):
+    """
+    Where squares start, in [0, period): the circular mean of the edge
+    positions weighted by edge strength. profile[i] is the step between
+    pixels i and i + 1, so an edge there starts a square at i + 1.
+    """
+    angles = 2 * np.pi * (np.arange(len(profile)) + 1) / period
+    z = np.sum(profile * np.exp(1j * angles))
+    return float(np.angle(z) / (2 * np.pi) * period % period)
+
+
+def estimate_checkerboard(rgb, min_strength=0.3, min_contrast=15):
+    """
+    Period, phase and both square colours of a fake-transparency
+    checkerboard, estimated across the whole frame:
+
+        {"period": (px, py), "phase": (ox, oy), "colors": (even, odd)}
+
+    Periods and phases are in pixels and may be fractional. Squares start
+    at x = ox + k * px (likewise for y), and a pixel is in an "even" square
+    when its column and row square indices have the same parity. The
+    colours are per-channel medians over the centre pixel of every square,
+    which is the pixel furthest from JPEG ringing at the square edges.
+    Centres on coloured content are skipped. Returns None when there is no
+    clear periodic pattern, its cells are not square, or the two colours
+    are too close to tell apart.
+    """
+    period, phase = [], []
+    for axis in (1, 0):
+        profile = _edge_profile(rgb, axis)
+        p, strength = _period(profile)
+        if p is None or strength < min_strength:
+            return None
+        period.append(p)
+        phase.append(_phase(profile, p))
+
+    (px, py), (ox, oy) = period, phase
+    if abs(px - py) > 0.1 * max(px, py):
+        return None
+    h, w = rgb.shape[:2]
+    cols = np.arange(-1, w / px + 1)
+    rows = np.arange(-1, h / py + 1)
+    xs = np.floor(ox + (cols + 0.5) * px).astype(np.int64)
+    ys = np.floor(oy + (rows + 0.5) * py).astype(np.int64)
+    cols, xs = cols[(xs >= 0) & (xs < w)], xs[(xs >= 0) & (xs < w)]
+    rows, ys = rows[(ys >= 0) & (ys < h)], ys[(ys >= 0) & (ys < h)]
+    centres = rgb[ys[:, None], xs[None, :]]
+    odd = (cols[None, :] + rows[:, None]) % 2 == 1
+    neutral = centres.max(axis=2) - centres.min(axis=2) < 24
+    colors = []
+    for parity in (False, True):
+        samples = centres[(odd == parity) & neutral]
+        if not len(samples):
+            return None
+        colors.append(tuple(int(c) for c in np.median(samples, axis=0)))
+    if abs(sum(colors[0]) - sum(colors[1])) < min_contrast:
+        return None
+    return {"period": (px, py), "phase": (ox, oy), "colors": tuple(colors)}
+
+
+def checkerboard_pattern(rgb):
+    """
+    The checkerboard to clear from rgb: estimate_checkerboard()'s result,
+    or {"colors": analyze_checkerboard(rgb)} when there is no clear pattern.
+    """
+    return estimate_checkerboard(rgb) or {"colors": analyze_checkerboard(rgb)}
+
+
+def checkerboard_match(rgb, pattern, tolerance, top=0, left=0):
+    """
+    Pixels within tolerance of the colour of the square they lie in, or of
+    either colour within a pixel of a square edge, where JPEG blends the
+    two. pattern is estimate_checkerboard()'s result for an image, and rgb
+    the region of that image starting at row top and column left.
+    """
+    (px, py), (ox, oy), (even, odd) = pattern["period"], pattern["phase"], pattern["colors"]
+    rgb = _planar(rgb)
+    h, w = rgb.shape[:2]
+    # Square index and seam flag per column and per row, broadcast below.
+    # Offsets start one period early so they stay positive.
+    x = np.arange(left, left + w) - ox + px
+    y = np.arange(top, top + h) - oy + py
+    odd_x, odd_y = (x // px).astype(np.int64) % 2 == 1, (y // py).astype(np.int64) % 2 == 1
+    seam_x = (x % px < 1) | (x % px > px - 1)
+    seam_y = (y % py < 1) | (y % py > py - 1)
+    parity = odd_x[None, :] ^ odd_y[:, None]
+    seam = seam_x[None, :] | seam_y[:, None]
+    return ((color_match(rgb, even, tolerance) & (~parity | seam)) |
+            (color_match(rgb, odd, tolerance) & (parity | seam)))
+
+
+def checkerboard_mask(rgb, extra_threshold=45, pattern=None, top=0, left=0):
+    """
+    Clear the checkerboard found by estimate_checkerboard (see
+    checkerboard_match). Also clears near-white and mid-grey neutral
+    pixels. Without a detectable pattern it falls back to matching either
+    colour sampled from the top-left corner (analyze_checkerboard).
+
+    pattern (see checkerboard_pattern) defaults to the one measured on rgb.
+    When rgb is a region of the image it was measured on, top and left are
+    the region's first row and column.
+    """
+    rgb = _planar(rgb)
+    r, g, b = _channels(rgb)
+    clear = ((r > 235) & (g > 235) & (b > 235)) | (_neutral(r, g, b, 12) & (r > 140) & (r < 220))
+
+    board = checkerboard_pattern(rgb) if pattern is None else pattern
+    if "period" not in board:
+        for color in board["colors"]:
+            clear |= color_match(rgb, color, extra_threshold)
+        return _keep(clear)
+    return _keep(clear | checkerboard_match(rgb, board, extra_threshold, top, left))
+
+
+def saturation_mask(rgb, low=26, high=26):
+    """
+    Keep colourful pixels and clear grey ones: saturation (max - min channel)
+    below low is cleared, and between low and high the coverage ramps up
+    linearly for a soft edge.
+    """
+    sat = rgb.max(axis=2) - rgb.min(axis=2)
+    keep = np.full(sat.shape, 255, dtype=np.uint8)
+    if high > low:
+        ramp = (sat >= low) & (sat < high)
+        keep[ramp] = 255 * (sat[ramp] - low) // (high - low)
+    keep[sat < low] = 0
+    return keep
+
+
+MASK_STRATEGIES = {
+    "white-grey": white_grey_mask,
+    "corners": corner_mask,
+    "generous": generous_mask,
+    "checkerboard": checkerboard_mask,
+    "saturation": saturation_mask,
+}
+
+
+# Image-wide measurements per strategy: rgb -> params that pin them
+MASK_FITS = {
+    "corners": lambda rgb: {"color": corner_color(rgb)},
+    "checkerboard": lambda rgb: {"pattern": checkerboard_pattern(rgb)},
+}
+
+
+# Background models of the fitted strategies: (rgb, params from fit_mask,
+# top, left, tolerance) -> pixels of the region of rgb at (top, left) that
+# the model predicts within tolerance, or None when the fit found no model
+MASK_MODELS = {
+    "corners": lambda rgb, params, top, left, tolerance: color_match(rgb, params["color"], tolerance),
+    "checkerboard": lambda rgb, params, top, left, tolerance: (
+        checkerboard_match(rgb, params["pattern"], tolerance, top, left)
+        if "period" in params["pattern"] else None),
+}
+
+
+def fit_mask(strategy, rgb, **params):
+    """
+    params for strategy plus whatever it would measure on the whole of rgb
+    (see MASK_FITS), so that band_keep() gives every band of rgb the mask
+    the full image would get. rgb may be a memory map: the corner colour
+    reads four pixels and the checkerboard estimate a few hundred lines.
+    """
+    fit = MASK_FITS.get(strategy)
+    return dict(params, **fit(rgb)) if fit else dict(params)
+
+
+def band_keep(strategy, rgb, top, params, left=0):
+    """
+    keep for the region of an image starting at row top and column left
+    (by default a band of whole rows), with params from fit_mask().
+    """
+    if strategy == "checkerboard":
+        return checkerboard_mask(rgb, top=top, left=left, **params)
+    return MASK_STRATEGIES[strategy](rgb, **params)
+
+
+def apply_mask(img, strategy, **params):
+    """img as RGBA with its alpha lowered to the named strategy's mask."""
+    pixels = np.array(img.convert("RGBA"), dtype=np.uint8)
+    keep = MASK_STRATEGIES[strategy](pixels[..., :3].astype(np.int16), **params)
+    np.minimum(pixels[..., 3], keep, out=pixels[..., 3])
+    return Image.fromarray(pixels)
+
+
+def preview(img, size=PREVIEW_SIZE):
+    """img box-filtered by an integer factor until its longest side is about size."""
+    img = img.convert("RGB")
+    factor = max(1, max(img.size) // size)
+    return img.reduce(factor) if factor > 1 else img
+
+
+def border_regions(rgb, width=BORDER_WIDTH):
+    """(top, left, region) of the four strips making up the outer width-pixel frame of rgb."""
+    h, w = rgb.shape[:2]
+    width = max(1, min(width, h // 2, w // 2))
+    return [(0, 0, rgb[:width]), (h - width, 0, rgb[h - width:]),
+            (width, 0, rgb[width:h - width, :width]), (width, w - width, rgb[width:h - width, w - width:])]
+
+
+def coherence(keep):
+    """
+    1 minus the share of a mask's edge pixels that disagree with the
+    majority of their 3x3 neighbourhood: near 1 for solid shapes and low
+    for speckle.
+    """
+    kept = keep >= 128
+    h, w = kept.shape
+    padded = np.pad(kept, 1, mode="edge").astype(np.uint8)
+    votes = sum(padded[dy:dy + h, dx:dx + w] for dy in range(3) for dx in range(3))
+    flips = kept != (votes >= 5)
+    edge = ((padded[1:-1, :-2] != kept) | (padded[1:-1, 2:] != kept) |
+            (padded[:-2, 1:-1] != kept) | (padded[2:, 1:-1] != kept))
+    return float(1 - flips.sum() / max(1, edge.sum()))
+
+
+def score_mask(strategy, rgb, small):
+    """
+    {"score", "border_cleared", "model_fit", "coherence"} of a strategy on
+    an image: rgb at full resolution (an array or memory map; only its
+    frame and what fit_mask() measures are read) and small, its preview.
+
+    border_cleared is the share of the image's outer frame, which is
+    always background in these sources, that the fitted mask clears.
+    model_fit, for strategies with a background model (MASK_MODELS), is
+    the share of the frame that model predicts to within MODEL_TOLERANCE:
+    near 1 when the corner colour or the estimated checkerboard really is
+    the background. A fitted model that explains the frame is trusted over
+    the generic masks, which clear anything light or grey and so also eat
+    into the sprites; those score border_cleared times the coherence of
+    their preview mask, scaled by GENERIC_WEIGHT. Masks keeping almost
+    nothing or almost everything of the preview score 0.
+    """
+    params = fit_mask(strategy, rgb)
+    cleared = matched = fitted = total = 0
+    for top, left, region in border_regions(rgb):
+        region = np.asarray(region, dtype=np.int16)
+        cleared += np.count_nonzero(band_keep(strategy, region, top, params, left) < 128)
+        total += region.shape[0] * region.shape[1]
+        if strategy in MASK_MODELS:
+            match = MASK_MODELS[strategy](region, params, top, left, MODEL_TOLERANCE)
+            if match is not None:
+                fitted += 1
+                matched += np.count_nonzero(match)
+    border_cleared = cleared / total
+    model_fit = matched / total if fitted else None
+
+    keep = MASK_STRATEGIES[strategy](small)
+    share = np.count_nonzero(keep >= 128) / keep.size
+    coherent = coherence(keep)
+    if not MIN_KEPT <= share <= MAX_KEPT:
+        score = 0.0
+    elif model_fit is not None:
+        score = border_cleared * model_fit
+    else:
+        score = border_cleared * coherent * GENERIC_WEIGHT
+    return {"score": float(score), "border_cleared": border_cleared, "model_fit": model_fit,
+            "coherence": coherent}
+
+
+def select_mask(img, candidates=None, size=PREVIEW_SIZE, pixels=None):
+    """
+    Best mask strategy for img (see score_mask). Returns (name, {name:
+    score_mask() result}); ties go to the strategy listed first in
+    candidates (default: MASK_STRATEGIES). When img is only a preview,
+    pixels is the full image as an (h, w, 3 or 4) array or memory map.
+    When no strategy scores MIN_SCORE, name is None.
+    """
+    small = np.asarray(preview(img, size)).astype(np.int16)
+    rgb = np.asarray(img.convert("RGB")) if pixels is None else pixels[..., :3]
+    scores = {name: score_mask(name, rgb, small) for name in candidates or MASK_STRATEGIES}
+    best = max(scores, key=lambda name: scores[name]["score"])
+    return (best if scores[best]["score"] >= MIN_SCORE else None), scores
+
+
+def choose_mask(img, candidates=None, pixels=None):
+    """
+    The strategy select_mask() picks for img, logged with its scores, or
+    FALLBACK_MASK, with a warning, when none scores MIN_SCORE.
+    """
+    name, scores = select_mask(img, candidates, pixels=pixels)
+    if name is None:
+        best = max(scores, key=lambda name: scores[name]["score"])
+        print(f"    Warning: no mask scores {MIN_SCORE} (best {best}, "
+              f"{scores[best]['score']:.2f}); falling back to {FALLBACK_MASK}")
+        return FALLBACK_MASK
+    result = scores[name]
+    fit = "" if result["model_fit"] is None else f", model fit {result['model_fit']:.0%}"
+    print(f"    Mask: {name} (score {result['score']:.2f}, "
+          f"border {result['border_cleared']:.0%} cleared{fit})")
+    return name
+
+
+def auto_mask(img, candidates=None):
+    """img with the background removed by the strategy choose_mask() picks."""
+    return apply_mask(img, choose_mask(img, candidates))
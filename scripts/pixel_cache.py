@@ -0,0 +1,199 @@
+"""
+Decoded-pixel cache shared by the asset pipeline scripts.
+
+Every processor in process_images.py reads its JPEG from resources/ and
+converts it to RGBA before doing anything else. Decoding a 640x640
+JPEG costs a few milliseconds, and decoding a 4K one costs far more. Every
+build job, worker process and pipeline run pays that cost again.
+
+This cache decodes each source once. It stores the RGBA pixels as a raw
+.npy array in .cache/pixels/, named after a hash of the source bytes, so a
+renamed or copied file still hits. open_image() memory-maps the array
+and wraps it in a read-only PIL image without copying it. Pages the OS
+already holds from an earlier run or another process are shared.
+
+Callers that only need a small version of a source can pass reduce=2, 4
+or 8. JPEGs are then decoded at that fraction of their size straight from
+the DCT coefficients (Image.draft), which skips most of the decode work
+and memory. Other formats are box-reduced after decoding. Each reduction
+is cached as its own entry.
+
+Least-recently-used entries are evicted once the directory grows past
+max_bytes (512 MB, or PIXEL_CACHE_MB). The LRU clock is each entry's mtime, which is bumped on every
+hit, so concurrent processes share it without a lock or an index file.
+Entries are written to a temporary name and renamed into place, so a
+reader never maps a partial array.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import PIL
+from PIL import Image
+
+from build_cache import file_sha256
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(PROJECT_ROOT, ".cache", "pixels")
+# Default size cap; PIXEL_CACHE_MB in the environment overrides it
+MAX_BYTES = 512 << 20
+# Bump when the stored layout changes
+CACHE_FORMAT = 1
+# Rows converted to RGBA at a time when storing an entry
+STORE_BAND_BYTES = 16 << 20
+
+
+class PixelCache:
+    """Directory of memory-mappable RGBA arrays keyed by source content."""
+
+    def __init__(self, root=CACHE_DIR, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("PIXEL_CACHE_MB", MAX_BYTES >> 20)) * (1 << 20))
+        self.root = root
+        self.max_bytes = max_bytes
+        self._keys = {}
+
+    def key(self, path, reduce=1):
+        """
+        Cache key for a source file decoded at 1/reduce of its size: its
+        SHA-256 together with the Pillow version, since another decoder can
+        decode a JPEG to different pixels. The hash is memoised while the
+        file's size and mtime are unchanged.
+        """
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._keys.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = self._keys[path] = (stamp, file_sha256(path))
+        salt = f"{CACHE_FORMAT}:{PIL.__version__}:{cached[1]}:{reduce}"
+        return hashlib.sha256(salt.encode()).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.root, key + ".npy")
+
+    def array(self, path, reduce=1):
+        """
+        Read-only (h, w, 4) uint8 memory map of path's RGBA pixels at 1/reduce
+        of its size, decoding and storing them first if the cache has no
+        entry for its content.
+        """
+        entry = self.entry_path(self.key(path, reduce))
+        try:
+            pixels = np.load(entry, mmap_mode="r")
+        except (OSError, ValueError):
+            self._store(path, entry, reduce)
+            pixels = np.load(entry, mmap_mode="r")
+        else:
+            try:
+                os.utime(entry)
+            except OSError:
+                pass
+        return pixels
+
+    def open_image(self, path, reduce=1):
+        """
+        path decoded as an RGBA image (at 1/reduce of its size, rounded up)
+        that shares memory with the cached array. The image is read-only:
+        Pillow copies it before any in-place edit, and convert(), crop(),
+        resize() etc. return new images anyway.
+        """
+        pixels = self.array(path, reduce)
+        h, w = pixels.shape[:2]
+        return Image.frombuffer("RGBA", (w, h), pixels, "raw", "RGBA", 0, 1)
+
+    def _store(self, path, entry, reduce=1):
+        """
+        Decode path into a new entry. The decoded image is converted to
+        RGBA straight into the memory-mapped file, STORE_BAND_BYTES of rows
+        at a time, so a large source never has a second full-size copy.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        with Image.open(path) as img:
+            size = (-(-img.width // reduce), -(-img.height // reduce))
+            if reduce > 1:
+                img.draft("RGB", size)
+            img.load()
+            if img.size != size:
+                img = img.convert("RGBA").reduce(reduce)
+            w, h = img.size
+            pixels = np.lib.format.open_memmap(tmp, "w+", np.uint8, (h, w, 4))
+            rows = max(1, STORE_BAND_BYTES // (4 * w))
+            for top in range(0, h, rows):
+                band = img.crop((0, top, w, min(h, top + rows))).convert("RGBA")
+                pixels[top:top + band.height] = np.asarray(band)
+            pixels.flush()
+            del pixels
+        os.replace(tmp, entry)
+        self.evict(keep=entry)
+
+    def evict(self, keep=None):
+        """
+        Delete least-recently-used entries until the cache fits in max_bytes.
+        keep (an entry path) is never deleted. Returns the bytes freed.
+        """
+        try:
+            entries = [e for e in os.scandir(self.root) if e.name.endswith(".npy")]
+        except FileNotFoundError:
+            return 0
+        stats = []
+        for e in entries:
+            try:
+                st = e.stat()
+            except FileNotFoundError:
+                continue
+            stats.append((st.st_mtime_ns, st.st_size, e.path))
+        total = sum(size for _, size, _ in stats)
+        freed = 0
+        for _, size, entry in sorted(stats):
+            if total - freed <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            try:
+                os.remove(entry)
+            except FileNotFoundError:
+                continue
+            freed += size
+        return freed
+
+    def clear(self):
+        """Delete every entry."""
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return
+        for e in entries:
+            if e.name.endswith((".npy", ".tmp")):
+                try:
+                    os.remove(e.path)
+                except FileNotFoundError:
+                    pass
+
+
+_default_cache = None
+
+
+def default_cache():
+    """The process-wide cache in CACHE_DIR."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PixelCache()
+    return _default_cache
+
+
+def open_image(path, reduce=1):
+    """Decode path to RGBA through the shared cache (see PixelCache.open_image)."""
+    return default_cache().open_image(path, reduce)
+
+
+def pixel_array(path, reduce=1):
+    """Memory map of path's RGBA pixels through the shared cache (see PixelCache.array)."""
+    return default_cache().array(path, reduce)
+
+
+def source_size(path):
+    """(width, height) of an image file, read from its header alone."""
+    with Image.open(path) as img:
+        return img.size
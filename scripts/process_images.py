@@ -12,15 +12,65 @@ All programmatic assets use modern 3D rendering techniques:
 - Glass-morphism and PBR-inspired materials
 """
 
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageChops
+import PIL
+from PIL import Image, ImageDraw, ImageFont, ImageChops
+import numpy as np
+import argparse
+import fnmatch
+import functools
+import json
 import os
 import math
-import random
+import sys
+import time
+import traceback
+
+from atlas import build_atlas, phaser_atlas_json
+from bands import BANDED_MIN_PIXELS, BandedImage, auto_plan, banded_background
+from build_cache import BuildCache, code_fingerprint
+from extraction import (checkerboard_background, checkerboard_background_plan, checkerboard_sheet,
+                        cloud_strip, cloud_strip_plan, generous_sheet, green_hills,
+                        green_hills_plan, saturation_background, saturation_background_plan,
+                        saturation_sheet)
+from image_variants import (VARIANT_ENCODERS, format_manifest, save_variants, variant_path,
+                            write_format_manifest)
+from masks import apply_mask, auto_mask
+from pixel_cache import default_cache, open_image, pixel_array, source_size
+from png_optimize import save_png, write_png_bands
+from raster import (arc_band_points, ellipse_points, grid_box, grid_points, rect_points,
+                    render_layers, rounded_rect_points)
+from resize import resize
+from scheduler import run_graph
+from sprite_index import AlphaIndex, content_spans, find_sprite_blobs
+from verify import check_file, inspect_files, load_lockfile, png_size, write_lockfile
+from watch import affected_outputs, changed_files, restart_process, scan_files, write_build_stamp
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 RESOURCES = os.path.join(PROJECT_ROOT, "resources")
 OUTPUT = os.path.join(PROJECT_ROOT, "public", "assets", "images")
+MANIFEST = os.path.join(SCRIPT_DIR, "assets.json")
+# Font for button labels, committed so text renders the same on every machine
+FONT = os.path.join(RESOURCES, "fonts", "DejaVuSans-Bold.ttf")
+# Build key and file hashes of every output, committed (see verify.py)
+LOCKFILE = os.path.join(SCRIPT_DIR, "assets.lock.json")
+# Byte size of each format of the images the game loads (see image_variants)
+FORMAT_MANIFEST = os.path.join(OUTPUT, "formats.json")
+# Modules whose code can change an output; their source is part of every
+# build key (see build_cache.code_fingerprint). Add new pipeline modules here
+PIPELINE_MODULES = (
+    "atlas", "bands", "build_cache", "extraction", "image_variants", "masks", "pixel_cache",
+    "png_optimize", "process_images", "raster", "resize", "scheduler", "sprite_index",
+    "verify", "watch",
+)
+CACHE_INDEX = os.path.join(PROJECT_ROOT, ".cache", "process_images", "index.json")
+# Touched after every --watch rebuild; vite.config.js reloads the page on it
+BUILD_STAMP = os.path.join(PROJECT_ROOT, ".cache", "process_images", "watch-stamp.json")
+# Reduced decodes keep at least this many source pixels per output pixel
+# along each axis for the final LANCZOS resize
+DECODE_OVERSAMPLE = 2
+# Coarsest reduced decode (JPEG DCT scaling goes down to 1/8)
+MAX_DECODE_REDUCTION = 8
 
 
 def ensure_dirs():
@@ -34,25 +84,10 @@ def remove_background(img, threshold=240):
     Remove white/near-white background and checkerboard patterns.
     Returns RGBA image with transparent background.
     The checkerboard used by Gemini has two alternating grey shades
-    (~190 dark, ~220-250 light). Both must be removed.
+    (~190 dark, ~220-250 light). Both must be removed (see
+    masks.white_grey_mask).
     """
-    img = img.convert("RGBA")
-    data = list(img.getdata())
-    new_data = []
-    for pixel in data:
-        r, g, b, a = pixel
-        # Remove white and near-white pixels
-        if r > threshold and g > threshold and b > threshold:
-            new_data.append((r, g, b, 0))
-        # Remove checkerboard grey pixels — covers all grey-ish shades
-        # (Gemini uses dark ~83 to light ~250 alternating squares).
-        # Safe for Botty because blue pixels have large r/g vs b differences.
-        elif abs(r - g) < 15 and abs(g - b) < 15 and 30 < r < 252:
-            new_data.append((r, g, b, 0))
-        else:
-            new_data.append(pixel)
-    img.putdata(new_data)
-    return img
+    return apply_mask(img, "white-grey", threshold=threshold)
 
 
 def remove_bg_smart(img, tolerance=30):
@@ -60,32 +95,7 @@ def remove_bg_smart(img, tolerance=30):
     Remove background by sampling corner colors and removing similar pixels.
     Better for images where the background isn't pure white.
     """
-    img = img.convert("RGBA")
-    w, h = img.size
-    # Sample corners to determine background color
-    corners = [
-        img.getpixel((2, 2)),
-        img.getpixel((w - 3, 2)),
-        img.getpixel((2, h - 3)),
-        img.getpixel((w - 3, h - 3)),
-    ]
-    # Average corner color
-    avg_r = sum(c[0] for c in corners) // 4
-    avg_g = sum(c[1] for c in corners) // 4
-    avg_b = sum(c[2] for c in corners) // 4
-
-    data = img.getdata()
-    new_data = []
-    for pixel in data:
-        r, g, b, a = pixel
-        if (abs(r - avg_r) < tolerance and
-            abs(g - avg_g) < tolerance and
-            abs(b - avg_b) < tolerance):
-            new_data.append((r, g, b, 0))
-        else:
-            new_data.append(pixel)
-    img.putdata(new_data)
-    return img
+    return apply_mask(img, "corners", tolerance=tolerance)
 
 
 def crop_to_content(img, padding=2):
@@ -110,33 +120,11 @@ def find_sprite_columns(img, num_sprites, scan_row=None):
         # Scan at the vertical center
         scan_row = img.height // 2
 
-    w = img.width
-    data = img.load()
-
-    # Build a horizontal alpha profile
-    alpha_profile = []
-    for x in range(w):
-        col_has_content = False
-        for y_offset in range(-30, 31, 5):
-            y = max(0, min(img.height - 1, scan_row + y_offset))
-            if data[x, y][3] > 30:  # non-transparent
-                col_has_content = True
-                break
-        alpha_profile.append(col_has_content)
-
-    # Find runs of content
-    spans = []
-    in_span = False
-    start = 0
-    for x, has_content in enumerate(alpha_profile):
-        if has_content and not in_span:
-            start = x
-            in_span = True
-        elif not has_content and in_span:
-            spans.append((start, x))
-            in_span = False
-    if in_span:
-        spans.append((start, w))
+    # Horizontal alpha profile sampled from a band of rows around scan_row
+    index = AlphaIndex(img, alpha_threshold=30)
+    rows = sorted({max(0, min(img.height - 1, scan_row + y_offset))
+                   for y_offset in range(-30, 31, 5)})
+    spans = content_spans(index.column_profile(rows))
 
     # Merge spans that are very close together (< 5px gap)
     merged = [spans[0]] if spans else []
@@ -176,69 +164,76 @@ def find_sprite_columns(img, num_sprites, scan_row=None):
     return merged
 
 
-def extract_sprites(img, num_sprites, target_size=64):
+def square_frame(region, target_size=64):
+    """
+    Turn a region holding one pose into a target_size x target_size frame.
+
+    The region is tight-cropped to its content bbox, then SQUARIFIED: the
+    smaller dimension is expanded so the crop is square, keeping the robot
+    centred horizontally and bottom-aligned. This prevents tall/narrow
+    robots from being scaled down to a sliver when fitting into
+    target_size x target_size.
+    """
+    bbox = region.getbbox()
+    if bbox is None:
+        return Image.new("RGBA", (target_size, target_size), (0, 0, 0, 0))
+
+    left, top, right, bottom = bbox
+    cw = right - left    # content width
+    ch = bottom - top    # content height
+
+    # Squarify: expand the smaller dimension to match the larger,
+    # keeping the content centred within the square region.
+    sq = max(cw, ch)
+    pad_x = (sq - cw) // 2
+
+    # Canvas coords for the square (may extend outside region bounds)
+    sq_x0 = left - pad_x
+    sq_y0 = bottom - sq   # bottom-align within the square
+
+    # Paste the region into a padded canvas so we can crop freely
+    canvas = Image.new("RGBA", (region.width + sq * 2, region.height + sq * 2), (0, 0, 0, 0))
+    canvas.paste(region, (sq, sq), region)
+    # Adjust coords for the canvas offset
+    cx0 = sq_x0 + sq
+    cy0 = sq_y0 + sq
+    square_crop = canvas.crop((cx0, cy0, cx0 + sq, cy0 + sq))
+
+    # Resize to target with a small inset so the sprite doesn't touch the edge
+    inset = max(1, int(sq * 0.04))
+    resized = resize(square_crop, (target_size - inset * 2, target_size - inset * 2))
+    frame = Image.new("RGBA", (target_size, target_size), (0, 0, 0, 0))
+    frame.paste(resized, (inset, inset), resized)
+    return frame
+
+
+def extract_sprites(img, num_sprites=None, target_size=64, mask="white-grey"):
     """
     Extract individual sprite frames from a sheet with scattered poses.
     Returns a properly formatted horizontal sprite sheet.
 
     Strategy:
-    1. Remove checkerboard/white background.
-    2. Divide image evenly into num_sprites columns.
-    3. For each column, tight-crop to content bbox.
-    4. SQUARIFY: expand the smaller dimension so the crop is square,
-       keeping the robot centred. This prevents tall/narrow robots from
-       being scaled down to a sliver when fitting into target_size x target_size.
-    5. Resize the square crop to target_size x target_size.
+    1. Remove checkerboard/white background with the named mask strategy
+       (see masks.py), or the one masks.select_mask picks for "auto".
+    2. Locate the poses. With num_sprites=None every sprite blob is found
+       by connected-component labelling (any number of poses, one or more
+       rows, read left to right and top to bottom). With an explicit
+       num_sprites the sheet is divided evenly into that many columns.
+    3. Squarify and resize each pose (see square_frame).
     """
-    img = img.convert("RGBA")
-    clean = remove_background(img)
-
-    frame_w = clean.width // num_sprites
-    frames = []
+    clean = auto_mask(img) if mask == "auto" else apply_mask(img, mask)
 
-    for i in range(num_sprites):
-        x0 = i * frame_w
-        x1 = x0 + frame_w
-        col = clean.crop((x0, 0, x1, clean.height))
-
-        bbox = col.getbbox()
-        if bbox is None:
-            frames.append(Image.new("RGBA", (target_size, target_size), (0, 0, 0, 0)))
-            continue
+    if num_sprites is None:
+        regions = [clean.crop(box) for box in find_sprite_blobs(clean)]
+    else:
+        frame_w = clean.width // num_sprites
+        regions = [clean.crop((i * frame_w, 0, (i + 1) * frame_w, clean.height))
+                   for i in range(num_sprites)]
 
-        left, top, right, bottom = bbox
-        cw = right - left    # content width
-        ch = bottom - top    # content height
-
-        # Squarify: expand the smaller dimension to match the larger,
-        # keeping the content centred within the square region.
-        sq = max(cw, ch)
-        pad_x = (sq - cw) // 2
-        pad_y = sq - ch       # bottom-align within the square
-
-        # Canvas coords for the square (may extend outside col bounds)
-        sq_x0 = left - pad_x
-        sq_y0 = bottom - sq   # = top - pad_y
-        sq_x1 = sq_x0 + sq
-        sq_y1 = sq_y0 + sq
-
-        # Paste the column into a padded canvas so we can crop freely
-        canvas = Image.new("RGBA", (frame_w + sq * 2, clean.height + sq * 2), (0, 0, 0, 0))
-        canvas.paste(col, (sq, sq), col)
-        # Adjust coords for the canvas offset
-        cx0 = sq_x0 + sq
-        cy0 = sq_y0 + sq
-        square_crop = canvas.crop((cx0, cy0, cx0 + sq, cy0 + sq))
-
-        # Resize to target with a small inset so the sprite doesn't touch the edge
-        inset = max(1, int(sq * 0.04))
-        resized = square_crop.resize((target_size - inset * 2, target_size - inset * 2), Image.LANCZOS)
-        frame = Image.new("RGBA", (target_size, target_size), (0, 0, 0, 0))
-        frame.paste(resized, (inset, inset), resized)
-        frames.append(frame)
+    frames = [square_frame(region, target_size) for region in regions]
 
     # Stitch into horizontal strip
-    sheet = Image.new("RGBA", (target_size * num_sprites, target_size), (0, 0, 0, 0))
+    sheet = Image.new("RGBA", (target_size * max(1, len(frames)), target_size), (0, 0, 0, 0))
     for i, frame in enumerate(frames):
         sheet.paste(frame, (i * target_size, 0), frame)
 
@@ -256,196 +251,160 @@ def draw_star_points(cx, cy, outer_r, inner_r, rotation=0):
 
 
 def create_star_filled(size=32):
-    """Create a modern 3D metallic gold star with specular highlights and depth."""
-    # Work at 4x for smooth anti-aliasing
+    """
+    Create a modern 3D metallic gold star with specular highlights and depth.
+    The art is laid out on a grid 4x the star's size and rasterized with
+    exact coverage straight at size pixels.
+    """
     s = size * 4
-    img = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    px = 1 / 4
     cx, cy = s // 2, s // 2 + 2
     outer_r = s // 2 - 6
     inner_r = outer_r * 0.38
 
-    # Drop shadow
-    shadow_pts = draw_star_points(cx + 3, cy + 4, outer_r, inner_r)
-    draw.polygon(shadow_pts, fill=(80, 50, 0, 80))
-
-    # Apply blur to shadow
-    shadow_layer = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    sd = ImageDraw.Draw(shadow_layer)
-    sd.polygon(shadow_pts, fill=(80, 50, 0, 70))
-    shadow_layer = shadow_layer.filter(ImageFilter.GaussianBlur(4))
-    img = Image.alpha_composite(img, shadow_layer)
-    draw = ImageDraw.Draw(img)
-
-    # Dark base (bottom/shadow side of 3D star)
-    base_pts = draw_star_points(cx + 1, cy + 2, outer_r, inner_r)
-    draw.polygon(base_pts, fill=(180, 120, 0, 255))
+    def star(x, y, outer, inner):
+        return grid_points(draw_star_points(x, y, outer, inner), px)
 
-    # Main gold body
-    main_pts = draw_star_points(cx, cy, outer_r, inner_r)
-    draw.polygon(main_pts, fill=(255, 200, 20, 255), outline=(200, 145, 0, 255))
-
-    # Upper gradient overlay (lighter gold, simulating light from top-left)
-    upper_pts = draw_star_points(cx - 1, cy - 1, outer_r - 3, inner_r - 1)
-    draw.polygon(upper_pts, fill=(255, 225, 60, 200))
-
-    # Specular highlight band (bright streak across upper portion)
-    highlight_pts = draw_star_points(cx - 2, cy - 3, outer_r - 6, inner_r - 2)
-    draw.polygon(highlight_pts, fill=(255, 245, 140, 150))
-
-    # Hot specular spot (bright white-gold point)
+    shadow_pts = star(cx + 3, cy + 4, outer_r, inner_r)
+    main_pts = star(cx, cy, outer_r, inner_r)
     spot_r = int(outer_r * 0.2)
-    draw.ellipse((cx - spot_r - 6, cy - spot_r - 8,
-                  cx + spot_r - 6, cy + spot_r - 8),
-                 fill=(255, 255, 220, 200))
-
-    # Tiny sparkle/lens flare on top point
     sparkle_y = cy - outer_r + 2
-    draw.line([(cx - 4, sparkle_y), (cx + 4, sparkle_y)], fill=(255, 255, 255, 200), width=1)
-    draw.line([(cx, sparkle_y - 4), (cx, sparkle_y + 4)], fill=(255, 255, 255, 200), width=1)
-
-    # Rim light on right edge
-    rim_pts = draw_star_points(cx + 2, cy, outer_r - 1, inner_r)
-    rim_img = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    rd = ImageDraw.Draw(rim_img)
-    rd.polygon(rim_pts, fill=(255, 240, 180, 60))
-    img = Image.alpha_composite(img, rim_img)
-
-    img = img.resize((size, size), Image.LANCZOS)
-    return img
+    return render_layers(size, size, [
+        # Drop shadow, plus a blurred copy of it
+        {"shape": shadow_pts, "fill": (80, 50, 0, 80)},
+        {"shape": shadow_pts, "fill": (80, 50, 0, 70), "blur": 4 * px},
+        # Dark base (bottom/shadow side of 3D star)
+        {"shape": star(cx + 1, cy + 2, outer_r, inner_r), "fill": (180, 120, 0, 255)},
+        # Main gold body
+        {"shape": main_pts, "fill": (255, 200, 20, 255)},
+        {"shape": main_pts, "stroke": px, "fill": (200, 145, 0, 255)},
+        # Upper gradient overlay (lighter gold, simulating light from top-left)
+        {"shape": star(cx - 1, cy - 1, outer_r - 3, inner_r - 1), "fill": (255, 225, 60, 200)},
+        # Specular highlight band (bright streak across upper portion)
+        {"shape": star(cx - 2, cy - 3, outer_r - 6, inner_r - 2), "fill": (255, 245, 140, 150)},
+        # Hot specular spot (bright white-gold point)
+        {"shape": ellipse_points(grid_box((cx - spot_r - 6, cy - spot_r - 8,
+                                           cx + spot_r - 6, cy + spot_r - 8), px)),
+         "fill": (255, 255, 220, 200)},
+        # Tiny sparkle/lens flare on top point
+        {"shape": rect_points(grid_box((cx - 4, sparkle_y, cx + 4, sparkle_y), px)),
+         "fill": (255, 255, 255, 200)},
+        {"shape": rect_points(grid_box((cx, sparkle_y - 4, cx, sparkle_y + 4), px)),
+         "fill": (255, 255, 255, 200)},
+        # Rim light on right edge
+        {"shape": star(cx + 2, cy, outer_r - 1, inner_r), "fill": (255, 240, 180, 60), "mode": "over"},
+    ])
 
 
 def create_star_empty(size=32):
-    """Create a modern 3D brushed silver empty star with subtle depth."""
+    """
+    Create a modern 3D brushed silver empty star with subtle depth.
+    Laid out on a 4x grid like create_star_filled.
+    """
     s = size * 4
-    img = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    px = 1 / 4
     cx, cy = s // 2, s // 2 + 2
     outer_r = s // 2 - 6
     inner_r = outer_r * 0.38
 
-    # Soft shadow
-    shadow_layer = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    sd = ImageDraw.Draw(shadow_layer)
-    shadow_pts = draw_star_points(cx + 2, cy + 3, outer_r, inner_r)
-    sd.polygon(shadow_pts, fill=(0, 0, 0, 40))
-    shadow_layer = shadow_layer.filter(ImageFilter.GaussianBlur(3))
-    img = Image.alpha_composite(img, shadow_layer)
-    draw = ImageDraw.Draw(img)
-
-    # Dark edge (3D thickness)
-    base_pts = draw_star_points(cx + 1, cy + 2, outer_r, inner_r)
-    draw.polygon(base_pts, fill=(100, 105, 115, 255))
-
-    # Main silver body
-    main_pts = draw_star_points(cx, cy, outer_r, inner_r)
-    draw.polygon(main_pts, fill=(155, 160, 175, 255), outline=(115, 120, 135, 255))
-
-    # Upper highlight (brushed metal feel)
-    upper_pts = draw_star_points(cx - 1, cy - 1, outer_r - 3, inner_r - 1)
-    draw.polygon(upper_pts, fill=(180, 185, 200, 160))
-
-    # Subtle specular
-    spec_pts = draw_star_points(cx - 2, cy - 3, outer_r - 8, inner_r - 3)
-    draw.polygon(spec_pts, fill=(200, 205, 215, 100))
-
-    # Inner bevel (recessed center)
-    inner_pts = draw_star_points(cx, cy + 1, outer_r - 10, inner_r - 3)
-    draw.polygon(inner_pts, fill=(130, 135, 150, 100))
-
-    img = img.resize((size, size), Image.LANCZOS)
-    return img
+    def star(x, y, outer, inner):
+        return grid_points(draw_star_points(x, y, outer, inner), px)
+
+    main_pts = star(cx, cy, outer_r, inner_r)
+    return render_layers(size, size, [
+        # Soft shadow
+        {"shape": star(cx + 2, cy + 3, outer_r, inner_r), "fill": (0, 0, 0, 40), "blur": 3 * px},
+        # Dark edge (3D thickness)
+        {"shape": star(cx + 1, cy + 2, outer_r, inner_r), "fill": (100, 105, 115, 255)},
+        # Main silver body
+        {"shape": main_pts, "fill": (155, 160, 175, 255)},
+        {"shape": main_pts, "stroke": px, "fill": (115, 120, 135, 255)},
+        # Upper highlight (brushed metal feel)
+        {"shape": star(cx - 1, cy - 1, outer_r - 3, inner_r - 1), "fill": (180, 185, 200, 160)},
+        # Subtle specular
+        {"shape": star(cx - 2, cy - 3, outer_r - 8, inner_r - 3), "fill": (200, 205, 215, 100)},
+        # Inner bevel (recessed center)
+        {"shape": star(cx, cy + 1, outer_r - 10, inner_r - 3), "fill": (130, 135, 150, 100)},
+    ])
 
 
 def create_button(text, base_color, width=200, height=70):
     """
     Create a modern 3D-style glossy button with PBR-inspired materials.
     Features: 3D extrusion, specular highlights, environment reflection,
-    soft drop shadow, and beveled text.
+    soft drop shadow, and beveled text. Laid out on a 2x grid and
+    rasterized straight at width x height pixels.
     """
-    # Work at 2x for anti-aliasing
     w, h = width * 2, height * 2
-    img = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-
+    px = 1 / 2
     r, g, b = base_color
     radius = h // 2
 
-    # ── Soft blurred drop shadow ──
-    shadow = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    sd = ImageDraw.Draw(shadow)
-    sd.rounded_rectangle(
-        (8, 14, w - 4, h - 2),
-        radius=radius,
-        fill=(int(r * 0.15), int(g * 0.15), int(b * 0.15), 120)
-    )
-    shadow = shadow.filter(ImageFilter.GaussianBlur(6))
-    img = Image.alpha_composite(img, shadow)
-    draw = ImageDraw.Draw(img)
-
-    # ── 3D extrusion (visible thickness on bottom and right) ──
+    def rounded(box, corner):
+        return rounded_rect_points(grid_box(box, px), corner * px)
+
+    def shade(factor):
+        return (int(r * factor), int(g * factor), int(b * factor))
+
+    def tint(amount, alpha):
+        return (min(255, r + amount), min(255, g + amount), min(255, b + amount), alpha)
+
+    body = rounded((4, 4, w - 4, h - 8), radius)
+    layers = [
+        # Soft blurred drop shadow
+        {"shape": rounded((8, 14, w - 4, h - 2), radius), "fill": shade(0.15) + (120,),
+         "blur": 6 * px},
+    ]
+    # 3D extrusion (visible thickness on bottom and right)
     for offset in range(6, 0, -1):
-        darkness = 0.4 + (6 - offset) * 0.05
-        draw.rounded_rectangle(
-            (4 + offset, 4 + offset + 2, w - 4 + offset // 2, h - 6 + offset),
-            radius=radius,
-            fill=(int(r * darkness), int(g * darkness), int(b * darkness), 255)
-        )
-
-    # ── Main button body ──
-    # Bottom half (darker)
-    draw.rounded_rectangle(
-        (4, 4, w - 4, h - 8),
-        radius=radius,
-        fill=(int(r * 0.8), int(g * 0.8), int(b * 0.8), 255)
-    )
-
-    # Upper half gradient (brighter, main color)
-    draw.rounded_rectangle(
-        (4, 4, w - 4, h // 2 + 10),
-        radius=radius,
-        fill=(r, g, b, 255)
-    )
-
-    # ── Specular highlight streak (glossy top surface) ──
-    draw.rounded_rectangle(
-        (12, 6, w - 12, h // 3 + 4),
-        radius=radius - 6,
-        fill=(min(255, r + 50), min(255, g + 50), min(255, b + 50), 180)
-    )
-
-    # Hot specular line (sharp bright edge near top)
-    draw.rounded_rectangle(
-        (20, 8, w - 20, 18),
-        radius=6,
-        fill=(min(255, r + 100), min(255, g + 100), min(255, b + 100), 120)
-    )
-
-    # ── Environment reflection (subtle bright band in lower third) ──
-    draw.rounded_rectangle(
-        (16, h // 2 + 4, w - 16, h // 2 + 14),
-        radius=4,
-        fill=(min(255, r + 30), min(255, g + 30), min(255, b + 30), 50)
-    )
-
-    # ── Border with subtle inner glow ──
-    draw.rounded_rectangle(
-        (4, 4, w - 4, h - 8),
-        radius=radius,
-        outline=(int(r * 0.4), int(g * 0.4), int(b * 0.4), 255),
-        width=3
-    )
-    # Inner highlight border
-    draw.rounded_rectangle(
-        (7, 7, w - 7, h - 11),
-        radius=radius - 3,
-        outline=(min(255, r + 40), min(255, g + 40), min(255, b + 40), 60),
-        width=1
-    )
+        layers.append({
+            "shape": rounded((4 + offset, 4 + offset + 2, w - 4 + offset // 2, h - 6 + offset), radius),
+            "fill": shade(0.4 + (6 - offset) * 0.05) + (255,),
+        })
+    layers += [
+        # Main body: bottom half (darker), upper half (main color)
+        {"shape": body, "fill": shade(0.8) + (255,)},
+        {"shape": rounded((4, 4, w - 4, h // 2 + 10), radius), "fill": (r, g, b, 255)},
+        # Specular highlight streak (glossy top surface)
+        {"shape": rounded((12, 6, w - 12, h // 3 + 4), radius - 6), "fill": tint(50, 180)},
+        # Hot specular line (sharp bright edge near top)
+        {"shape": rounded((20, 8, w - 20, 18), 6), "fill": tint(100, 120)},
+        # Environment reflection (subtle bright band in lower third)
+        {"shape": rounded((16, h // 2 + 4, w - 16, h // 2 + 14), 4), "fill": tint(30, 50)},
+        # Border, and inner highlight border
+        {"shape": body, "stroke": 3 * px, "inset": 1.5 * px, "fill": shade(0.4) + (255,)},
+        {"shape": rounded((7, 7, w - 7, h - 11), radius - 3), "stroke": px, "inset": 0.5 * px,
+         "fill": tint(40, 60)},
+    ]
 
     # ── Text with 3D bevel effect ──
-    font = None
-    for font_path in [
+    # Measured on the 2x layout grid, drawn at the output size
+    layout_font = load_font(52)
+    font = load_font(52 * px)
+    bbox = layout_font.getbbox(text)
+    tx = (w - (bbox[2] - bbox[0])) // 2
+    ty = (h - (bbox[3] - bbox[1])) // 2 - 6
+
+    # Text extrusion shadow (3D depth)
+    for offset in range(4, 0, -1):
+        layers.append({"text": (((tx + offset) * px, (ty + offset + 2) * px), text, font),
+                       "fill": (0, 0, 0, int(60 + (4 - offset) * 20))})
+    layers += [
+        # Text body (white), then its specular highlight (bright top edge)
+        {"text": ((tx * px, ty * px), text, font), "fill": (255, 255, 255, 255)},
+        {"text": ((tx * px, (ty - 1) * px), text, font), "fill": (255, 255, 255, 60)},
+    ]
+    return render_layers(width, height, layers)
+
+
+def font_path():
+    """
+    Path of the TrueType font labels are drawn in: the bundled FONT, else
+    the first bold sans-serif system font found, else None (Pillow's
+    default font).
+    """
+    for path in [
+        FONT,
         "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
         "/Library/Fonts/Arial Bold.ttf",
         "/System/Library/Fonts/Helvetica.ttc",
@@ -453,84 +412,37 @@ def create_button(text, base_color, width=200, height=70):
         "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
         "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
     ]:
-        try:
-            font = ImageFont.truetype(font_path, 52)
-            break
-        except OSError:
-            continue
-    if font is None:
-        font = ImageFont.load_default(size=52)
-
-    bbox = draw.textbbox((0, 0), text, font=font)
-    tw = bbox[2] - bbox[0]
-    th = bbox[3] - bbox[1]
-    tx = (w - tw) // 2
-    ty = (h - th) // 2 - 6
-
-    # Text extrusion shadow (3D depth)
-    for offset in range(4, 0, -1):
-        alpha = int(60 + (4 - offset) * 20)
-        draw.text((tx + offset, ty + offset + 2), text,
-                  fill=(0, 0, 0, alpha), font=font)
-
-    # Text body (white)
-    draw.text((tx, ty), text, fill=(255, 255, 255, 255), font=font)
+        if os.path.exists(path):
+            return path
+    return None
 
-    # Text specular highlight (bright top edge)
-    draw.text((tx, ty - 1), text, fill=(255, 255, 255, 60), font=font)
 
-    # Downscale
-    img = img.resize((width, height), Image.LANCZOS)
-    return img
+@functools.lru_cache(maxsize=None)
+def load_font(size):
+    """The font_path() font at size px, or Pillow's default font. Cached per size."""
+    path = font_path()
+    if path is None:
+        return ImageFont.load_default(size=size)
+    return ImageFont.truetype(path, size)
 
 
 def create_arrow_button(direction, size=64):
     """
     Create a modern glass-morphism touch control button with 3D depth,
     soft glow ring, frosted glass effect, and beveled arrow icon.
+    Laid out on a 4x grid and rasterized straight at size pixels.
     """
-    # Work at 4x for smooth anti-aliasing
     s = size * 4
-    img = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-
+    px = 1 / 4
     cx, cy = s // 2, s // 2
     pad = 8
-
-    # ── Outer glow ring (subtle neon-like) ──
-    glow = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    gd = ImageDraw.Draw(glow)
-    gd.ellipse((pad - 4, pad - 4, s - pad + 4, s - pad + 4),
-               fill=(120, 160, 220, 30))
-    glow = glow.filter(ImageFilter.GaussianBlur(8))
-    img = Image.alpha_composite(img, glow)
-    draw = ImageDraw.Draw(img)
-
-    # ── Glass body (frosted dark background) ──
-    # Outer ring
-    draw.ellipse((pad, pad, s - pad, s - pad),
-                 fill=(25, 35, 55, 180),
-                 outline=(80, 110, 160, 200), width=3)
-
-    # Inner gradient (lighter at top for 3D dome effect)
     inner_pad = pad + 6
-    draw.ellipse((inner_pad, inner_pad, s - inner_pad, s - inner_pad),
-                 fill=(40, 55, 80, 140))
-
-    # Upper specular highlight (glass reflection)
-    highlight = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    hd = ImageDraw.Draw(highlight)
-    # Create an elliptical highlight in the upper portion
-    hx1, hy1 = int(s * 0.25), int(s * 0.12)
-    hx2, hy2 = int(s * 0.75), int(s * 0.45)
-    hd.ellipse((hx1, hy1, hx2, hy2), fill=(140, 170, 220, 50))
-    highlight = highlight.filter(ImageFilter.GaussianBlur(6))
-    img = Image.alpha_composite(img, highlight)
-    draw = ImageDraw.Draw(img)
-
-    # ── Arrow icon with 3D bevel ──
-    arrow_s = s // 5  # Arrow size
 
+    def ellipse(box):
+        return ellipse_points(grid_box(box, px))
+
+    # Arrow icon
+    arrow_s = s // 5
     if direction == "left":
         points = [(cx + arrow_s, cy - arrow_s), (cx - arrow_s, cy), (cx + arrow_s, cy + arrow_s)]
     elif direction == "right":
@@ -538,301 +450,284 @@ def create_arrow_button(direction, size=64):
     elif direction == "jump":
         points = [(cx - arrow_s, cy + arrow_s // 2), (cx, cy - arrow_s), (cx + arrow_s, cy + arrow_s // 2)]
 
-    # Arrow shadow (depth)
-    shadow_pts = [(x + 2, y + 3) for x, y in points]
-    draw.polygon(shadow_pts, fill=(0, 0, 0, 80))
-
-    # Arrow body (bright white)
-    draw.polygon(points, fill=(235, 240, 255, 240))
-
-    # Arrow highlight (top edge brighter)
-    highlight_pts = [(x - 1, y - 1) for x, y in points]
-    draw.polygon(highlight_pts, fill=(255, 255, 255, 60))
-
-    # ── Bottom rim light (subtle edge glow) ──
-    rim = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    rd = ImageDraw.Draw(rim)
-    rd.arc((pad + 2, pad + 2, s - pad - 2, s - pad - 2),
-           start=30, end=150, fill=(100, 140, 200, 60), width=2)
-    img = Image.alpha_composite(img, rim)
-
-    img = img.resize((size, size), Image.LANCZOS)
-    return img
+    body = ellipse((pad, pad, s - pad, s - pad))
+    return render_layers(size, size, [
+        # Outer glow ring (subtle neon-like)
+        {"shape": ellipse((pad - 4, pad - 4, s - pad + 4, s - pad + 4)), "fill": (120, 160, 220, 30),
+         "blur": 8 * px},
+        # Glass body (frosted dark background) and its outer ring
+        {"shape": body, "fill": (25, 35, 55, 180)},
+        {"shape": body, "stroke": 3 * px, "inset": 1.5 * px, "fill": (80, 110, 160, 200)},
+        # Inner gradient (lighter at top for 3D dome effect)
+        {"shape": ellipse((inner_pad, inner_pad, s - inner_pad, s - inner_pad)), "fill": (40, 55, 80, 140)},
+        # Upper specular highlight (glass reflection)
+        {"shape": ellipse((int(s * 0.25), int(s * 0.12), int(s * 0.75), int(s * 0.45))),
+         "fill": (140, 170, 220, 50), "blur": 6 * px},
+        # Arrow shadow (depth), body (bright white), highlight (top edge brighter)
+        {"shape": grid_points([(x + 2, y + 3) for x, y in points], px), "fill": (0, 0, 0, 80)},
+        {"shape": grid_points(points, px), "fill": (235, 240, 255, 240)},
+        {"shape": grid_points([(x - 1, y - 1) for x, y in points], px), "fill": (255, 255, 255, 60)},
+        # Bottom rim light (subtle edge glow)
+        {"shape": arc_band_points(grid_box((pad + 2, pad + 2, s - pad - 2, s - pad - 2), px),
+                                  30, 150, 2 * px),
+         "fill": (100, 140, 200, 60), "mode": "over"},
+    ])
 
 
 def create_math_input_bg(width=400, height=250):
     """
     Create a modern 3D glass-morphism math input panel with PBR-inspired materials.
     Features: frosted glass effect, 3D depth/extrusion, recessed input area,
-    soft ambient occlusion, and warm inner glow.
+    soft ambient occlusion, and warm inner glow. Laid out on a 2x grid and
+    rasterized straight at width x height pixels; each labelled
+    group is painted on its own layer and composited over the panel.
     """
-    # Work at 2x for anti-aliasing
     w, h = width * 2, height * 2
-    result = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    px = 1 / 2
     radius = 40
-
-    # ── Soft blurred drop shadow ──
-    shadow = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    sd = ImageDraw.Draw(shadow)
-    sd.rounded_rectangle(
-        (20, 26, w - 8, h - 4),
-        radius=radius,
-        fill=(20, 40, 80, 60)
-    )
-    shadow = shadow.filter(ImageFilter.GaussianBlur(12))
-    result = Image.alpha_composite(result, shadow)
-
-    # ── 3D extrusion (visible thickness at bottom and right) ──
-    panel = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    pd = ImageDraw.Draw(panel)
-    for offset in range(8, 0, -1):
-        darkness = int(50 + offset * 8)
-        pd.rounded_rectangle(
-            (16 + offset, 16 + offset + 2, w - 16 + offset // 2, h - 16 + offset),
-            radius=radius,
-            fill=(darkness, int(darkness * 1.2), int(darkness * 1.6), 200)
-        )
-    result = Image.alpha_composite(result, panel)
-
-    # ── Main panel body (glass-morphism gradient) ──
-    body = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    bd = ImageDraw.Draw(body)
-
-    # Base panel color
-    bd.rounded_rectangle(
-        (16, 16, w - 16, h - 16),
-        radius=radius,
-        fill=(210, 225, 250, 235)
-    )
-
-    # Upper gradient (lighter, simulating light from above)
-    bd.rounded_rectangle(
-        (16, 16, w - 16, h // 2 + 20),
-        radius=radius,
-        fill=(230, 240, 255, 240)
-    )
-
-    # Specular highlight streak at top
-    bd.rounded_rectangle(
-        (30, 20, w - 30, 50),
-        radius=15,
-        fill=(255, 255, 255, 60)
-    )
-
-    result = Image.alpha_composite(result, body)
-
-    # ── Border with 3D depth ──
-    border = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    brd = ImageDraw.Draw(border)
-    # Outer border (darker)
-    brd.rounded_rectangle(
-        (16, 16, w - 16, h - 16),
-        radius=radius,
-        outline=(60, 120, 200, 255),
-        width=5
-    )
-    # Inner highlight border
-    brd.rounded_rectangle(
-        (22, 22, w - 22, h - 22),
-        radius=radius - 4,
-        outline=(140, 190, 255, 80),
-        width=2
-    )
-    result = Image.alpha_composite(result, border)
-
-    # ── Recessed input area (sunken 3D effect) ──
-    input_area = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    ia = ImageDraw.Draw(input_area)
     inner_y = h // 2 - 50
     inner_h = 100
 
-    # Inset shadow (top and left darker = recessed)
-    ia.rounded_rectangle(
-        (76, inner_y - 2, w - 76, inner_y + inner_h + 2),
-        radius=18,
-        fill=(40, 70, 120, 40)
-    )
-    # White input background
-    ia.rounded_rectangle(
-        (80, inner_y, w - 80, inner_y + inner_h),
-        radius=16,
-        fill=(255, 255, 255, 250)
-    )
-    # Bottom highlight of inset (light coming from below = recessed)
-    ia.rounded_rectangle(
-        (82, inner_y + inner_h - 6, w - 82, inner_y + inner_h - 2),
-        radius=4,
-        fill=(220, 235, 255, 60)
-    )
-    # Inset border
-    ia.rounded_rectangle(
-        (80, inner_y, w - 80, inner_y + inner_h),
-        radius=16,
-        outline=(70, 130, 210, 160),
-        width=2
-    )
-    result = Image.alpha_composite(result, input_area)
-
-    # ── Subtle inner glow around edges ──
-    glow = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    gd = ImageDraw.Draw(glow)
-    gd.rounded_rectangle(
-        (20, 20, w - 20, h - 20),
-        radius=radius - 2,
-        outline=(100, 160, 255, 30),
-        width=6
-    )
-    glow = glow.filter(ImageFilter.GaussianBlur(4))
-    result = Image.alpha_composite(result, glow)
-
-    # ── Ambient occlusion at bottom edge ──
-    ao = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    aod = ImageDraw.Draw(ao)
-    aod.rounded_rectangle(
-        (20, h - 50, w - 20, h - 16),
-        radius=20,
-        fill=(30, 50, 90, 25)
-    )
-    ao = ao.filter(ImageFilter.GaussianBlur(6))
-    result = Image.alpha_composite(result, ao)
-
-    result = result.resize((width, height), Image.LANCZOS)
-    return result
+    def rounded(box, corner):
+        return rounded_rect_points(grid_box(box, px), corner * px)
 
+    input_box = rounded((80, inner_y, w - 80, inner_y + inner_h), 16)
+    layers = [
+        # Soft blurred drop shadow
+        {"shape": rounded((20, 26, w - 8, h - 4), radius), "fill": (20, 40, 80, 60), "blur": 12 * px},
+    ]
+    # 3D extrusion (visible thickness at bottom and right)
+    for offset in range(8, 0, -1):
+        darkness = int(50 + offset * 8)
+        layers.append({
+            "shape": rounded((16 + offset, 16 + offset + 2, w - 16 + offset // 2, h - 16 + offset), radius),
+            "fill": (darkness, int(darkness * 1.2), int(darkness * 1.6), 200), "group": "extrusion",
+        })
+    layers += [
+        # Main panel body (glass-morphism gradient): base color, lighter upper
+        # half (light from above), specular highlight streak at top
+        {"shape": rounded((16, 16, w - 16, h - 16), radius), "fill": (210, 225, 250, 235), "group": "body"},
+        {"shape": rounded((16, 16, w - 16, h // 2 + 20), radius), "fill": (230, 240, 255, 240),
+         "group": "body"},
+        {"shape": rounded((30, 20, w - 30, 50), 15), "fill": (255, 255, 255, 60), "group": "body"},
+        # Border with 3D depth: darker outer border, inner highlight border
+        {"shape": rounded((16, 16, w - 16, h - 16), radius), "stroke": 5 * px, "inset": 2.5 * px,
+         "fill": (60, 120, 200, 255), "group": "border"},
+        {"shape": rounded((22, 22, w - 22, h - 22), radius - 4), "stroke": 2 * px, "inset": px,
+         "fill": (140, 190, 255, 80), "group": "border"},
+        # Recessed input area (sunken 3D effect): inset shadow, white input
+        # background, bottom highlight (light from below), inset border
+        {"shape": rounded((76, inner_y - 2, w - 76, inner_y + inner_h + 2), 18), "fill": (40, 70, 120, 40),
+         "group": "input"},
+        {"shape": input_box, "fill": (255, 255, 255, 250), "group": "input"},
+        {"shape": rounded((82, inner_y + inner_h - 6, w - 82, inner_y + inner_h - 2), 4),
+         "fill": (220, 235, 255, 60), "group": "input"},
+        {"shape": input_box, "stroke": 2 * px, "inset": px, "fill": (70, 130, 210, 160), "group": "input"},
+        # Subtle inner glow around edges
+        {"shape": rounded((20, 20, w - 20, h - 20), radius - 2), "stroke": 6 * px, "inset": 3 * px,
+         "fill": (100, 160, 255, 30), "blur": 4 * px},
+        # Ambient occlusion at bottom edge
+        {"shape": rounded((20, h - 50, w - 20, h - 16), 20), "fill": (30, 50, 90, 25), "blur": 6 * px},
+    ]
+    return render_layers(width, height, layers)
 
-def create_grass_tile(size=64):
+
+def create_grass_tile(size=64, supersample=2):
     """
     Create a modern 3D-style grass tile with depth, ambient occlusion,
     volumetric grass blades, and layered dirt with embedded stones.
+
+    The tile is designed on a grid twice the output size. It is rendered at
+    supersample times the output size (an even factor; 2 renders the design
+    grid itself) and downscaled. Gradients, bands and stones are evaluated
+    per rendered pixel; drips and blades are cells of the design grid. Every
+    layer is a NumPy array, so 4x or 8x supersampling costs little more
+    than 2x.
     """
-    # Work at 2x resolution for anti-aliasing, then downscale
-    s = size * 2
-    img = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    if supersample < 2 or supersample % 2:
+        raise ValueError(f"supersample must be an even factor >= 2, got {supersample}")
+    d = size * 2                # design grid
+    k = supersample // 2        # rendered pixels per design cell
+    s = size * supersample      # rendered size
+    # Design coordinates of every rendered row/column, and their cells
+    yf = np.arange(s) / k
+    xf = yf
+    cy = np.arange(s) // k
+    cx = cy
+
+    # Drawing overwrites pixels (no blending), like ImageDraw on RGBA
+    img = np.zeros((s, s, 4), dtype=np.uint8)
+
+    def fill_rows(rows, color):
+        img[rows] = color
 
     # ── DIRT BODY with layered depth ──
-    # Base warm dirt color
-    for y in range(s):
-        # Vertical gradient: lighter near top (near grass), darker at bottom
-        t = y / s
-        r = int(155 - t * 30 + math.sin(y * 0.3) * 8)
-        g = int(110 - t * 25 + math.sin(y * 0.4 + 1) * 6)
-        b = int(65 - t * 15 + math.sin(y * 0.5 + 2) * 4)
-        draw.line([(0, y), (s, y)], fill=(r, g, b, 255))
+    # Vertical gradient: lighter near top (near grass), darker at bottom
+    t = yf / d
+    fill_rows(slice(None), np.stack([
+        (155 - t * 30 + np.sin(yf * 0.3) * 8).astype(np.int64),
+        (110 - t * 25 + np.sin(yf * 0.4 + 1) * 6).astype(np.int64),
+        (65 - t * 15 + np.sin(yf * 0.5 + 2) * 4).astype(np.int64),
+        np.full(s, 255),
+    ], axis=1)[:, None, :])
 
     # Horizontal sediment layers with ambient occlusion
     layer_positions = [30, 48, 65, 82, 100, 115]
     for ly in layer_positions:
-        ly2 = int(ly * s / 128)
+        ly2 = int(ly * d / 128)
         # Dark line (crack/shadow between layers)
-        draw.line([(0, ly2), (s, ly2)], fill=(90, 60, 35, 140), width=2)
+        fill_rows((cy >= ly2) & (cy < ly2 + 2), (90, 60, 35, 140))
         # Ambient occlusion below crack
-        draw.line([(0, ly2 + 2), (s, ly2 + 2)], fill=(80, 55, 30, 60), width=1)
+        fill_rows(cy == ly2 + 2, (80, 55, 30, 60))
         # Light edge above crack (rim light)
-        draw.line([(0, ly2 - 1), (s, ly2 - 1)], fill=(175, 130, 85, 80), width=1)
+        fill_rows(cy == ly2 - 1, (175, 130, 85, 80))
+
+    # Stones and roots are a handful of shapes; ImageDraw rasterizes those
+    # directly at the rendered size
+    canvas = Image.fromarray(img, "RGBA")
+    draw = ImageDraw.Draw(canvas)
+
+    def box(x0, y0, x1, y1):
+        # Design-grid box covering the same cells at the rendered scale
+        return (x0 * k, y0 * k, (x1 + 1) * k - 1, (y1 + 1) * k - 1)
 
     # Embedded stones with 3D shading
-    random.seed(42)  # Deterministic for reproducibility
     stones = [(20, 55, 14), (70, 45, 10), (16, 90, 12), (90, 80, 11),
               (55, 70, 9), (100, 105, 13), (35, 110, 8)]
     for sx, sy, sr in stones:
-        sx2, sy2, sr2 = int(sx * s / 128), int(sy * s / 128), int(sr * s / 128)
+        sx2, sy2, sr2 = int(sx * d / 128), int(sy * d / 128), int(sr * d / 128)
         # Stone shadow (ambient occlusion)
-        draw.ellipse((sx2 - sr2 + 2, sy2 - sr2 + 2, sx2 + sr2 + 2, sy2 + sr2 + 2),
+        draw.ellipse(box(sx2 - sr2 + 2, sy2 - sr2 + 2, sx2 + sr2 + 2, sy2 + sr2 + 2),
                      fill=(70, 45, 25, 80))
         # Stone body
-        draw.ellipse((sx2 - sr2, sy2 - sr2, sx2 + sr2, sy2 + sr2),
+        draw.ellipse(box(sx2 - sr2, sy2 - sr2, sx2 + sr2, sy2 + sr2),
                      fill=(120, 95, 65, 255))
         # Stone highlight (specular)
-        draw.ellipse((sx2 - sr2 + 2, sy2 - sr2 + 1, sx2 - sr2 + sr2, sy2 - sr2 + sr2 // 2 + 1),
+        draw.ellipse(box(sx2 - sr2 + 2, sy2 - sr2 + 1, sx2 - sr2 + sr2, sy2 - sr2 + sr2 // 2 + 1),
                      fill=(150, 120, 85, 100))
 
     # Small root-like details
-    draw.line([(15 * s // 64, 42 * s // 64), (22 * s // 64, 48 * s // 64)],
-             fill=(100, 75, 40, 100), width=1)
-    draw.line([(50 * s // 64, 55 * s // 64), (58 * s // 64, 52 * s // 64)],
-             fill=(100, 75, 40, 100), width=1)
+    def point(x, y):
+        # Centre of a design cell at the rendered scale
+        return (x * k + (k - 1) / 2, y * k + (k - 1) / 2)
+
+    draw.line([point(15 * d // 64, 42 * d // 64), point(22 * d // 64, 48 * d // 64)],
+              fill=(100, 75, 40, 100), width=k)
+    draw.line([point(50 * d // 64, 55 * d // 64), point(58 * d // 64, 52 * d // 64)],
+              fill=(100, 75, 40, 100), width=k)
+    img = np.array(canvas)
 
     # ── GRASS LAYER with 3D depth ──
-    grass_h = int(22 * s / 64)
+    grass_h = int(22 * d / 64)
 
     # Grass base layer (dark green at bottom of grass zone)
-    for y in range(grass_h + 8):
-        t = y / (grass_h + 8)
-        r = int(55 + t * 35)
-        g = int(140 + t * 55)
-        b = int(35 + t * 30)
-        draw.line([(0, y), (s, y)], fill=(r, g, b, 255))
-
-    # Wavy transition edge (grass meets dirt) with ambient occlusion
-    for x in range(0, s, 2):
-        wave = int(4 * math.sin(x * 0.15) + 2 * math.sin(x * 0.3 + 1))
-        base_y = grass_h + wave
-
-        # Ambient occlusion shadow below grass edge
-        for dy in range(6):
-            alpha = int(120 * (1 - dy / 6))
-            draw.point((x, base_y + dy), fill=(40, 60, 20, alpha))
-            if x + 1 < s:
-                draw.point((x + 1, base_y + dy), fill=(40, 60, 20, alpha))
-
-        # Grass drip (irregular edge)
-        drip_len = int(3 + 2 * math.sin(x * 0.4 + 0.7))
-        for dy in range(drip_len):
-            alpha = int(255 * (1 - dy / drip_len))
-            draw.point((x, base_y - dy), fill=(70, 160, 45, alpha))
-
-    # Individual grass blades (3D tufts)
-    blade_positions = list(range(0, s, 3))
-    for bx in blade_positions:
-        blade_h = int(6 + 4 * math.sin(bx * 0.2 + 0.5))
-        lean = int(2 * math.sin(bx * 0.3))
-        # Dark blade (shadow side)
-        for dy in range(blade_h):
-            t = dy / blade_h
-            px = bx + int(lean * t)
-            py = int(4 + (1 - t) * blade_h)
-            if 0 <= px < s and 0 <= py < s:
-                g_val = int(130 + t * 80)
-                draw.point((px, py), fill=(50, g_val, 30, int(200 + t * 55)))
-        # Light blade (highlight side)
-        if bx + 1 < s:
-            for dy in range(blade_h - 1):
-                t = dy / blade_h
-                px = bx + 1 + int(lean * t)
-                py = int(4 + (1 - t) * blade_h)
-                if 0 <= px < s and 0 <= py < s:
-                    g_val = int(170 + t * 60)
-                    draw.point((px, py), fill=(80, g_val, 45, int(160 + t * 55)))
+    rows = cy < grass_h + 8
+    t = yf[rows] / (grass_h + 8)
+    fill_rows(rows, np.stack([
+        (55 + t * 35).astype(np.int64),
+        (140 + t * 55).astype(np.int64),
+        (35 + t * 30).astype(np.int64),
+        np.full(len(t), 255),
+    ], axis=1)[:, None, :])
+
+    # Wavy transition edge (grass meets dirt), stepped every 2 design columns.
+    # Only the rows around the edge are touched, so work on that band.
+    wave_x = cx - cx % 2
+    base_y = grass_h + (4 * np.sin(wave_x * 0.15) + 2 * np.sin(wave_x * 0.3 + 1)).astype(np.int64)
+    drip_len = (3 + 2 * np.sin(wave_x * 0.4 + 0.7)).astype(np.int64)
+    top = max((base_y.min() - drip_len.max() + 1) * k, 0)
+    bottom = min((base_y.max() + 6) * k, s)
+    band = img[top:bottom]
+    dy = yf[top:bottom, None] - base_y[None, :]
+    cell_dy = cy[top:bottom, None] - base_y[None, :]
+    # Ambient occlusion shadow below grass edge
+    shadow = (cell_dy >= 0) & (cell_dy < 6)
+    alpha = (120 * (1 - dy / 6)).astype(np.int64)
+    band[shadow] = np.stack(np.broadcast_arrays(40, 60, 20, alpha), axis=-1)[shadow]
+    # Grass drip (irregular edge), on the even design columns
+    drip = (-cell_dy >= 0) & (-cell_dy < drip_len[None, :]) & (cx % 2 == 0)[None, :]
+    alpha = (255 * (1 - np.maximum(-dy, 0) / drip_len[None, :])).astype(np.int64)
+    band[drip] = np.stack(np.broadcast_arrays(70, 160, 45, alpha), axis=-1)[drip]
+
+    # Individual grass blades (3D tufts). Every blade cell in drawing order:
+    # per blade, the dark (shadow side) stroke, then the light (highlight
+    # side) stroke one column to the right and one cell shorter.
+    bx = np.arange(0, d, 3)
+    blade_h = (6 + 4 * np.sin(bx * 0.2 + 0.5)).astype(np.int64)
+    lean = (2 * np.sin(bx * 0.3)).astype(np.int64)
+    light = bx + 1 < d
+    steps = np.stack([blade_h, np.where(light, blade_h - 1, 0)], axis=1).ravel()
+    stroke = np.repeat(np.arange(len(steps)), steps)
+    blade, is_light = stroke // 2, stroke % 2
+    step = np.arange(len(stroke)) - np.repeat(np.cumsum(steps) - steps, steps)
+    t = step / blade_h[blade]
+    cells_x = bx[blade] + is_light + (lean[blade] * t).astype(np.int64)
+    cells_y = (4 + (1 - t) * blade_h[blade]).astype(np.int64)
+    colors = np.stack([
+        np.where(is_light, 80, 50),
+        np.where(is_light, 170 + t * 60, 130 + t * 80).astype(np.int64),
+        np.where(is_light, 45, 30),
+        np.where(is_light, 160 + t * 55, 200 + t * 55).astype(np.int64),
+    ], axis=1).astype(np.uint8)
+    inside = (cells_x >= 0) & (cells_x < d) & (cells_y >= 0) & (cells_y < d)
+    # Later strokes cover earlier ones: keep the last write to each cell
+    flat = (cells_y * d + cells_x)[inside][::-1]
+    flat, first = np.unique(flat, return_index=True)
+    blades = np.zeros((d * d, 4), dtype=np.uint8)
+    covered = np.zeros(d * d, dtype=bool)
+    blades[flat] = colors[inside][::-1][first]
+    covered[flat] = True
+    rows = slice(0, (cells_y[inside].max() + 1) * k)
+    covered = covered.reshape(d, d)[cy[rows]][:, cx]
+    img[rows][covered] = blades.reshape(d, d, 4)[cy[rows]][:, cx][covered]
 
     # Top specular highlight (light hitting the grass canopy)
-    highlight = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    hd = ImageDraw.Draw(highlight)
-    for y in range(8):
-        alpha = int(80 * (1 - y / 8))
-        hd.line([(0, y + 2), (s, y + 2)], fill=(180, 255, 140, alpha))
-    img = Image.alpha_composite(img, highlight)
+    highlight = np.zeros((s, s, 4), dtype=np.uint8)
+    rows = (cy >= 2) & (cy < 10)
+    highlight[rows] = (180, 255, 140, 0)
+    highlight[rows, :, 3] = (80 * (1 - (yf[rows] - 2) / 8)).astype(np.int64)[:, None]
+    result = Image.alpha_composite(Image.fromarray(img, "RGBA"),
+                                   Image.fromarray(highlight, "RGBA"))
 
     # ── LEFT EDGE ambient occlusion (subtle) ──
-    ao = Image.new("RGBA", (s, s), (0, 0, 0, 0))
-    aod = ImageDraw.Draw(ao)
-    for x in range(6):
-        alpha = int(30 * (1 - x / 6))
-        aod.line([(x, 0), (x, s)], fill=(0, 0, 0, alpha))
-    img = Image.alpha_composite(img, ao)
+    ao = np.zeros((s, s, 4), dtype=np.uint8)
+    cols = cx < 6
+    ao[:, cols, 3] = (30 * (1 - xf[cols] / 6)).astype(np.int64)[None, :]
+    result = Image.alpha_composite(result, Image.fromarray(ao, "RGBA"))
 
     # Downscale to target size with high-quality resampling
-    img = img.resize((size, size), Image.LANCZOS)
-    return img
+    return resize(result, (size, size))
+
+
+def open_reduced(src, output_size, fraction=1.0, content=None):
+    """
+    Open src at the coarsest reduced decode (see pixel_cache.open_image) that
+    still leaves DECODE_OVERSAMPLE source pixels per pixel of an output of
+    output_size (w, h) made from the given fraction of the source per axis.
+    When the region used is only known after background removal, pass
+    content (img -> bbox or None). It is measured on the coarsest decode.
+    """
+    full_w, full_h = source_size(src)
+    region = (full_w * fraction, full_h * fraction)
+    if content is not None:
+        coarse = open_image(src, MAX_DECODE_REDUCTION)
+        bbox = content(coarse)
+        if bbox is not None:
+            scale = full_w / coarse.width
+            region = ((bbox[2] - bbox[0]) * scale, (bbox[3] - bbox[1]) * scale)
+    reduce = MAX_DECODE_REDUCTION
+    while reduce > 1 and any(r / reduce < DECODE_OVERSAMPLE * o for r, o in zip(region, output_size)):
+        reduce //= 2
+    return open_image(src, reduce)
 
 
 def process_tile(name, target_size=64, needs_transparency=False):
     """Process a tile image: resize and convert to proper PNG."""
     src = os.path.join(RESOURCES, "tiles", name)
-    dst = os.path.join(OUTPUT, "tiles", name)
     print(f"  Processing tile: {name}")
 
-    img = Image.open(src)
+    size = (target_size, target_size)
+    img = open_reduced(src, size) if needs_transparency else open_reduced(src, size, fraction=0.84)
     if needs_transparency:
         img = remove_bg_smart(img)
     else:
@@ -845,39 +740,65 @@ def process_tile(name, target_size=64, needs_transparency=False):
         margin = int(w * 0.08)  # 8% margin to cut rounded edges
         img = img.crop((margin, margin, w - margin, h - margin))
 
-    img = img.resize((target_size, target_size), Image.LANCZOS)
-    img.save(dst, "PNG")
-    print(f"    -> Saved {target_size}x{target_size} PNG")
+    return resize(img, (target_size, target_size))
 
 
-def process_background(name, target_w, target_h, needs_transparency=False):
-    """Process a background image."""
+def process_sprite_sheet(name, target_size=64, strategy="blobs", frames=None):
+    """
+    Process a player sprite sheet with one of SPRITE_SHEET_STRATEGIES. The
+    default finds the poses as blobs, so frames (the frame count) is only
+    needed by the column-splitting strategies.
+    """
+    src = os.path.join(RESOURCES, "player", name)
+    print(f"  Processing sprite sheet: {name} ({strategy})")
+
+    sheet = SPRITE_SHEET_STRATEGIES[strategy](open_image(src), frames, target_size)
+    print(f"    {sheet.width // target_size} frames detected")
+    return sheet
+
+
+def process_background(name, target_w, target_h, needs_transparency=False, strategy="corners",
+                       banded=None):
+    """
+    Process a background image. A transparent one has its background
+    removed (and may be cropped) by one of BACKGROUND_STRATEGIES.
+    Sources over BANDED_MIN_PIXELS (or any source, with banded=True) are
+    processed in memory-bounded bands by the same strategy's
+    BANDED_BACKGROUND_STRATEGIES plan and written as they are resized
+    (see bands.py).
+    """
     src = os.path.join(RESOURCES, "backgrounds", name)
-    dst = os.path.join(OUTPUT, "backgrounds", name)
     print(f"  Processing background: {name}")
 
-    img = Image.open(src)
+    if banded is None:
+        w, h = source_size(src)
+        banded = w * h > BANDED_MIN_PIXELS
+    if banded:
+        print("    Processing in bands")
+        pixels = pixel_array(src)
+        plan = BANDED_BACKGROUND_STRATEGIES[strategy](pixels) if needs_transparency else None
+        return banded_background(pixels, (target_w, target_h), plan)
+
+    img = open_image(src)
 
     if needs_transparency:
-        # Use smart bg removal (corner-sampling) with high tolerance so that
-        # both shades of the grey checkerboard are removed while keeping
-        # white/light-coloured content like clouds intact.
-        img = remove_bg_smart(img, tolerance=80)
+        img = BACKGROUND_STRATEGIES[strategy](img)
     else:
         img = img.convert("RGBA")
 
-    img = img.resize((target_w, target_h), Image.LANCZOS)
-    img.save(dst, "PNG")
-    print(f"    -> Saved {target_w}x{target_h} PNG")
+    return resize(img, (target_w, target_h))
 
 
 def process_object(name, target_size=64, needs_transparency=True):
     """Process an object image."""
     src = os.path.join(RESOURCES, "objects", name)
-    dst = os.path.join(OUTPUT, "objects", name)
     print(f"  Processing object: {name}")
 
-    img = Image.open(src)
+    size = (target_size, target_size)
+    if needs_transparency:
+        img = open_reduced(src, size, content=lambda im: remove_bg_smart(im, tolerance=35).getbbox())
+    else:
+        img = open_reduced(src, size)
 
     if needs_transparency:
         img = remove_bg_smart(img, tolerance=35)
@@ -888,176 +809,519 @@ def process_object(name, target_size=64, needs_transparency=True):
     scale = min(target_size / w, target_size / h) * 0.95
     new_w = max(1, int(w * scale))
     new_h = max(1, int(h * scale))
-    img = img.resize((new_w, new_h), Image.LANCZOS)
+    img = resize(img, (new_w, new_h))
 
     result = Image.new("RGBA", (target_size, target_size), (0, 0, 0, 0))
     paste_x = (target_size - new_w) // 2
     paste_y = (target_size - new_h) // 2
     result.paste(img, (paste_x, paste_y), img if img.mode == "RGBA" else None)
-
-    result.save(dst, "PNG")
-    print(f"    -> Saved {target_size}x{target_size} PNG")
+    return result
 
 
 def process_particle(name, target_size=8):
     """Process a particle image."""
     src = os.path.join(RESOURCES, "particles", name)
-    dst = os.path.join(OUTPUT, "particles", name)
     print(f"  Processing particle: {name}")
 
-    img = Image.open(src)
+    img = open_reduced(src, (target_size, target_size),
+                       content=lambda im: remove_background(im, threshold=230).getbbox())
     img = remove_background(img, threshold=230)
     img = crop_to_content(img, padding=0)
 
     if img.size[0] > 0 and img.size[1] > 0:
-        img = img.resize((target_size, target_size), Image.LANCZOS)
+        img = resize(img, (target_size, target_size))
+    return img
+
+
+def pack_texture_atlas(name, images, sheets=None, max_size=1024, mirrorable=()):
+    """
+    Pack already-built outputs into a Phaser atlas page.
+
+    images maps a texture key to an output path; the whole image becomes the
+    frame of that name. sheets maps a key to a horizontal strip of square
+    frames, stored as frames "<key>-0", "<key>-1", ... . Frames are trimmed
+    and pixel-identical ones deduplicated. The images named in mirrorable
+    may also be stored as the exact mirror of one another, with a flip
+    flag; list only keys whose game code draws them through
+    applyFrameFlip() (TextureAtlas.js). Writes name.png and
+    name.json. The game loads a single page, so frames that do not fit one
+    max_size page fail the build rather than spill onto a page nothing
+    loads.
+    """
+    print(f"  Packing texture atlas: {name}")
+
+    def open_output(path):
+        # Outputs are rewritten by every build, so they bypass the source pixel cache
+        with Image.open(os.path.join(OUTPUT, path)) as img:
+            return img.convert("RGBA")
+
+    frames = {key: open_output(path) for key, path in images.items()}
+    for key, path in (sheets or {}).items():
+        sheet = open_output(path)
+        size = sheet.height
+        for i in range(sheet.width // size):
+            frames[f"{key}-{i}"] = sheet.crop((i * size, 0, (i + 1) * size, size))
+
+    unknown = sorted(set(mirrorable) - set(images))
+    if unknown:
+        raise ValueError(f"{name}: mirrorable names keys that are not images: {', '.join(unknown)}")
+    pages = build_atlas(frames, max_size=max_size, mirrorable=mirrorable)
+    if len(pages) > 1:
+        spilled = sorted(key for _, infos in pages[1:] for key in infos)
+        raise ValueError(f"{name}: {len(spilled)} frames do not fit one {max_size}px "
+                         f"page ({', '.join(spilled)}); raise max_size")
+    page, infos = pages[0]
+    files = {f"{name}.png": page,
+             f"{name}.json": phaser_atlas_json(os.path.basename(name) + ".png", page.size, infos)}
+    stored_px = sum(w * h for _, _, w, h in {info["frame"] for info in infos.values()})
+    source_px = sum(img.width * img.height for img in frames.values())
+    print(f"    {len(frames)} frames on one {page.width}x{page.height} page; "
+          f"stored pixels {stored_px} of {source_px} ({100 * stored_px / source_px:.0f}%)")
+    return files
+
+
+# How a sprite sheet's poses are cut out: (img, frames, target_size) -> sheet.
+# The alternatives come from extraction.py; COLUMN_STRATEGIES split the sheet
+# into its "frames" columns, so load_manifest requires that count for them.
+SPRITE_SHEET_STRATEGIES = {
+    "blobs": lambda img, frames, target_size: extract_sprites(img, frames, target_size),
+    "generous": generous_sheet,
+    "checkerboard": checkerboard_sheet,
+    "saturation": saturation_sheet,
+    # Blobs, with the background mask chosen per sheet on a preview
+    "auto": lambda img, frames, target_size: extract_sprites(img, frames, target_size, mask="auto"),
+}
+COLUMN_STRATEGIES = {"generous", "checkerboard", "saturation"}
+
+# How a transparent background is cleared: img -> RGBA image, before resizing
+BACKGROUND_STRATEGIES = {
+    # Corner sampling with a high tolerance removes both shades of the grey
+    # checkerboard while keeping white/light content like clouds intact
+    "corners": lambda img: remove_bg_smart(img, tolerance=80),
+    "green-hills": green_hills,
+    "cloud-strip": cloud_strip,
+    "checkerboard": checkerboard_background,
+    "saturation": saturation_background,
+    "auto": auto_mask,
+}
+
+# The same strategies for sources processed in bands: pixels -> plan (see
+# bands.banded_background)
+BANDED_BACKGROUND_STRATEGIES = {
+    "corners": lambda pixels: {"mask": "corners", "params": {"tolerance": 80}},
+    "green-hills": green_hills_plan,
+    "cloud-strip": cloud_strip_plan,
+    "checkerboard": checkerboard_background_plan,
+    "saturation": saturation_background_plan,
+    "auto": auto_plan,
+}
+
+# Processors whose "strategy" param selects from a registry
+STRATEGIES = {
+    "process_sprite_sheet": SPRITE_SHEET_STRATEGIES,
+    "process_background": BACKGROUND_STRATEGIES,
+}
+
+# Processors the manifest may name. Each returns the output image.
+PROCESSORS = {
+    func.__name__: func for func in [
+        create_grass_tile, create_button, create_star_filled, create_star_empty,
+        create_math_input_bg, create_arrow_button,
+        process_tile, process_sprite_sheet, process_background, process_object,
+        process_particle, pack_texture_atlas,
+    ]
+}
+
+# Processors that draw text with load_font()
+TEXT_PROCESSORS = {"create_button"}
+
+
+def load_manifest(path=MANIFEST):
+    """
+    Load the asset manifest: an ordered list of entries, one per output,
+
+        {"output": "tiles/dirt.png",        # path under OUTPUT
+         "processor": "process_tile",        # key into PROCESSORS
+         "params": {"name": "dirt.png"},     # keyword arguments; "strategy"
+                                             # picks one of STRATEGIES[processor]
+         "sources": ["tiles/dirt.png"],      # inputs under RESOURCES
+         "depends_on": [],                   # outputs that must be built first
+         "formats": ["webp", "avif"],        # extra encodings of each PNG
+         "size": [64, 64]}                   # expected dimensions
+
+    Returns a dict keyed by output, in manifest order.
+    """
+    with open(path) as f:
+        entries = json.load(f)["assets"]
+    assets = {}
+    for entry in entries:
+        if entry["processor"] not in PROCESSORS:
+            raise ValueError(f"{entry['output']}: unknown processor {entry['processor']!r}")
+        entry.setdefault("params", {})
+        entry.setdefault("sources", [])
+        entry.setdefault("depends_on", [])
+        entry.setdefault("formats", [])
+        strategy = entry["params"].get("strategy")
+        if strategy is not None and strategy not in STRATEGIES.get(entry["processor"], {}):
+            raise ValueError(f"{entry['output']}: unknown strategy {strategy!r}")
+        if (entry["processor"] == "process_sprite_sheet" and strategy in COLUMN_STRATEGIES
+                and entry["params"].get("frames") is None):
+            raise ValueError(f"{entry['output']}: strategy {strategy!r} needs a \"frames\" count")
+        for fmt in entry["formats"]:
+            if fmt not in VARIANT_ENCODERS:
+                raise ValueError(f"{entry['output']}: unknown format {fmt!r}")
+        assets[entry["output"]] = entry
+    for entry in assets.values():
+        for dep in entry["depends_on"]:
+            if dep not in assets:
+                raise ValueError(f"{entry['output']}: depends on unknown output {dep!r}")
+    return assets
+
+
+def select_assets(assets, patterns):
+    """
+    Outputs matching any glob pattern (e.g. "player/*"), plus everything
+    they depend on. No patterns selects every output.
+    """
+    if not patterns:
+        return list(assets)
+    wanted = set()
+    pending = [out for out in assets if any(fnmatch.fnmatch(out, pat) for pat in patterns)]
+    while pending:
+        out = pending.pop()
+        if out not in wanted:
+            wanted.add(out)
+            pending.extend(assets[out]["depends_on"])
+    return [out for out in assets if out in wanted]
+
+
+def save_outputs(result, output, output_root, formats=(), draft=False):
+    """
+    Write a processor's result under output_root. A processor returns either
+    one Image (saved as output) or a dict of {path: Image or JSON data} when
+    it produces several files; a BandedImage (see bands.py) is streamed into
+    its PNG by png_optimize.write_png_bands(). Images go through
+    png_optimize.save_png(), whose size report ends up in the description,
+    and are also written in each of formats (see image_variants). A draft
+    (watch mode) skips both: images get Pillow's fastest PNG encoding and
+    their now-stale variants are deleted, so the game falls back to the
+    PNG. Returns [(path, description)] of what was written.
+    """
+    files = result if isinstance(result, dict) else {output: result}
+    written = []
+    for rel, data in files.items():
+        path = os.path.join(output_root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(data, BandedImage):
+            report = write_png_bands(data, path, level=1 if draft else 9)
+            written.append((rel, f"{data.width}x{data.height} PNG, {report}"))
+            if draft:
+                for fmt in formats:
+                    if os.path.exists(variant_path(path, fmt)):
+                        os.remove(variant_path(path, fmt))
+            elif formats:
+                # WebP and AVIF encode whole images; the output, not the source
+                with Image.open(path) as img:
+                    for variant, description in save_variants(img, path, formats):
+                        written.append((os.path.relpath(variant, output_root), description))
+        elif isinstance(data, Image.Image) and draft:
+            data.save(path, "PNG", compress_level=1)
+            written.append((rel, f"{data.width}x{data.height} PNG, draft"))
+            for fmt in formats:
+                if os.path.exists(variant_path(path, fmt)):
+                    os.remove(variant_path(path, fmt))
+        elif isinstance(data, Image.Image):
+            report = save_png(data, path)
+            written.append((rel, f"{data.width}x{data.height} PNG, {report}"))
+            for variant, description in save_variants(data, path, formats):
+                written.append((os.path.relpath(variant, output_root), description))
+        else:
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+                f.write("\n")
+            written.append((rel, "JSON"))
+    return written
+
 
-    img.save(dst, "PNG")
-    print(f"    -> Saved {target_size}x{target_size} PNG")
+def build_one(output, processor, params, output_root, formats=(), draft=False):
+    """Run one processor and save what it returns. Returns save_outputs()'s list."""
+    return save_outputs(PROCESSORS[processor](**params), output, output_root, formats, draft)
+
+
+def output_key(assets, output, cache, code_hash):
+    """
+    Build key of an output (see BuildCache.key_for): its processor, params
+    and formats, its sources, the files of its dependencies and the
+    pipeline code. Outputs that draw text (see
+    TEXT_PROCESSORS) list the bundled FONT in their sources, so watch mode
+    rebuilds them when it changes; they also depend on whichever font file
+    font_path() falls back to and on the Pillow version, which rasterizes
+    the glyphs (and holds the default font when there is no file).
+    Dependencies must be built.
+    """
+    entry = assets[output]
+    inputs = {src: os.path.join(RESOURCES, src) for src in entry["sources"]}
+    inputs.update({f"output:{dep}": os.path.join(OUTPUT, dep) for dep in entry["depends_on"]})
+    environment = {}
+    if entry["processor"] in TEXT_PROCESSORS:
+        font = font_path()
+        if font is not None and font not in inputs.values():
+            inputs[f"font:{os.path.basename(font)}"] = font
+        environment = {"pillow": PIL.__version__}
+    return cache.key_for(entry["processor"], entry["params"], inputs, code_hash,
+                         entry["formats"], environment)
+
+
+def build_assets(assets, targets, cache, force=False, workers=None, draft=False):
+    """
+    Build the target outputs of the manifest in dependency order.
+    Dependencies outside targets are taken as already built. A target
+    whose key (see output_key) matches the build cache is skipped unless
+    force is set. The rest run across a process pool of `workers` processes (default:
+    one per core); logs are printed per target in manifest order and every
+    target that ran is recorded in the cache. Draft outputs (see
+    save_outputs) are dropped from the cache instead, so the next normal
+    build writes their optimized encodings. Returns (built, skipped).
+    """
+    code_hash = code_fingerprint(SCRIPT_DIR, PIPELINE_MODULES)
+    keys = {}
+
+    def prepare(output):
+        entry = assets[output]
+        keys[output] = output_key(assets, output, cache, code_hash)
+        if not force and cache.is_fresh(output, keys[output], OUTPUT):
+            return None
+        return build_one, {"output": output, "processor": entry["processor"],
+                           "params": entry["params"], "output_root": OUTPUT,
+                           "formats": entry["formats"], "draft": draft}
+
+    deps = {out: [dep for dep in assets[out]["depends_on"] if dep in targets] for out in targets}
+    built = skipped = 0
+    for output, written, log in run_graph(targets, deps, prepare, workers):
+        if written is None:
+            print(f"  Up to date: {output}")
+            skipped += 1
+            continue
+        print(log, end="")
+        for rel, description in written:
+            print(f"    -> Saved {rel} ({description})")
+        if draft:
+            cache.entries.pop(output, None)
+        else:
+            cache.record(output, keys[output], OUTPUT, [rel for rel, _ in written])
+        built += 1
+    return built, skipped
+
+
+def update_format_manifest(assets, cache):
+    """
+    Rewrite FORMAT_MANIFEST with the size of every format of each PNG whose
+    entry asks for variants. The PNGs an entry wrote come from its cache
+    entry, falling back to its output. Returns True if the file changed.
+    """
+    variants = {}
+    for output, entry in assets.items():
+        if not entry["formats"]:
+            continue
+        files = cache.entries.get(output, {}).get("files") or [output]
+        for rel in files:
+            if rel.endswith(".png"):
+                variants[rel] = entry["formats"]
+    return write_format_manifest(FORMAT_MANIFEST, format_manifest(OUTPUT, variants))
+
+
+def update_lockfile(assets, cache):
+    """
+    Record the key and files of every output in the build cache in
+    LOCKFILE (see verify.py); outputs it does not hold keep their entries,
+    and outputs no longer in the manifest are dropped. Returns True if the
+    lockfile changed.
+    """
+    lock = {output: entry for output, entry in load_lockfile(LOCKFILE).items() if output in assets}
+    for output in assets:
+        entry = cache.entries.get(output)
+        if entry is None:
+            continue
+        files = {}
+        for rel, recorded in entry["files"].items():
+            files[rel] = {"sha256": recorded["sha256"]}
+            if rel.endswith(".png"):
+                files[rel]["size"] = list(png_size(os.path.join(OUTPUT, rel)))
+        lock[output] = {"key": entry["key"], "files": files}
+    return write_lockfile(LOCKFILE, lock)
+
+
+def verify_assets(assets, targets, keys=None, stats=False):
+    """
+    Check each target against LOCKFILE without decoding it (see verify.py):
+    it exists with its manifest size, and every file it wrote has its
+    locked hash. With keys
+    ({output: build key}) each target's locked key must match too, i.e. it
+    is fresh; with stats, PNGs also report their alpha statistics. Returns
+    True if all pass.
+    """
+    lock = load_lockfile(LOCKFILE)
+    expected, files = {}, {}
+    for output in targets:
+        expected[output] = assets[output]["size"]
+        files[output] = [output] + sorted(set(lock.get(output, {}).get("files", {})) - {output})
+    facts = inspect_files(OUTPUT, sorted({rel for rels in files.values() for rel in rels}), stats)
+
+    all_ok = True
+    for output in targets:
+        locked = lock.get(output)
+        if locked is None:
+            print(f"  NOT LOCKED: {output} (rebuild to record it in {os.path.basename(LOCKFILE)})")
+            all_ok = False
+        elif keys is not None and locked["key"] != keys[output]:
+            print(f"  STALE: {output} (its sources, params or the pipeline changed; rebuild it)")
+            all_ok = False
+        for rel in files[output]:
+            record = locked["files"].get(rel) if locked else None
+            problems = check_file(facts[rel], expected.get(rel), record)
+            if locked and record is None and facts[rel] is not None:
+                problems.append("not in lockfile")
+            all_ok = all_ok and not problems
+            status = ", ".join(problems).upper() if problems else "OK"
+            detail = os.path.splitext(rel)[1][1:].upper()
+            if facts[rel] and "size" in facts[rel]:
+                detail = "{}x{}, {}".format(*facts[rel]["size"], detail)
+            if facts[rel] and "alpha" in facts[rel]:
+                alpha = facts[rel]["alpha"]
+                detail += (f", {100 * alpha['transparent']:.1f}% transparent, "
+                           f"{100 * alpha['partial']:.1f}% partial")
+            print(f"  {status}: {rel} ({detail})")
+    return all_ok
+
+
+def watch_assets(assets, cache, patterns=None, interval=0.25):
+    """
+    Rebuild outputs (those selected by patterns, see select_assets) as the
+    files they read change, until interrupted (see watch.py). Jobs run
+    in-process so decoded sources and fonts stay warm, and outputs are
+    written as drafts (see save_outputs) so a rebuild takes milliseconds;
+    a normal build afterwards re-encodes them.
+    """
+    code_paths = [MANIFEST] + [os.path.join(SCRIPT_DIR, name + ".py") for name in PIPELINE_MODULES]
+    code = scan_files(code_paths)
+    sources = scan_files([RESOURCES])
+    for path in sources:
+        try:
+            open_image(path)
+        except OSError:
+            pass
+    print(f"\nWatching {os.path.relpath(RESOURCES, PROJECT_ROOT)}/ "
+          f"({len(sources)} sources decoded; Ctrl+C to stop)...")
+    try:
+        while True:
+            time.sleep(interval)
+            changed_code = changed_files(code, scan_files(code_paths))
+            if any(path != MANIFEST for path in changed_code):
+                print("\nPipeline code changed, restarting...")
+                restart_process()
+            now = scan_files([RESOURCES])
+            changed = [os.path.relpath(path, RESOURCES) for path in changed_files(sources, now)]
+            sources = now
+            if changed_code:
+                code = scan_files(code_paths)
+                print("\nManifest changed, checking every output...")
+                try:
+                    assets = load_manifest()
+                except ValueError as e:
+                    print(f"  Invalid manifest: {e}")
+                    continue
+                targets = select_assets(assets, patterns)
+            elif changed:
+                print(f"\nChanged: {', '.join(changed)}")
+                if os.path.relpath(FONT, RESOURCES) in changed:
+                    load_font.cache_clear()
+                selected = set(select_assets(assets, patterns))
+                targets = [out for out in affected_outputs(assets, changed) if out in selected]
+            else:
+                continue
+            start = time.perf_counter()
+            try:
+                built, _ = build_assets(assets, targets, cache, workers=1, draft=True)
+            except Exception:
+                traceback.print_exc()
+                print("  Build failed; waiting for the next change")
+                continue
+            cache.save()
+            if update_format_manifest(assets, cache):
+                print(f"  Updated {os.path.relpath(FORMAT_MANIFEST, OUTPUT)}")
+            write_build_stamp(BUILD_STAMP, targets)
+            print(f"  Rebuilt {built} output(s) in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        print("\nStopped watching. Run without --watch to write optimized encodings "
+              "of the rebuilt outputs.")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Build game-ready images from resources/.")
+    parser.add_argument("--only", action="append", metavar="PATTERN",
+                        help="build only outputs matching this glob (e.g. 'player/*') "
+                             "and their dependencies; may be repeated")
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild every selected output, ignoring the build cache")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="delete the build cache index and decoded-pixel cache before building")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="worker processes (default: one per core; 1 builds in-process)")
+    parser.add_argument("--watch", action="store_true",
+                        help="after building, keep running and rebuild outputs whose "
+                             "resources/ files change")
+    parser.add_argument("--interval", type=float, default=0.25, metavar="SECONDS",
+                        help="how often --watch polls for changes (default: 0.25)")
+    parser.add_argument("--verify", action="store_true",
+                        help="build nothing; check that the selected outputs match "
+                             "scripts/assets.lock.json and are fresh, exiting 1 if not")
+    parser.add_argument("--stats", action="store_true",
+                        help="also report each PNG's share of transparent pixels when verifying")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("MathBuilder Image Processing")
     print("=" * 60)
 
     ensure_dirs()
 
-    # ── TILES ──────────────────────────────────────────────
-    print("\n[1/8] Processing tiles...")
-
-    # grass-top: The original is isometric 3D, create a proper side-scrolling tile
-    print("  Creating grass-top tile (programmatic - original is isometric 3D)")
-    grass = create_grass_tile(64)
-    grass.save(os.path.join(OUTPUT, "tiles", "grass-top.png"), "PNG")
-    print("    -> Saved 64x64 PNG")
-
-    # dirt and stone: resize from originals (they look fine for side-scrolling)
-    process_tile("dirt.png", 64)
-    process_tile("stone.png", 64)
-
-    # ── PLAYER SPRITES ─────────────────────────────────────
-    print("\n[2/8] Processing player sprites...")
-
-    # botty-idle: 4 frames -> 256x64
-    print("  Processing botty-idle.png (4 frames)")
-    src = Image.open(os.path.join(RESOURCES, "player", "botty-idle.png"))
-    sheet = extract_sprites(src, 4, 64)
-    sheet.save(os.path.join(OUTPUT, "player", "botty-idle.png"), "PNG")
-    print(f"    -> Saved {sheet.width}x{sheet.height} PNG sprite sheet")
-
-    # botty-walk: 6 frames -> 384x64
-    print("  Processing botty-walk.png (6 frames)")
-    src = Image.open(os.path.join(RESOURCES, "player", "botty-walk.png"))
-    sheet = extract_sprites(src, 6, 64)
-    sheet.save(os.path.join(OUTPUT, "player", "botty-walk.png"), "PNG")
-    print(f"    -> Saved {sheet.width}x{sheet.height} PNG sprite sheet")
-
-    # botty-jump: 2 frames -> 128x64
-    print("  Processing botty-jump.png (2 frames)")
-    src = Image.open(os.path.join(RESOURCES, "player", "botty-jump.png"))
-    sheet = extract_sprites(src, 2, 64)
-    sheet.save(os.path.join(OUTPUT, "player", "botty-jump.png"), "PNG")
-    print(f"    -> Saved {sheet.width}x{sheet.height} PNG sprite sheet")
-
-    # ── BACKGROUNDS ────────────────────────────────────────
-    print("\n[3/8] Processing backgrounds...")
-    process_background("sky.png", 800, 600, needs_transparency=False)
-    process_background("clouds.png", 800, 200, needs_transparency=True)
-    process_background("hills.png", 800, 200, needs_transparency=True)
-
-    # ── UI ELEMENTS ────────────────────────────────────────
-    print("\n[4/8] Processing UI elements...")
-
-    # Buttons - create proper glossy buttons with text
-    print("  Creating btn-play.png (glossy with text)")
-    btn_play = create_button("PLAY", (76, 175, 80))  # Green
-    btn_play.save(os.path.join(OUTPUT, "ui", "btn-play.png"), "PNG")
-    print("    -> Saved 200x70 PNG")
-
-    print("  Creating btn-levels.png (glossy with text)")
-    btn_levels = create_button("LEVELS", (52, 152, 219))  # Blue
-    btn_levels.save(os.path.join(OUTPUT, "ui", "btn-levels.png"), "PNG")
-    print("    -> Saved 200x70 PNG")
-
-    # Stars - create proper star shapes
-    print("  Creating star-filled.png")
-    star_f = create_star_filled(32)
-    star_f.save(os.path.join(OUTPUT, "ui", "star-filled.png"), "PNG")
-    print("    -> Saved 32x32 PNG")
-
-    print("  Creating star-empty.png")
-    star_e = create_star_empty(32)
-    star_e.save(os.path.join(OUTPUT, "ui", "star-empty.png"), "PNG")
-    print("    -> Saved 32x32 PNG")
-
-    # Math input background
-    print("  Creating math-input-bg.png")
-    math_bg = create_math_input_bg(400, 250)
-    math_bg.save(os.path.join(OUTPUT, "ui", "math-input-bg.png"), "PNG")
-    print("    -> Saved 400x250 PNG")
-
-    # Arrow buttons - create proper ones with visible arrows
-    for direction in ["left", "right", "jump"]:
-        name = f"arrow-{direction}.png"
-        print(f"  Creating {name}")
-        arrow = create_arrow_button(direction, 64)
-        arrow.save(os.path.join(OUTPUT, "ui", name), "PNG")
-        print(f"    -> Saved 64x64 PNG")
-
-    # ── OBJECTS ────────────────────────────────────────────
-    print("\n[5/8] Processing objects...")
-    process_object("flag.png", 64, needs_transparency=True)
-    process_object("bridge-block.png", 64, needs_transparency=False)
-
-    # ── PARTICLES ──────────────────────────────────────────
-    print("\n[6/8] Processing particles...")
-    process_particle("dust.png", 8)
-    process_particle("confetti.png", 8)
+    assets = load_manifest()
+    targets = select_assets(assets, args.only)
+    if not targets:
+        parser.error(f"no outputs match {args.only}")
+
+    cache = BuildCache(CACHE_INDEX)
+    if args.verify:
+        code_hash = code_fingerprint(SCRIPT_DIR, PIPELINE_MODULES)
+        keys = {output: output_key(assets, output, cache, code_hash) for output in targets}
+        print(f"\nVerifying {len(targets)} of {len(assets)} assets...")
+        if not verify_assets(assets, targets, keys, args.stats):
+            print("  Some assets need attention (see above)")
+            sys.exit(1)
+        print("  All assets match the lockfile")
+        return
+
+    if args.clear_cache:
+        cache.clear()
+        default_cache().clear()
+
+    # ── BUILD ──────────────────────────────────────────────
+    print(f"\n[1/3] Building {len(targets)} of {len(assets)} assets...")
+    built, skipped = build_assets(assets, targets, cache, force=args.force, workers=args.jobs)
+    evicted = cache.evict(assets, OUTPUT)
+    cache.save()
+    print(f"  Built {built}, up to date {skipped}, evicted {len(evicted)} stale cache entries")
+    if update_format_manifest(assets, cache):
+        print(f"  Updated {os.path.relpath(FORMAT_MANIFEST, OUTPUT)}")
+    if update_lockfile(assets, cache):
+        print(f"  Updated {os.path.relpath(LOCKFILE, PROJECT_ROOT)}")
 
     # ── VERIFICATION ───────────────────────────────────────
-    print("\n[7/8] Verifying outputs...")
-    expected = {
-        "tiles/grass-top.png": (64, 64),
-        "tiles/dirt.png": (64, 64),
-        "tiles/stone.png": (64, 64),
-        "player/botty-idle.png": (256, 64),
-        "player/botty-walk.png": (384, 64),
-        "player/botty-jump.png": (128, 64),
-        "backgrounds/sky.png": (800, 600),
-        "backgrounds/clouds.png": (800, 200),
-        "backgrounds/hills.png": (800, 200),
-        "ui/btn-play.png": (200, 70),
-        "ui/btn-levels.png": (200, 70),
-        "ui/star-filled.png": (32, 32),
-        "ui/star-empty.png": (32, 32),
-        "ui/math-input-bg.png": (400, 250),
-        "ui/arrow-left.png": (64, 64),
-        "ui/arrow-right.png": (64, 64),
-        "ui/arrow-jump.png": (64, 64),
-        "objects/flag.png": (64, 64),
-        "objects/bridge-block.png": (64, 64),
-        "particles/dust.png": (8, 8),
-        "particles/confetti.png": (8, 8),
-    }
+    print("\n[2/3] Verifying outputs...")
+    all_ok = verify_assets(assets, targets, stats=args.stats)
 
-    all_ok = True
-    for path, (exp_w, exp_h) in expected.items():
-        full_path = os.path.join(OUTPUT, path)
-        if not os.path.exists(full_path):
-            print(f"  MISSING: {path}")
-            all_ok = False
-            continue
-        img = Image.open(full_path)
-        w, h = img.size
-        fmt = img.format
-        status = "OK" if (w == exp_w and h == exp_h) else f"WRONG SIZE ({w}x{h})"
-        if w != exp_w or h != exp_h:
-            all_ok = False
-        print(f"  {status}: {path} ({w}x{h}, {fmt})")
-
-    print(f"\n[8/8] Summary")
-    print(f"  Total assets: {len(expected)}")
+    print(f"\n[3/3] Summary")
+    print(f"  Total assets: {len(targets)}")
     if all_ok:
         print("  All assets processed correctly!")
     else:
@@ -1066,6 +1330,9 @@ def main():
     print(f"\n  Output directory: {OUTPUT}")
     print("  Done!")
 
+    if args.watch:
+        watch_assets(assets, cache, args.only, args.interval)
+
 
 if __name__ == "__main__":
     main()
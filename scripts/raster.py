@@ -0,0 +1,484 @@
+"""
+Anti-aliased vector rasterizer for the generated UI art.
+
+The create_* generators used to draw hard-edged shapes with ImageDraw on a
+canvas 2-4x the output size and LANCZOS-downscale it for anti-aliasing.
+Here each shape is instead rasterized once at the output size with the
+exact area of every pixel it covers (the signed-area accumulation method
+used by font rasterizers), so art is rendered directly at its output size
+with no oversized intermediate canvas.
+
+Coordinates are continuous: pixel (x, y) covers [x, x + 1) x [y, y + 1).
+Curves (ellipses, rounded corners, arcs) are flattened to polygons with a
+sub-pixel tolerance before rasterizing.
+
+Canvas holds premultiplied float RGBA and paints coverage two ways:
+"replace", which blends every channel (alpha included) toward the color
+by coverage, like ImageDraw does on an RGBA image; and "over", the
+Porter-Duff operator of Image.alpha_composite. Generators describe their
+art as a stack of layer dicts (shape, fill, blur, opacity) that
+Canvas.draw() evaluates in one working buffer, touching only the pixels
+each layer can reach.
+"""
+
+import functools
+import itertools
+import math
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Maximum distance, in pixels, between a curve and its flattened polygon
+FLATTEN_TOLERANCE = 0.05
+
+
+def _clip_edges(points, width):
+    """
+    Closed polygon -> (n, 4) array of edges (x0, y0, x1, y1), split where
+    they cross x = 0 or x = width and clamped into [0, width]. Content left
+    or right of the canvas only matters through its winding, which a
+    clamped edge preserves exactly.
+    """
+    pts = np.asarray(points, dtype=np.float64)
+    edges = np.hstack([pts, np.roll(pts, -1, axis=0)])
+    for bound in (0.0, float(width)):
+        x0, y0, x1, y1 = edges.T
+        crosses = (x0 - bound) * (x1 - bound) < 0
+        if crosses.any():
+            t = (bound - x0[crosses]) / (x1[crosses] - x0[crosses])
+            ym = y0[crosses] + t * (y1[crosses] - y0[crosses])
+            first = np.stack([x0[crosses], y0[crosses], np.full_like(ym, bound), ym], axis=1)
+            second = np.stack([np.full_like(ym, bound), ym, x1[crosses], y1[crosses]], axis=1)
+            edges = np.vstack([edges[~crosses], first, second])
+    edges[:, 0::2] = np.clip(edges[:, 0::2], 0, width)
+    return edges
+
+
+def polygon_coverage(points, width, height):
+    """
+    Exact fraction of each pixel covered by a polygon, as a (height, width)
+    float32 array in [0, 1]. Overlapping parts of a self-intersecting polygon
+    count once (nonzero winding).
+    """
+    coverage = np.zeros((height, width), dtype=np.float32)
+    window = shape_window(points, width, height)
+    if window is not None:
+        coverage[window] = window_coverage(points, window)
+    return coverage
+
+
+def shape_window(points, width, height):
+    """
+    (rows, cols) slices of the pixels a polygon's bounding box touches on a
+    width x height canvas, or None if it misses the canvas.
+    """
+    pts = np.asarray(points, dtype=np.float64)
+    x0, y0 = np.maximum(np.floor(pts.min(axis=0)), 0).astype(int)
+    x1 = min(int(np.ceil(pts[:, 0].max())), width)
+    y1 = min(int(np.ceil(pts[:, 1].max())), height)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return slice(y0, y1), slice(x0, x1)
+
+
+def window_coverage(points, window):
+    """Coverage of a polygon over just the pixels of window (see shape_window)."""
+    rows, cols = window
+    pts = np.asarray(points, dtype=np.float64) - (cols.start, rows.start)
+    return _coverage(pts, cols.stop - cols.start, rows.stop - rows.start)
+
+
+def _coverage(points, width, height):
+    """polygon_coverage() of a polygon in canvas coordinates."""
+    edges = _clip_edges(points, width)
+    edges = edges[edges[:, 1] != edges[:, 3]]
+    direction = np.where(edges[:, 3] > edges[:, 1], 1.0, -1.0)
+    # Orient every edge top to bottom; direction keeps the winding sign
+    down = direction > 0
+    xa = np.where(down, edges[:, 0], edges[:, 2])
+    ya = np.where(down, edges[:, 1], edges[:, 3])
+    xb = np.where(down, edges[:, 2], edges[:, 0])
+    yb = np.where(down, edges[:, 3], edges[:, 1])
+    dxdy = (xb - xa) / (yb - ya)
+
+    # One record per (edge, row) the edge passes through
+    first_row = np.floor(np.maximum(ya, 0)).astype(np.int64)
+    end_row = np.minimum(np.ceil(yb), height).astype(np.int64)
+    counts = np.maximum(end_row - first_row, 0)
+    edge = np.repeat(np.arange(len(counts)), counts)
+    row = first_row[edge] + np.arange(len(edge)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    y_top = np.maximum(row, ya[edge])
+    y_bottom = np.minimum(row + 1, yb[edge])
+    x_top = xa[edge] + (y_top - ya[edge]) * dxdy[edge]
+    x_bottom = xa[edge] + (y_bottom - ya[edge]) * dxdy[edge]
+    d = (y_bottom - y_top) * direction[edge]
+    x0 = np.minimum(x_top, x_bottom)
+    x1 = np.maximum(x_top, x_bottom)
+    x0i = np.floor(x0).astype(np.int64)
+    x1i = np.ceil(x1).astype(np.int64)
+
+    # acc holds each row's coverage deltas; its prefix sum is the winding
+    # area. ramp adds the constant slope of long crossings in bulk.
+    stride = width + 2
+    cells, deltas, ramp_cells, ramp_deltas = [], [], [], []
+
+    narrow = x1i <= x0i + 1
+    r, d_n, x0i_n = row[narrow], d[narrow], x0i[narrow]
+    xmf = 0.5 * (x0[narrow] + x1[narrow]) - x0i_n
+    cells += [r * stride + x0i_n, r * stride + x0i_n + 1]
+    deltas += [d_n * (1 - xmf), d_n * xmf]
+
+    wide = ~narrow
+    r, d_w = row[wide], d[wide]
+    x0_w, x1_w, x0i_w, x1i_w = x0[wide], x1[wide], x0i[wide], x1i[wide]
+    s = 1 / (x1_w - x0_w)
+    x0f = x0_w - x0i_w
+    a0 = 0.5 * s * (1 - x0f) ** 2
+    x1f = x1_w - x1i_w + 1
+    am = 0.5 * s * x1f ** 2
+    cells += [r * stride + x0i_w, r * stride + x1i_w]
+    deltas += [d_w * a0, d_w * am]
+    two = x1i_w == x0i_w + 2
+    cells.append(r[two] * stride + x0i_w[two] + 1)
+    deltas.append((d_w * (1 - a0 - am))[two])
+    many = ~two
+    a1 = s * (1.5 - x0f)
+    a2 = a1 + (x1i_w - x0i_w - 3) * s
+    rm = r[many] * stride
+    cells += [rm + x0i_w[many] + 1, rm + x1i_w[many] - 1]
+    deltas += [(d_w * (a1 - a0))[many], (d_w * (1 - a2 - am))[many]]
+    ramp_cells += [rm + x0i_w[many] + 2, rm + x1i_w[many] - 1]
+    ramp_deltas += [(d_w * s)[many], -(d_w * s)[many]]
+
+    # bincount sums repeated cells in one pass (much faster than np.add.at)
+    size = height * stride
+    acc = np.bincount(np.concatenate(cells), np.concatenate(deltas), size).reshape(height, stride)
+    ramp_cells = np.concatenate(ramp_cells)
+    if len(ramp_cells):
+        # Only rows crossed by long shallow edges carry a ramp
+        ramp = np.bincount(ramp_cells, np.concatenate(ramp_deltas), size).reshape(height, stride)
+        ramp_rows = np.unique(ramp_cells // stride)
+        acc[ramp_rows] += np.cumsum(ramp[ramp_rows], axis=1)
+    coverage = np.minimum(np.abs(np.cumsum(acc, axis=1)[:, :width]), 1.0)
+    return coverage.astype(np.float32)
+
+
+def _arc_segments(radius, sweep):
+    """Segments needed to flatten an arc of radius and sweep (radians)."""
+    if radius <= FLATTEN_TOLERANCE:
+        return 1
+    step = 2 * math.acos(1 - FLATTEN_TOLERANCE / radius)
+    return max(2, math.ceil(abs(sweep) / step))
+
+
+def _arc(cx, cy, rx, ry, start, end):
+    """
+    Points along an elliptical arc, angles in radians (y points down).
+    Inner vertices sit slightly outside the curve so the polygon keeps the
+    area the curve encloses; the end points stay on it so arcs join
+    straight edges cleanly.
+    """
+    n = _arc_segments(max(rx, ry), end - start)
+    angles = np.linspace(start, end, n + 1)
+    step = abs(end - start) / n
+    grow = np.full(n + 1, math.sqrt(step / math.sin(step)) if step > 0 else 1.0)
+    grow[[0, -1]] = 1.0
+    return list(zip(cx + rx * grow * np.cos(angles), cy + ry * grow * np.sin(angles)))
+
+
+def ellipse_points(box):
+    """Polygon approximating the ellipse inscribed in box (x0, y0, x1, y1)."""
+    x0, y0, x1, y1 = box
+    return _arc((x0 + x1) / 2, (y0 + y1) / 2, (x1 - x0) / 2, (y1 - y0) / 2, 0, 2 * math.pi)[:-1]
+
+
+def rounded_rect_points(box, radius):
+    """Polygon of a rectangle with circular corners of radius (clamped to fit)."""
+    x0, y0, x1, y1 = box
+    r = max(0.0, min(radius, (x1 - x0) / 2, (y1 - y0) / 2))
+    if r == 0:
+        return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+    half = math.pi / 2
+    return (_arc(x1 - r, y0 + r, r, r, -half, 0)
+            + _arc(x1 - r, y1 - r, r, r, 0, half)
+            + _arc(x0 + r, y1 - r, r, r, half, 2 * half)
+            + _arc(x0 + r, y0 + r, r, r, 2 * half, 3 * half))
+
+
+def arc_band_points(box, start, end, width):
+    """
+    Polygon of the band between the ellipse inscribed in box and the one
+    width pixels inside it, from angle start to end in degrees (clockwise
+    from 3 o'clock, as ImageDraw.arc measures them).
+    """
+    x0, y0, x1, y1 = box
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    rx, ry = (x1 - x0) / 2, (y1 - y0) / 2
+    a, b = math.radians(start), math.radians(end)
+    return _arc(cx, cy, rx, ry, a, b) + _arc(cx, cy, rx - width, ry - width, b, a)
+
+
+def rect_points(box):
+    """Polygon of an axis-aligned rectangle (x0, y0, x1, y1)."""
+    x0, y0, x1, y1 = box
+    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+
+def offset_polygon(points, distance):
+    """
+    Move every edge of a simple polygon distance pixels inward (outward if
+    negative), joining the moved edges with miters.
+    """
+    pts = np.asarray(points, dtype=np.float64)
+    # Repeated vertices (a pill's arcs meeting end to end) have no edge normal
+    pts = pts[np.any(np.abs(pts - np.roll(pts, 1, axis=0)) > 1e-9, axis=1)]
+    x, y = pts.T
+    signed_area = 0.5 * np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+    # Inward normal of each edge pts[i] -> pts[i + 1] for either winding
+    edge = np.roll(pts, -1, axis=0) - pts
+    normal = np.stack([-edge[:, 1], edge[:, 0]], axis=1) * np.sign(signed_area)
+    normal /= np.linalg.norm(normal, axis=1, keepdims=True)
+    n_in, n_out = np.roll(normal, 1, axis=0), normal
+    # Miter: the point distance away from both moved edges at this vertex
+    bisector = n_in + n_out
+    scale = distance / np.maximum(np.einsum("ij,ij->i", bisector, n_out), 1e-6)
+    return [tuple(p) for p in pts + bisector * scale[:, None]]
+
+
+def grid_points(points, unit):
+    """
+    Map points drawn on an ImageDraw pixel grid (samples at pixel centers)
+    to continuous coordinates, unit output pixels per grid pixel.
+    """
+    return [((x + 0.5) * unit, (y + 0.5) * unit) for x, y in points]
+
+
+def grid_box(box, unit):
+    """Map an inclusive ImageDraw box to continuous coordinates (see grid_points)."""
+    x0, y0, x1, y1 = box
+    return (x0 * unit, y0 * unit, (x1 + 1) * unit, (y1 + 1) * unit)
+
+
+def blur_radius(sigma):
+    """Half-width in pixels of the Gaussian kernel used for sigma."""
+    return max(1, math.ceil(3 * sigma))
+
+
+@functools.lru_cache(maxsize=32)
+def _gaussian_matrix(n, sigma):
+    """
+    (n, n) float32 matrix applying a normalized 1D Gaussian blur with zero
+    edges. Cached: every blur of the same length and sigma shares it.
+    """
+    radius = blur_radius(sigma)
+    taps = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma) ** 2)
+    taps /= taps.sum()
+    # Each row of a (n, span + 1) array, read back with rows span long,
+    # starts one element later: the taps slide along the diagonal
+    span = n + 2 * radius
+    band = np.zeros((n, span + 1), dtype=np.float32)
+    band[:, :len(taps)] = taps
+    band = band.ravel()[:n * span].reshape(n, span)
+    return band[:, radius:radius + n]
+
+
+def _blur_axis(pixels, sigma, axis):
+    """
+    Gaussian blur of (4, h, w) pixels along axis 1 or 2, with zero edges.
+    The blur matrix is banded, so it is applied in blocks of outputs that
+    each read only the inputs within one radius: O(n * radius) per line
+    instead of O(n^2), which matters for wide shadows at 3x.
+    """
+    radius = blur_radius(sigma)
+    n = pixels.shape[axis]
+    matrix = _gaussian_matrix(n, sigma)
+    block = max(2 * radius, 64)
+    # Move the blurred axis last so each block is one matrix product
+    lines = np.moveaxis(pixels, axis, -1)
+    out = np.empty_like(lines)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        lo, hi = max(start - radius, 0), min(stop + radius, n)
+        out[..., start:stop] = lines[..., lo:hi] @ matrix[start:stop, lo:hi].T
+    return np.moveaxis(out, -1, axis)
+
+
+def _text_mask(xy, text, font, window):
+    """Coverage of text drawn at xy with font, over the pixels of window."""
+    rows, cols = window
+    # The mask's origin shifts xy by whole pixels, keeping its fractional
+    # part, and never past the origin: Pillow positions glyphs drawn at
+    # negative fractional coordinates differently.
+    x0 = min(cols.start, math.floor(xy[0]))
+    y0 = min(rows.start, math.floor(xy[1]))
+    mask = Image.new("L", (cols.stop - x0, rows.stop - y0), 0)
+    ImageDraw.Draw(mask).text((xy[0] - x0, xy[1] - y0), text, fill=255, font=font)
+    return np.asarray(mask, dtype=np.float32)[rows.start - y0:, cols.start - x0:] / 255
+
+
+def _union_window(windows, margin, width, height):
+    """Smallest window holding every window, grown by margin and clipped to the canvas."""
+    return (slice(max(min(w[0].start for w in windows) - margin, 0),
+                  min(max(w[0].stop for w in windows) + margin, height)),
+            slice(max(min(w[1].start for w in windows) - margin, 0),
+                  min(max(w[1].stop for w in windows) + margin, width)))
+
+
+def _local(window, origin):
+    """window shifted so origin (a window) starts at (0, 0)."""
+    rows, cols = window
+    y0, x0 = origin[0].start, origin[1].start
+    return slice(rows.start - y0, rows.stop - y0), slice(cols.start - x0, cols.stop - x0)
+
+
+class Canvas:
+    """
+    Premultiplied RGBA float canvas that layers are painted onto. pixels is
+    planar, (4, height, width), so blending runs over whole channel rows.
+
+    Art is described as a stack of layers, each a dict:
+
+        {"shape": points, "fill": (r, g, b, a)}           filled polygon
+        {"shape": points, "stroke": 2, "inset": 1, ...}   outline (see below)
+        {"text": (xy, text, font), "fill": ...}           text
+
+    with optional "mode" ("replace", the default, or "over"; see paint()),
+    "opacity" (scales the coverage, default 1), "blur" (Gaussian sigma in
+    pixels) and "group" (any label). draw() paints the stack bottom first.
+    Plain layers paint straight into the canvas. A run of consecutive
+    layers with the same group and blur is instead painted onto a
+    transparent buffer the size of just the pixels it can reach, blurred
+    once and composited over the canvas, like a layer group in a paint
+    program: so shadows with a common radius cost one blur between them.
+    Pixel values are only clamped when the canvas becomes an image.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.pixels = np.zeros((4, height, width), dtype=np.float32)
+
+    def paint(self, coverage, color, mode="replace", window=None):
+        """
+        Paint color (r, g, b, a) with a coverage mask: (height, width), or
+        the size of window if given. "replace" moves every channel toward
+        color by coverage (ImageDraw semantics); "over" composites color on
+        top (alpha_composite).
+        """
+        r, g, b, a = color
+        src = (r * a / 255, g * a / 255, b * a / 255, a)
+        if window is None:
+            # Only the rows and columns the mask touches need blending
+            rows = np.flatnonzero(coverage.any(axis=1))
+            cols = np.flatnonzero(coverage.any(axis=0))
+            if not len(rows):
+                return
+            window = (slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1))
+            coverage = coverage[window]
+        keep = 1 - coverage * (a / 255) if mode != "replace" else None
+        for channel, value in zip(self.pixels, src):
+            dst = channel[window]
+            if mode == "replace":
+                step = value - dst
+                step *= coverage
+                dst += step
+            else:
+                dst *= keep
+                dst += value * coverage
+
+    def _outline_polygons(self, layer):
+        """
+        (outer, inner) polygons of a stroked layer. The stroke is "stroke"
+        pixels wide; "inset" shifts it inward: 0 centers it on the shape's
+        edge, stroke / 2 puts it just inside (like ImageDraw outlines).
+        """
+        inset = layer.get("inset", 0.0)
+        half = layer["stroke"] / 2
+        return (offset_polygon(layer["shape"], inset - half),
+                offset_polygon(layer["shape"], inset + half))
+
+    def layer_window(self, layer):
+        """Window (see shape_window) of the pixels a layer can touch, or None."""
+        if "text" in layer:
+            xy, text, font = layer["text"]
+            left, top, right, bottom = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox(
+                xy, text, font=font)
+            # One pixel of slack for anti-aliasing at fractional positions
+            return shape_window([(left - 1, top - 1), (right + 1, bottom + 1)],
+                                self.width, self.height)
+        if "stroke" in layer:
+            return shape_window(self._outline_polygons(layer)[0], self.width, self.height)
+        return shape_window(layer["shape"], self.width, self.height)
+
+    def layer_coverage(self, layer, window):
+        """Coverage of a layer over window, with its opacity applied."""
+        if "text" in layer:
+            coverage = _text_mask(*layer["text"], window)
+        elif "stroke" in layer:
+            # The inner polygon lies inside the outer one, so inside its window
+            outer, inner = self._outline_polygons(layer)
+            coverage = np.clip(window_coverage(outer, window) - window_coverage(inner, window), 0, 1)
+        else:
+            coverage = window_coverage(layer["shape"], window)
+        opacity = layer.get("opacity", 1.0)
+        return coverage * np.float32(opacity) if opacity != 1 else coverage
+
+    def draw(self, layers):
+        """Paint a stack of layer dicts (see the class docstring), bottom first."""
+        for (group, blur), run in itertools.groupby(
+                layers, key=lambda layer: (layer.get("group"), layer.get("blur", 0))):
+            run = list(run)
+            if group is None and not blur:
+                for layer in run:
+                    window = self.layer_window(layer)
+                    if window is not None:
+                        self.paint(self.layer_coverage(layer, window), layer["fill"],
+                                   layer.get("mode", "replace"), window)
+            else:
+                self._draw_pass(run, blur)
+
+    def _draw_pass(self, run, blur):
+        """Paint layers onto one transparent buffer, blur it and composite it over."""
+        windows = [(layer, self.layer_window(layer)) for layer in run]
+        windows = [(layer, window) for layer, window in windows if window is not None]
+        if not windows:
+            return
+        margin = blur_radius(blur) if blur else 0
+        area = _union_window([window for _, window in windows], margin, self.width, self.height)
+        buffer = Canvas(area[1].stop - area[1].start, area[0].stop - area[0].start)
+        for layer, window in windows:
+            buffer.paint(self.layer_coverage(layer, window), layer["fill"],
+                         layer.get("mode", "replace"), _local(window, area))
+        if blur:
+            buffer = buffer.blurred(blur)
+        self.composite(buffer, area)
+
+    def composite(self, layer, window=None):
+        """
+        Composite another canvas over this one: over window if given (layer
+        is then the window's size), else over the whole canvas.
+        """
+        dst = self.pixels[(slice(None),) + window] if window is not None else self.pixels
+        dst *= 1 - layer.pixels[3] / 255
+        dst += layer.pixels
+
+    def blurred(self, sigma):
+        """A copy blurred with a Gaussian of standard deviation sigma pixels."""
+        out = Canvas(self.width, self.height)
+        out.pixels = _blur_axis(_blur_axis(self.pixels, sigma, 1), sigma, 2)
+        return out
+
+    def to_image(self):
+        """The canvas as an RGBA Image (un-premultiplied, clamped and rounded)."""
+        alpha = self.pixels[3]
+        rgb = np.where(alpha > 0, self.pixels[:3] * 255 / np.maximum(alpha, 1e-9), 0)
+        out = np.concatenate([rgb, alpha[None]]).transpose(1, 2, 0)
+        return Image.fromarray(np.clip(np.rint(out), 0, 255).astype(np.uint8), "RGBA")
+
+
+def render_layers(width, height, layers):
+    """Draw a layer stack (see Canvas) on a transparent width x height canvas; returns the Image."""
+    canvas = Canvas(width, height)
+    canvas.draw(layers)
+    return canvas.to_image()
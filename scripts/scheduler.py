@@ -0,0 +1,126 @@
+"""
+Process-pool job scheduler for the asset pipeline.
+
+Asset jobs are independent, CPU-bound Pillow/NumPy work, so they fan out
+across a process pool sized to the machine. Determinism is preserved by:
+
+- seeding `random` and NumPy's legacy global RNG per job from the job's
+  name, so a job draws the same numbers whichever worker runs it and
+  whatever ran there before;
+- capturing each job's stdout and replaying the logs in a fixed
+  topological order, so the build log reads the same as a sequential run.
+
+Jobs may depend on each other (an atlas page needs the frames it packs);
+run_graph() only starts a job once everything it depends on has finished.
+"""
+
+import contextlib
+import hashlib
+import io
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from graphlib import TopologicalSorter
+
+import numpy as np
+
+
+def default_workers():
+    """One worker per available core."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def job_seed(name):
+    """Stable 32-bit seed derived from a job name."""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:4], "big")
+
+
+def run_job(name, func, kwargs):
+    """
+    Run one job with a per-job seed, capturing what it prints.
+    Returns (result, log). Executed inside a worker process.
+    """
+    seed = job_seed(name)
+    random.seed(seed)
+    np.random.seed(seed)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        result = func(**kwargs)
+    return result, log.getvalue()
+
+
+def static_order(nodes, deps):
+    """
+    Topological order of nodes that keeps the given order wherever the
+    dependencies allow it. Raises graphlib.CycleError on cycles.
+    """
+    position = {name: i for i, name in enumerate(nodes)}
+    sorter = TopologicalSorter({name: deps.get(name, ()) for name in nodes})
+    sorter.prepare()
+    order = []
+    while sorter.is_active():
+        ready = sorted(sorter.get_ready(), key=position.__getitem__)
+        order.extend(ready)
+        sorter.done(*ready)
+    return order
+
+
+def run_graph(nodes, deps, prepare, workers=None):
+    """
+    Run a dependency graph of jobs and yield (name, result, log) per node.
+
+    nodes is the list of job names and deps maps a name to the names it
+    depends on. prepare(name) is called in this process once all of a
+    node's dependencies have finished; it returns (func, kwargs) to run, or
+    None when the node needs no work (result and log are then None and "").
+    Ready jobs run concurrently on a process pool of `workers` processes
+    (default: one per core; <= 1 runs everything in-process), and results
+    are yielded in static_order() as soon as they and every earlier node
+    have finished. func must be a module-level function so it can be pickled.
+    """
+    order = static_order(nodes, deps)
+    rank = {name: i for i, name in enumerate(order)}
+    workers = default_workers() if workers is None else workers
+    sorter = TopologicalSorter({name: deps.get(name, ()) for name in nodes})
+    sorter.prepare()
+    finished = {}
+    next_out = 0
+
+    def drain():
+        nonlocal next_out
+        while next_out < len(order) and order[next_out] in finished:
+            name = order[next_out]
+            yield (name,) + finished.pop(name)
+            next_out += 1
+
+    if workers <= 1:
+        while sorter.is_active():
+            for name in sorted(sorter.get_ready(), key=rank.__getitem__):
+                job = prepare(name)
+                finished[name] = (None, "") if job is None else run_job(name, *job)
+                sorter.done(name)
+            yield from drain()
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while sorter.is_active():
+            for name in sorted(sorter.get_ready(), key=rank.__getitem__):
+                job = prepare(name)
+                if job is None:
+                    finished[name] = (None, "")
+                    sorter.done(name)
+                else:
+                    running[pool.submit(run_job, name, *job)] = name
+            yield from drain()
+            if not running:
+                continue
+            completed, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in completed:
+                name = running.pop(future)
+                finished[name] = future.result()
+                sorter.done(name)
+            yield from drain()
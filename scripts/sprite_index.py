@@ -0,0 +1,254 @@
+"""
+Alpha-occupancy index shared by the sprite finders.
+
+The sprite finders in process_images.py and extraction.py all need
+the same two answers about a cleaned (background-removed) sheet:
+"which columns contain content?" and "what are the tight vertical bounds
+of this column span?". AlphaIndex builds a summed-area table over the
+alpha mask once per image so both questions are cheap lookups instead of
+nested loops over every pixel.
+
+find_sprite_blobs goes further and needs no expected frame count: it
+labels connected components in one run-length pass and groups them into
+sprites laid out in rows, so new sheets can be dropped in without
+hand-tuning how many poses they contain.
+"""
+
+import statistics
+
+import numpy as np
+
+# Gap bridged between sprite parts, as a share of the median sprite height
+# (8px for 130px poses)
+ATTACH_GAP_RATIO = 0.06
+
+
+def alpha_mask(img, alpha_threshold=30):
+    """Boolean (h, w) array of the pixels whose alpha exceeds the threshold."""
+    return np.asarray(img.convert("RGBA").getchannel("A")) > alpha_threshold
+
+
+class AlphaIndex:
+    """
+    Summed-area table over the pixels whose alpha exceeds a threshold.
+
+    sat[y, x] holds the number of content pixels in the rectangle
+    [0, x) x [0, y), so any rectangle count is four lookups.
+    """
+
+    def __init__(self, img, alpha_threshold=30):
+        self.mask = alpha_mask(img, alpha_threshold)
+        self.height, self.width = self.mask.shape
+        # Leading zero row/column so rectangle sums need no bounds checks
+        self.sat = np.zeros((self.height + 1, self.width + 1), dtype=np.int64)
+        np.cumsum(self.mask, axis=0, out=self.sat[1:, 1:])
+        np.cumsum(self.sat[1:, 1:], axis=1, out=self.sat[1:, 1:])
+
+    def count(self, left, top, right, bottom):
+        """Number of content pixels in the half-open box (left, top, right, bottom)."""
+        s = self.sat
+        return int(s[bottom, right] - s[top, right] - s[bottom, left] + s[top, left])
+
+    def has_content(self, left, top, right, bottom):
+        """True if the half-open box contains any content pixel. O(1)."""
+        return self.count(left, top, right, bottom) > 0
+
+    def column_profile(self, rows=None):
+        """
+        Boolean array, one entry per column, marking columns with content.
+        If rows is given, only those rows are considered.
+        """
+        if rows is None:
+            return (self.sat[self.height, 1:] - self.sat[self.height, :-1]) > 0
+        return self.mask[list(rows)].any(axis=0)
+
+    def span_bounds(self, left, right):
+        """
+        Tight vertical bounds (top, bottom) of the content in columns
+        [left, right), bottom exclusive. Returns None for an empty span.
+        Binary search over the table, so O(log height).
+        """
+        if not self.has_content(left, 0, right, self.height):
+            return None
+
+        # First row whose prefix [0, y] holds content
+        lo, hi = 0, self.height - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.has_content(left, 0, right, mid + 1):
+                hi = mid
+            else:
+                lo = mid + 1
+        top = lo
+
+        # Last row whose suffix [y, height) holds content
+        lo, hi = top, self.height - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.has_content(left, mid, right, self.height):
+                lo = mid
+            else:
+                hi = mid - 1
+        return top, lo + 1
+
+    def span_bbox(self, left, right):
+        """Tight (left, top, right, bottom) box of span [left, right), or None."""
+        bounds = self.span_bounds(left, right)
+        if bounds is None:
+            return None
+        return (left, bounds[0], right, bounds[1])
+
+
+def content_spans(profile):
+    """
+    Convert a boolean column profile into half-open (start, end) runs
+    of consecutive True entries.
+    """
+    padded = np.concatenate(([False], np.asarray(profile, dtype=bool), [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return [(int(s), int(e)) for s, e in zip(edges[::2], edges[1::2])]
+
+
+def _row_runs(mask):
+    """
+    Run-length encode a 2D boolean mask in one pass.
+    Returns (row, start, end) arrays for every horizontal run, in raster order.
+    """
+    h, w = mask.shape
+    padded = np.zeros((h, w + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    # Raster order over the flattened edges keeps runs sorted by row, then x
+    starts = np.flatnonzero(np.diff(padded, axis=1).ravel() == 1)
+    ends = np.flatnonzero(np.diff(padded, axis=1).ravel() == -1)
+    return starts // (w + 1), starts % (w + 1), ends % (w + 1)
+
+
+def _find(parent, i):
+    """Union-find root lookup with path halving."""
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def label_components(mask):
+    """
+    Label the 8-connected components of a boolean mask.
+
+    Works on horizontal runs rather than pixels: runs on adjacent rows are
+    unioned when they touch (diagonals included), so the work is linear in
+    the number of pixels plus runs. Returns a list of
+    (left, top, right, bottom, area) tuples, half-open, one per component.
+    """
+    rows, starts, ends = _row_runs(mask)
+    n = len(rows)
+    parent = list(range(n))
+
+    # Row r's runs occupy [row_first[r], row_first[r + 1]) in the run arrays
+    row_first = np.searchsorted(rows, np.arange(mask.shape[0] + 1))
+    for r in range(1, mask.shape[0]):
+        i, i_end = row_first[r - 1], row_first[r]
+        j, j_end = row_first[r], row_first[r + 1]
+        # Two-pointer sweep: runs touch if [start - 1, end + 1) overlaps
+        while i < i_end and j < j_end:
+            if ends[i] >= starts[j] and ends[j] >= starts[i]:
+                a, b = _find(parent, i), _find(parent, j)
+                if a != b:
+                    parent[b] = a
+            if ends[i] < ends[j]:
+                i += 1
+            else:
+                j += 1
+
+    if n == 0:
+        return []
+    roots = np.array([_find(parent, i) for i in range(n)])
+    labels, inverse = np.unique(roots, return_inverse=True)
+    k = len(labels)
+    left = np.full(k, mask.shape[1])
+    top = np.full(k, mask.shape[0])
+    right = np.zeros(k, dtype=np.int64)
+    bottom = np.zeros(k, dtype=np.int64)
+    area = np.zeros(k, dtype=np.int64)
+    np.minimum.at(left, inverse, starts)
+    np.minimum.at(top, inverse, rows)
+    np.maximum.at(right, inverse, ends)
+    np.maximum.at(bottom, inverse, rows + 1)
+    np.add.at(area, inverse, ends - starts)
+    return [tuple(int(v) for v in c) for c in zip(left, top, right, bottom, area)]
+
+
+def _boxes_touch(a, b, gap):
+    """True if two (left, top, right, bottom) boxes are within gap pixels."""
+    return (a[0] - gap < b[2] and b[0] - gap < a[2] and
+            a[1] - gap < b[3] and b[1] - gap < a[3])
+
+
+def _union_box(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def group_rows(boxes):
+    """
+    Group sprite boxes into rows and order them for reading.
+    A box joins the current row when it overlaps the row's vertical extent
+    by at least half its own height. Returns a list of rows, each sorted
+    left to right.
+    """
+    rows = []
+    for box in sorted(boxes, key=lambda b: (b[1], b[0])):
+        if rows:
+            row_top, row_bottom = rows[-1][0]
+            overlap = min(row_bottom, box[3]) - max(row_top, box[1])
+            if overlap * 2 >= box[3] - box[1]:
+                rows[-1][0] = (min(row_top, box[1]), max(row_bottom, box[3]))
+                rows[-1][1].append(box)
+                continue
+        rows.append([(box[1], box[3]), [box]])
+    return [sorted(members) for _, members in rows]
+
+
+def find_sprite_blobs(img, alpha_threshold=30, min_area_ratio=0.1, attach_gap=None):
+    """
+    Detect every sprite on a cleaned sheet and return their bounding boxes
+    (left, top, right, bottom) in reading order: rows top to bottom, then
+    left to right. The frame count is len() of the result.
+
+    Components with at least min_area_ratio of the largest component's
+    area are sprites; sprites within attach_gap pixels of each other are
+    merged (a pose split by a transparent seam). Smaller components are
+    fragments: they are folded into a sprite within attach_gap pixels
+    (a detached antenna tip) and otherwise dropped as leftover noise.
+    attach_gap defaults to ATTACH_GAP_RATIO of the median sprite height
+    (at least 1px), so the seams it bridges scale with the sheet.
+    """
+    components = label_components(alpha_mask(img, alpha_threshold))
+    if not components:
+        return []
+
+    largest = max(c[4] for c in components)
+    sprites = [c[:4] for c in components if c[4] >= largest * min_area_ratio]
+    fragments = [c[:4] for c in components if c[4] < largest * min_area_ratio]
+    if attach_gap is None:
+        height = statistics.median(box[3] - box[1] for box in sprites)
+        attach_gap = max(1, round(ATTACH_GAP_RATIO * height))
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(sprites)):
+            for j in range(i + 1, len(sprites)):
+                if _boxes_touch(sprites[i], sprites[j], attach_gap):
+                    sprites[i] = _union_box(sprites[i], sprites.pop(j))
+                    merged = True
+                    break
+            if merged:
+                break
+
+    for frag in fragments:
+        for i, box in enumerate(sprites):
+            if _boxes_touch(box, frag, attach_gap):
+                sprites[i] = _union_box(box, frag)
+                break
+
+    return [box for row in group_rows(sprites) for box in row]
@@ -0,0 +1,108 @@
+import itertools
+import unittest
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from atlas import MaxRectsBin, build_atlas, pack_pages
+
+
+def overlaps(a, b):
+    """True if half-open (x, y, w, h) rectangles a and b share a pixel."""
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def random_sprite(rng, w, h):
+    """RGBA frame with random opaque pixels inside a transparent margin."""
+    pixels = np.zeros((h, w, 4), dtype=np.uint8)
+    inner = (h - 2, w - 2, 4)
+    pixels[1:-1, 1:-1] = rng.integers(0, 256, inner, dtype=np.uint8)
+    pixels[1:-1, 1:-1, 3] = 255
+    return Image.fromarray(pixels, "RGBA")
+
+
+class MaxRectsBinTest(unittest.TestCase):
+    def test_placements_stay_in_bounds_and_disjoint(self):
+        rng = np.random.default_rng(0)
+        bin_ = MaxRectsBin(256, 256)
+        placed = []
+        for _ in range(300):
+            w, h = (int(v) for v in rng.integers(1, 48, 2))
+            pos = bin_.insert(w, h)
+            if pos is None:
+                continue
+            rect = (pos[0], pos[1], w, h)
+            self.assertTrue(0 <= rect[0] and rect[0] + w <= 256 and 0 <= rect[1] and rect[1] + h <= 256)
+            for other in placed:
+                self.assertFalse(overlaps(rect, other), (rect, other))
+            placed.append(rect)
+        self.assertGreater(len(placed), 20)
+
+    def test_exact_fill(self):
+        bin_ = MaxRectsBin(64, 64)
+        for _ in range(16):
+            self.assertIsNotNone(bin_.insert(16, 16))
+        self.assertIsNone(bin_.insert(1, 1))
+
+
+class PackPagesTest(unittest.TestCase):
+    def test_pages_hold_every_item_without_overlap(self):
+        rng = np.random.default_rng(1)
+        items = [(f"f{i}", int(w), int(h)) for i, (w, h) in enumerate(rng.integers(4, 120, (80, 2)))]
+        pages = pack_pages(items, max_size=256)
+        sizes = {name: (w, h) for name, w, h in items}
+        packed = [name for _, placed in pages for name in placed]
+        self.assertCountEqual(packed, sizes)
+        for (width, height), placed in pages:
+            self.assertEqual(width & (width - 1), 0)
+            self.assertEqual(height & (height - 1), 0)
+            rects = [(x, y) + sizes[name] for name, (x, y) in placed.items()]
+            for x, y, w, h in rects:
+                self.assertTrue(x >= 0 and y >= 0 and x + w <= width and y + h <= height)
+            for a, b in itertools.combinations(rects, 2):
+                self.assertFalse(overlaps(a, b), (a, b))
+
+    def test_oversized_item_is_rejected(self):
+        with self.assertRaises(ValueError):
+            pack_pages([("big", 300, 10)], max_size=256)
+
+
+class BuildAtlasTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.frames = {f"s{i}": random_sprite(rng, int(w), int(h))
+                       for i, (w, h) in enumerate(rng.integers(6, 60, (30, 2)))}
+
+    def test_frames_reproduce_sources(self):
+        extrude = 1
+        for page, infos in build_atlas(self.frames, max_size=256, padding=2, extrude=extrude):
+            regions = [info["frame"] for info in infos.values()]
+            for name, info in infos.items():
+                x, y, w, h = info["frame"]
+                ox, oy, sw, sh = info["source"]
+                self.assertEqual((sw, sh), self.frames[name].size)
+                restored = Image.new("RGBA", (sw, sh))
+                restored.paste(page.crop((x, y, x + w, y + h)), (ox, oy))
+                self.assertEqual(restored.tobytes(), self.frames[name].tobytes(), name)
+            # The extruded slots must not overlap either
+            slots = [(x - extrude, y - extrude, w + 2 * extrude, h + 2 * extrude) for x, y, w, h in regions]
+            for a, b in itertools.combinations(slots, 2):
+                self.assertFalse(overlaps(a, b), (a, b))
+
+    def test_mirrored_frames_share_a_region(self):
+        frames = dict(self.frames)
+        frames["left"] = random_sprite(np.random.default_rng(3), 20, 12)
+        frames["right"] = ImageOps.mirror(frames["left"])
+        frames["up"] = ImageOps.flip(self.frames["s1"])
+        frames["s0-flipped"] = ImageOps.flip(self.frames["s0"])
+        (page, infos), = build_atlas(frames, max_size=512, mirrorable=("left", "right", "s1", "up"))
+        self.assertEqual(infos["right"]["frame"], infos["left"]["frame"])
+        self.assertTrue(infos["right"]["flip_x"] and not infos["right"]["flip_y"])
+        self.assertEqual(infos["up"]["frame"], infos["s1"]["frame"])
+        self.assertTrue(infos["up"]["flip_y"] and not infos["up"]["flip_x"])
+        # Frames not listed as mirrorable keep their own region
+        self.assertNotEqual(infos["s0-flipped"]["frame"], infos["s0"]["frame"])
+
+
+if __name__ == "__main__":
+    unittest.main()
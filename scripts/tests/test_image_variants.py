@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+import image_variants
+from image_variants import VARIANT_MAX_ERROR, available_formats, save_variants, variant_error
+from png_optimize import canonical_rgba
+
+
+def sprite_sheet():
+    """Translucent sprites with hard edges on a transparent background."""
+    rng = np.random.default_rng(0)
+    pixels = np.zeros((48, 64, 4), dtype=np.uint8)
+    for x in range(4, 60, 12):
+        pixels[6:42, x:x + 8, :3] = rng.integers(0, 256, 3, dtype=np.uint8)
+        pixels[6:42, x:x + 8, 3] = rng.integers(64, 256)
+    return Image.fromarray(pixels, "RGBA")
+
+
+class SaveVariantsTest(unittest.TestCase):
+    def test_variants_decode_close_to_the_png(self):
+        img = sprite_sheet()
+        pixels = canonical_rgba(img).astype(np.int16)
+        with tempfile.TemporaryDirectory() as tmp:
+            written = save_variants(img, os.path.join(tmp, "sheet.png"), available_formats())
+            self.assertEqual(len(written), len(available_formats()))
+            for path, _ in written:
+                error, leaked = variant_error(path, pixels)
+                self.assertLessEqual(error, VARIANT_MAX_ERROR, path)
+                self.assertEqual(leaked, 0, path)
+
+    @unittest.skipUnless("avif" in available_formats(), "Pillow cannot encode AVIF")
+    def test_lossy_variant_is_dropped(self):
+        lossy = dict(image_variants.VARIANT_ENCODERS, avif={"format": "AVIF", "quality": 30})
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(image_variants, "VARIANT_ENCODERS", lossy), \
+                mock.patch("builtins.print"):
+            png = os.path.join(tmp, "sheet.png")
+            self.assertEqual(save_variants(sprite_sheet(), png, ["avif"]), [])
+            self.assertFalse(os.path.exists(os.path.join(tmp, "sheet.avif")))
+
+
+if __name__ == "__main__":
+    unittest.main()
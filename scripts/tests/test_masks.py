@@ -0,0 +1,102 @@
+import contextlib
+import io
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from masks import (FALLBACK_MASK, MIN_SCORE, band_keep, border_regions, choose_mask, coherence,
+                   fit_mask, score_mask, select_mask)
+
+SIZE = (160, 96)
+
+
+def checkerboard(period, light=(240, 240, 240), dark=(196, 196, 196), offset=(0, 0)):
+    w, h = SIZE
+    ys = np.arange(h)[:, None] + offset[1]
+    xs = np.arange(w)[None, :] + offset[0]
+    return np.asarray([light, dark], dtype=np.uint8)[(ys // period + xs // period) % 2]
+
+
+def with_sprites(background, color=(40, 120, 220)):
+    """background with two saturated rectangles and a dark disc well inside the frame."""
+    pixels = background.copy()
+    pixels[20:70, 20:60] = color
+    pixels[30:80, 90:130] = color[::-1]
+    ys, xs = np.ogrid[:SIZE[1], :SIZE[0]]
+    pixels[(ys - 48) ** 2 + (xs - 75) ** 2 < 100] = (30, 30, 30)
+    return Image.fromarray(pixels)
+
+
+def quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+class SelectMaskTest(unittest.TestCase):
+    def test_checkerboard_background(self):
+        for period, offset in ((8, (0, 0)), (6, (3, 1))):
+            with self.subTest(period=period, offset=offset):
+                img = with_sprites(checkerboard(period, offset=offset))
+                name, scores = select_mask(img)
+                self.assertEqual(name, "checkerboard", scores)
+                self.assertGreater(scores["checkerboard"]["model_fit"], 0.9)
+
+    def test_flat_colour_background(self):
+        img = with_sprites(np.full((SIZE[1], SIZE[0], 3), (70, 160, 90), dtype=np.uint8))
+        name, scores = select_mask(img)
+        self.assertEqual(name, "corners", scores)
+        self.assertEqual(scores["corners"]["border_cleared"], 1.0)
+
+    def test_noise_falls_back(self):
+        rng = np.random.default_rng(0)
+        img = Image.fromarray(rng.integers(0, 256, (SIZE[1], SIZE[0], 3), dtype=np.uint8))
+        name, scores = select_mask(img)
+        self.assertIsNone(name)
+        self.assertTrue(all(s["score"] < MIN_SCORE for s in scores.values()))
+        self.assertEqual(quiet(choose_mask, img), FALLBACK_MASK)
+
+    def test_full_resolution_pixels(self):
+        # A preview plus the full pixels (RGBA, as bands.py passes them) scores like the image
+        img = with_sprites(checkerboard(8))
+        pixels = np.asarray(img.convert("RGBA"))
+        name, _ = select_mask(img.reduce(2), pixels=pixels)
+        self.assertEqual(name, "checkerboard")
+
+
+class ScoreMaskTest(unittest.TestCase):
+    def test_border_regions_cover_the_frame_once(self):
+        rgb = np.zeros((SIZE[1], SIZE[0], 3), dtype=np.int16)
+        seen = np.zeros(rgb.shape[:2], dtype=np.int64)
+        for top, left, region in border_regions(rgb, width=3):
+            seen[top:top + region.shape[0], left:left + region.shape[1]] += 1
+        frame = np.ones_like(seen)
+        frame[3:-3, 3:-3] = 0
+        np.testing.assert_array_equal(seen, frame)
+
+    def test_band_keep_matches_whole_image(self):
+        # Masking the frame strips piecewise must agree with masking the image
+        rgb = np.asarray(with_sprites(checkerboard(6, offset=(2, 5))), dtype=np.int16)
+        for strategy in ("checkerboard", "corners", "white-grey"):
+            params = fit_mask(strategy, rgb)
+            whole = band_keep(strategy, rgb, 0, params)
+            for top, left, region in border_regions(rgb):
+                with self.subTest(strategy=strategy, top=top, left=left):
+                    part = band_keep(strategy, region, top, params, left)
+                    np.testing.assert_array_equal(
+                        part, whole[top:top + region.shape[0], left:left + region.shape[1]])
+
+    def test_degenerate_masks_score_zero(self):
+        rgb = np.full((SIZE[1], SIZE[0], 3), 250, dtype=np.int16)
+        self.assertEqual(score_mask("white-grey", rgb, rgb[::4, ::4])["score"], 0.0)
+
+    def test_coherence(self):
+        solid = np.zeros((32, 32), dtype=np.uint8)
+        solid[8:24, 8:24] = 255
+        speckle = np.random.default_rng(1).choice(np.array([0, 255], dtype=np.uint8), (32, 32))
+        self.assertGreater(coherence(solid), 0.9)
+        self.assertLess(coherence(speckle), 0.7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+import png_optimize
+from bands import BandedImage
+from png_optimize import canonical_rgba, encode_png, save_png, write_png_bands
+
+
+def decode(data):
+    return np.array(Image.open(io.BytesIO(data)).convert("RGBA"))
+
+
+def random_image(rng, size, colors=None, alpha=True):
+    """RGBA image of random pixels, drawn from `colors` random colours if given."""
+    w, h = size
+    if colors is None:
+        pixels = rng.integers(0, 256, (h, w, 4), dtype=np.uint8)
+    else:
+        palette = rng.integers(0, 256, (colors, 4), dtype=np.uint8)
+        pixels = palette[rng.integers(0, colors, (h, w))]
+    if not alpha:
+        pixels[..., 3] = 255
+    return Image.fromarray(pixels, "RGBA")
+
+
+class EncodePngTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def assertRoundTrips(self, img):
+        data, label = encode_png(img)
+        np.testing.assert_array_equal(decode(data), canonical_rgba(img), err_msg=label)
+        return label
+
+    def test_palette_depths(self):
+        for colors, depth in ((2, "P1"), (4, "P2"), (16, "P4"), (200, "P8")):
+            with self.subTest(colors=colors):
+                label = self.assertRoundTrips(random_image(self.rng, (37, 23), colors))
+                self.assertTrue(label.startswith(depth), label)
+
+    def test_true_color(self):
+        self.assertTrue(self.assertRoundTrips(random_image(self.rng, (31, 17))).startswith("RGBA"))
+        opaque = random_image(self.rng, (31, 17), alpha=False)
+        self.assertTrue(self.assertRoundTrips(opaque).startswith("RGB/"))
+
+    def test_gradient_and_odd_sizes(self):
+        for w, h in ((1, 1), (1, 9), (9, 1), (65, 3)):
+            ramp = np.zeros((h, w, 4), dtype=np.uint8)
+            ramp[..., 0] = np.arange(w)[None, :] * 255 // max(1, w - 1)
+            ramp[..., 1] = np.arange(h)[:, None] * 255 // max(1, h - 1)
+            ramp[..., 3] = 255
+            with self.subTest(size=(w, h)):
+                self.assertRoundTrips(Image.fromarray(ramp, "RGBA"))
+
+    def test_transparent_pixels_are_zeroed(self):
+        pixels = np.array(random_image(self.rng, (8, 8)))
+        pixels[:4, ..., 3] = 0
+        data, _ = encode_png(Image.fromarray(pixels, "RGBA"))
+        decoded = decode(data)
+        self.assertFalse(decoded[:4].any())
+        np.testing.assert_array_equal(decoded[4:], canonical_rgba(Image.fromarray(pixels))[4:])
+
+    def test_save_png_writes_encoding(self):
+        img = random_image(self.rng, (20, 20), colors=5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.png")
+            save_png(img, path)
+            with Image.open(path) as saved:
+                np.testing.assert_array_equal(np.array(saved.convert("RGBA")), canonical_rgba(img))
+
+
+class WritePngBandsTest(unittest.TestCase):
+    def test_streamed_png_round_trips(self):
+        rng = np.random.default_rng(1)
+        for alpha in (True, False):
+            img = random_image(rng, (45, 70), alpha=alpha)
+            pixels = np.array(img)
+            banded = BandedImage(45, 70, lambda: (pixels[y:y + 16] for y in range(0, 70, 16)),
+                                 opaque=not alpha)
+            # Filter a few rows at a time so bands are split across filter calls too
+            with self.subTest(alpha=alpha), tempfile.TemporaryDirectory() as tmp, \
+                    mock.patch.object(png_optimize, "STREAM_FILTER_BYTES", 500):
+                path = os.path.join(tmp, "out.png")
+                write_png_bands(banded, path)
+                with Image.open(path) as saved:
+                    np.testing.assert_array_equal(np.array(saved.convert("RGBA")), canonical_rgba(img))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import math
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from raster import FLATTEN_TOLERANCE, ellipse_points, polygon_coverage, rect_points, render_layers
+
+
+def shoelace(points):
+    pts = np.asarray(points, dtype=np.float64)
+    x, y = pts[:, 0], pts[:, 1]
+    return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+def rect_coverage(box, width, height):
+    """Exact per-pixel coverage of an axis-aligned box, from its overlap with each row and column."""
+    x0, y0, x1, y1 = box
+    xs = np.arange(width)
+    ys = np.arange(height)
+    cols = np.clip(np.minimum(xs + 1, x1) - np.maximum(xs, x0), 0, 1)
+    rows = np.clip(np.minimum(ys + 1, y1) - np.maximum(ys, y0), 0, 1)
+    return rows[:, None] * cols[None, :]
+
+
+class PolygonCoverageTest(unittest.TestCase):
+    def test_rectangles_are_exact(self):
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            x0, x1 = sorted(rng.uniform(-5, 25, 2))
+            y0, y1 = sorted(rng.uniform(-5, 20, 2))
+            box = (x0, y0, x1, y1)
+            with self.subTest(box=box):
+                np.testing.assert_allclose(polygon_coverage(rect_points(box), 20, 15),
+                                           rect_coverage(box, 20, 15), atol=1e-5)
+
+    def test_area_of_random_convex_polygons(self):
+        rng = np.random.default_rng(1)
+        for _ in range(50):
+            angles = np.sort(rng.uniform(0, 2 * math.pi, int(rng.integers(3, 12))))
+            cx, cy, r = rng.uniform(12, 20), rng.uniform(12, 20), rng.uniform(1, 10)
+            points = [(cx + r * math.cos(a), cy + r * math.sin(a)) for a in angles]
+            coverage = polygon_coverage(points, 32, 32)
+            self.assertTrue(((coverage >= 0) & (coverage <= 1 + 1e-6)).all())
+            self.assertAlmostEqual(float(coverage.sum()), shoelace(points), places=3)
+
+    def test_orientation_and_winding(self):
+        square = rect_points((2.5, 3.25, 9.75, 8))
+        expected = polygon_coverage(square, 12, 12)
+        np.testing.assert_allclose(polygon_coverage(square[::-1], 12, 12), expected, atol=1e-6)
+        # Tracing the outline twice winds it twice: whole pixels are still covered once,
+        # while the accumulated area of edge pixels doubles before it is clamped
+        np.testing.assert_allclose(polygon_coverage(square + square, 12, 12),
+                                   np.minimum(2 * expected, 1), atol=1e-6)
+
+    def test_off_canvas(self):
+        self.assertFalse(polygon_coverage(rect_points((20, 20, 30, 30)), 10, 10).any())
+        # Content left of the canvas still fills the pixels it covers on it
+        np.testing.assert_allclose(polygon_coverage(rect_points((-50, 2, 4.5, 6)), 10, 10),
+                                   rect_coverage((0, 2, 4.5, 6), 10, 10), atol=1e-5)
+
+    def test_ellipse_area(self):
+        # The flattened polygon is inscribed, so it falls short by at most the tolerance band
+        coverage = polygon_coverage(ellipse_points((3.3, 2.1, 40.7, 25.9)), 48, 32)
+        exact = math.pi * 18.7 * 11.9
+        perimeter = math.pi * (3 * (18.7 + 11.9) - math.sqrt((3 * 18.7 + 11.9) * (18.7 + 3 * 11.9)))
+        self.assertLessEqual(float(coverage.sum()), exact + 1e-3)
+        self.assertGreater(float(coverage.sum()), exact - perimeter * FLATTEN_TOLERANCE)
+
+
+class RenderLayersTest(unittest.TestCase):
+    def test_opaque_fill(self):
+        img = np.array(render_layers(12, 10, [{"shape": rect_points((2, 3, 7, 8)), "fill": (10, 200, 30, 255)}]))
+        inside = np.zeros((10, 12), dtype=bool)
+        inside[3:8, 2:7] = True
+        self.assertTrue((img[inside] == (10, 200, 30, 255)).all())
+        self.assertFalse(img[~inside].any())
+
+    def test_over_matches_alpha_composite(self):
+        base = {"shape": rect_points((0, 0, 16, 16)), "fill": (200, 40, 40, 180)}
+        top = {"shape": rect_points((4, 4, 12, 12)), "fill": (20, 60, 240, 128), "mode": "over"}
+        img = np.array(render_layers(16, 16, [base, top])).astype(int)
+
+        expected = Image.new("RGBA", (16, 16), base["fill"])
+        expected.alpha_composite(Image.new("RGBA", (8, 8), top["fill"]), (4, 4))
+        self.assertLessEqual(np.abs(img - np.array(expected).astype(int)).max(), 1)
+
+    def test_blur_keeps_total_alpha(self):
+        layer = {"shape": rect_points((12, 12, 20, 20)), "fill": (0, 0, 0, 255)}
+        sharp = np.array(render_layers(32, 32, [layer]))[..., 3].sum()
+        blurred = np.array(render_layers(32, 32, [dict(layer, blur=2)]))[..., 3]
+        self.assertLess(blurred.max(), 255)
+        self.assertAlmostEqual(blurred.sum() / sharp, 1, delta=0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from sprite_index import AlphaIndex, find_sprite_blobs, label_components
+
+
+def brute_force_components(mask):
+    """label_components() by flood fill, one pixel at a time."""
+    h, w = mask.shape
+    seen = np.zeros_like(mask, dtype=bool)
+    components = []
+    for y, x in zip(*np.nonzero(mask)):
+        if seen[y, x]:
+            continue
+        seen[y, x] = True
+        stack, pixels = [(y, x)], []
+        while stack:
+            cy, cx = stack.pop()
+            pixels.append((cy, cx))
+            for ny in range(max(0, cy - 1), min(h, cy + 2)):
+                for nx in range(max(0, cx - 1), min(w, cx + 2)):
+                    if mask[ny, nx] and not seen[ny, nx]:
+                        seen[ny, nx] = True
+                        stack.append((ny, nx))
+        ys, xs = zip(*pixels)
+        components.append((min(xs), min(ys), max(xs) + 1, max(ys) + 1, len(pixels)))
+    return components
+
+
+def sheet(boxes, size):
+    """Transparent RGBA sheet with an opaque rectangle per (left, top, right, bottom) box."""
+    pixels = np.zeros((size[1], size[0], 4), dtype=np.uint8)
+    for left, top, right, bottom in boxes:
+        pixels[top:bottom, left:right] = 255
+    return Image.fromarray(pixels, "RGBA")
+
+
+class LabelComponentsTest(unittest.TestCase):
+    def test_matches_brute_force_on_random_masks(self):
+        rng = np.random.default_rng(0)
+        for trial in range(200):
+            h, w = (int(v) for v in rng.integers(1, 24, 2))
+            mask = rng.random((h, w)) < rng.uniform(0.1, 0.7)
+            with self.subTest(trial=trial, shape=(h, w)):
+                self.assertEqual(sorted(label_components(mask)), sorted(brute_force_components(mask)))
+
+    def test_diagonal_neighbours_connect(self):
+        mask = np.eye(5, dtype=bool)
+        self.assertEqual(label_components(mask), [(0, 0, 5, 5, 5)])
+        self.assertEqual(len(label_components(np.eye(5, dtype=bool)[::2])), 3)
+
+    def test_empty_mask(self):
+        self.assertEqual(label_components(np.zeros((4, 6), dtype=bool)), [])
+
+
+class AlphaIndexTest(unittest.TestCase):
+    def test_counts_match_mask(self):
+        rng = np.random.default_rng(1)
+        alpha = (rng.random((17, 23)) < 0.4).astype(np.uint8) * 255
+        img = Image.fromarray(np.dstack([alpha] * 4), "RGBA")
+        index = AlphaIndex(img)
+        for _ in range(100):
+            left, right = sorted(int(v) for v in rng.integers(0, 24, 2))
+            top, bottom = sorted(int(v) for v in rng.integers(0, 18, 2))
+            self.assertEqual(index.count(left, top, right, bottom),
+                             int((alpha[top:bottom, left:right] > 0).sum()))
+
+
+class FindSpriteBlobsTest(unittest.TestCase):
+    def test_reading_order_merging_and_fragments(self):
+        boxes = [(60, 5, 90, 45), (10, 5, 40, 45), (10, 60, 40, 100),
+                 # Split pose: two halves with a 1px seam, bridged by the default 2px gap
+                 (60, 60, 90, 79), (60, 80, 90, 100),
+                 # Detached antenna tip above the first sprite, and stray noise far away
+                 (12, 2, 14, 4), (118, 118, 119, 119)]
+        found = find_sprite_blobs(sheet(boxes, (120, 120)))
+        self.assertEqual(found, [(10, 2, 40, 45), (60, 5, 90, 45), (10, 60, 40, 100), (60, 60, 90, 100)])
+
+    def test_gap_scales_with_sprite_size(self):
+        # The same layout at 1/4 scale: a fixed 8px gap would merge every sprite
+        boxes = [(2, 2, 10, 12), (12, 2, 20, 12), (2, 16, 10, 26), (12, 16, 20, 26)]
+        self.assertEqual(len(find_sprite_blobs(sheet(boxes, (24, 30)))), 4)
+
+    def test_blank_sheet(self):
+        self.assertEqual(find_sprite_blobs(sheet([], (16, 16))), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
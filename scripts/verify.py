@@ -0,0 +1,115 @@
+"""
+Fast verification of built outputs against a committed lockfile.
+
+scripts/assets.lock.json records, for every manifest output, the build key
+it was made from (see build_cache.BuildCache.key_for) and every file its
+job wrote, with the file's SHA-256 and, for PNGs, its dimensions:
+
+    {"version": 1,
+     "outputs": {"tiles/dirt.png": {"key": ...,
+                                    "files": {"tiles/dirt.png": {"sha256": ..., "size": [64, 64]},
+                                              "tiles/dirt@2x.png": {...}}}}}
+
+Checking a file never decodes it: a PNG's dimensions are read from its
+IHDR chunk (the first 24 bytes) and the rest is hashed, across a thread
+pool since hashlib releases the GIL. Verifying every output therefore
+takes milliseconds, which lets CI confirm that the committed images are
+the ones the committed sources, manifest and code produce. Alpha
+statistics are opt-in: they decode the image and reduce its alpha channel
+with NumPy.
+"""
+
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from build_cache import file_sha256
+from png_optimize import PNG_SIGNATURE
+from scheduler import default_workers
+
+LOCK_VERSION = 1
+
+
+def png_size(path):
+    """(width, height) of a PNG from its IHDR chunk, without decoding it."""
+    with open(path, "rb") as f:
+        head = f.read(24)
+    if len(head) < 24 or not head.startswith(PNG_SIGNATURE) or head[12:16] != b"IHDR":
+        raise ValueError(f"{path}: not a PNG")
+    return struct.unpack(">II", head[16:24])
+
+
+def alpha_stats(path):
+    """
+    Share of fully transparent and of partly transparent pixels in an
+    image, and its mean opacity (0-1).
+    """
+    with Image.open(path) as img:
+        alpha = np.asarray(img.convert("RGBA").getchannel("A"))
+    clear = np.count_nonzero(alpha == 0)
+    partial = alpha.size - clear - np.count_nonzero(alpha == 255)
+    return {"transparent": clear / alpha.size, "partial": partial / alpha.size,
+            "opacity": float(alpha.mean()) / 255}
+
+
+def file_facts(path, stats=False):
+    """
+    {"sha256", "size" (PNGs), "alpha" (PNGs, with stats)} of a file, or
+    None if it is missing.
+    """
+    if not os.path.exists(path):
+        return None
+    facts = {"sha256": file_sha256(path)}
+    if path.endswith(".png"):
+        facts["size"] = list(png_size(path))
+        if stats:
+            facts["alpha"] = alpha_stats(path)
+    return facts
+
+
+def inspect_files(root, rels, stats=False, workers=None):
+    """{rel: file_facts()} of files under root, checked in parallel."""
+    paths = [os.path.join(root, rel) for rel in rels]
+    with ThreadPoolExecutor(max_workers=workers or default_workers()) as pool:
+        return dict(zip(rels, pool.map(lambda path: file_facts(path, stats), paths)))
+
+
+def load_lockfile(path):
+    """The lockfile's {output: {"key", "files"}}; empty if missing or from another version."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get("outputs", {}) if data.get("version") == LOCK_VERSION else {}
+
+
+def write_lockfile(path, outputs):
+    """Write the lockfile, leaving it untouched if unchanged. Returns True if written."""
+    text = json.dumps({"version": LOCK_VERSION, "outputs": outputs}, indent=2, sort_keys=True) + "\n"
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == text:
+                return False
+    with open(path, "w") as f:
+        f.write(text)
+    return True
+
+
+def check_file(facts, expected_size=None, locked=None):
+    """
+    Problems with one file: [] if it exists, has expected_size (when
+    given) and matches its lockfile record (when given).
+    """
+    if facts is None:
+        return ["missing"]
+    problems = []
+    if expected_size is not None and facts.get("size") != list(expected_size):
+        problems.append("wrong size")
+    if locked is not None and facts["sha256"] != locked["sha256"]:
+        problems.append("differs from lockfile")
+    return problems
@@ -0,0 +1,84 @@
+"""
+Watch mode for the asset pipeline: `process_images.py --watch`.
+
+Rerunning the script after every tweak in resources/ pays for interpreter
+and Pillow startup, decodes every source again and re-checks every
+output. Watch mode stays resident instead:
+
+- it polls resources/, the manifest and the pipeline's own modules for
+  files whose size or mtime changed. Polling a tree this small costs well
+  under a millisecond and needs nothing beyond the standard library;
+- a changed source rebuilds only the outputs that read it plus the
+  outputs depending on those (the atlas), in-process, so fonts, source
+  hashes and mapped source pixels (pixel_cache.py) stay warm;
+- after each rebuild it rewrites a stamp file, which the Vite dev server
+  (vite.config.js) watches to reload the game with the new textures.
+
+Editing the pipeline code restarts the process, since modules that are
+already imported cannot be reloaded safely.
+"""
+
+import json
+import os
+import sys
+import time
+
+
+def scan_files(paths):
+    """
+    {path: (mtime_ns, size)} for every file in paths; directories are
+    walked recursively, missing paths are skipped.
+    """
+    files = {}
+    for path in paths:
+        if os.path.isfile(path):
+            st = os.stat(path)
+            files[path] = (st.st_mtime_ns, st.st_size)
+            continue
+        for root, _, names in os.walk(path):
+            for name in names:
+                full = os.path.join(root, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                files[full] = (st.st_mtime_ns, st.st_size)
+    return files
+
+
+def changed_files(before, after):
+    """Sorted paths added, removed or modified between two scan_files() results."""
+    return sorted(path for path in before.keys() | after.keys() if before.get(path) != after.get(path))
+
+
+def affected_outputs(assets, changed_sources):
+    """
+    Outputs to rebuild when changed_sources (paths relative to resources/)
+    changed: the ones reading any of them, plus every output that depends
+    on those, directly or not. Returned in manifest order.
+    """
+    changed_sources = set(changed_sources)
+    hit = {out for out, entry in assets.items() if changed_sources & set(entry["sources"])}
+    while True:
+        more = {out for out, entry in assets.items()
+                if out not in hit and hit & set(entry["depends_on"])}
+        if not more:
+            break
+        hit |= more
+    return [out for out in assets if out in hit]
+
+
+def write_build_stamp(path, outputs):
+    """Atomically rewrite the stamp file with the outputs just rebuilt."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"outputs": outputs, "time": time.time()}, f)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def restart_process():
+    """Replace this process with a fresh run of the same command line."""
+    sys.stdout.flush()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
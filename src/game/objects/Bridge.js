@@ -1,6 +1,7 @@
 import { TILE_SIZE, gridToPixel } from '../systems/GridSystem.js';
 import { ParticleManager } from '../systems/ParticleManager.js';
 import { FXManager } from '../systems/FXManager.js';
+import { ATLAS_KEY } from '../systems/TextureAtlas.js';
 
 /**
  * Build a bridge of N blocks at the gap position.
@@ -15,6 +16,7 @@ export function buildBridge(scene, gapData, platformGroup) {
     const block = platformGroup.create(
       baseX + i * TILE_SIZE + TILE_SIZE / 2,
       baseY + TILE_SIZE / 2,
+      ATLAS_KEY,
       'bridge-block'
     );
     block.setSize(TILE_SIZE, TILE_SIZE);
@@ -1,12 +1,13 @@
 import Phaser from 'phaser';
 import { TILE_SIZE, gridToPixel } from '../systems/GridSystem.js';
 import { FXManager } from '../systems/FXManager.js';
+import { ATLAS_KEY } from '../systems/TextureAtlas.js';
 
 export default class GoalFlag extends Phaser.Physics.Arcade.Sprite {
   constructor(scene, gridX, gridY) {
     const { x, y } = gridToPixel(gridX, gridY);
 
-    super(scene, x + TILE_SIZE / 2, y + TILE_SIZE / 2, 'flag');
+    super(scene, x + TILE_SIZE / 2, y + TILE_SIZE / 2, ATLAS_KEY, 'flag');
 
     scene.add.existing(this);
     scene.physics.add.existing(this, true); // Static body
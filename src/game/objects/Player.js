@@ -1,11 +1,12 @@
 import Phaser from 'phaser';
 import { TILE_SIZE, gridToPixel } from '../systems/GridSystem.js';
 import { FXManager } from '../systems/FXManager.js';
+import { ATLAS_KEY } from '../systems/TextureAtlas.js';
 
 export default class Player extends Phaser.Physics.Arcade.Sprite {
   constructor(scene, gridX, gridY) {
     const { x, y } = gridToPixel(gridX, gridY);
-    super(scene, x + TILE_SIZE / 2, y + TILE_SIZE / 2, 'botty-idle');
+    super(scene, x + TILE_SIZE / 2, y + TILE_SIZE / 2, ATLAS_KEY, 'botty-idle-0');
 
     scene.add.existing(this);
     scene.physics.add.existing(this);
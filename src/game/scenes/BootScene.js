@@ -1,10 +1,19 @@
 import Phaser from 'phaser';
+import {
+  FORMAT_MANIFEST_KEY, FORMAT_MANIFEST_URL, FORMAT_PROBES, SUPPORTED_FORMATS_KEY,
+  probeKey, supportedFormats
+} from '../systems/ImageFormats.js';
 
 export default class BootScene extends Phaser.Scene {
   constructor() {
     super('Boot');
   }
 
+  preload() {
+    // Size of every asset in each image format, for PreloadScene
+    this.load.json(FORMAT_MANIFEST_KEY, FORMAT_MANIFEST_URL);
+  }
+
   create() {
     this.add.text(
       this.scale.width / 2,
@@ -19,9 +28,38 @@ export default class BootScene extends Phaser.Scene {
       }
     ).setOrigin(0.5);
 
-    // Brief delay to ensure web font is loaded, then proceed
-    this.time.delayedCall(500, () => {
+    // Brief delay to ensure web font is loaded, and wait for the image
+    // format probes to decode (or fail), then proceed
+    let pending = Object.keys(FORMAT_PROBES).length + 1;
+    const proceed = () => {
+      pending -= 1;
+      if (pending > 0) return;
+      this.registry.set(SUPPORTED_FORMATS_KEY, supportedFormats(this.textures));
+      Object.keys(FORMAT_PROBES).forEach((format) => {
+        if (this.textures.exists(probeKey(format))) this.textures.remove(probeKey(format));
+      });
       this.scene.start('Preload');
+    };
+    this.probeImageFormats(proceed);
+    this.time.delayedCall(500, proceed);
+  }
+
+  probeImageFormats(onSettled) {
+    const textures = this.textures;
+    Object.entries(FORMAT_PROBES).forEach(([format, dataUri]) => {
+      const key = probeKey(format);
+      const onError = (errorKey) => {
+        if (errorKey !== key) return;
+        done();
+      };
+      const done = () => {
+        textures.off(Phaser.Textures.Events.ADD_KEY + key, done);
+        textures.off(Phaser.Textures.Events.ERROR, onError);
+        onSettled();
+      };
+      textures.once(Phaser.Textures.Events.ADD_KEY + key, done);
+      textures.on(Phaser.Textures.Events.ERROR, onError);
+      textures.addBase64(key, dataUri);
     });
   }
 }
@@ -10,6 +10,7 @@ import { getTitleForXP } from '../systems/TitleSystem.js';
 import { TouchControls } from '../systems/TouchControls.js';
 import { addFullscreenButton } from '../systems/FullscreenButton.js';
 import { FXManager } from '../systems/FXManager.js';
+import { ATLAS_KEY } from '../systems/TextureAtlas.js';
 
 export default class GameScene extends Phaser.Scene {
   constructor() {
@@ -63,6 +64,7 @@ export default class GameScene extends Phaser.Scene {
         const block = this.platforms.create(
           baseX + i * TILE_SIZE + TILE_SIZE / 2,
           baseY + TILE_SIZE / 2,
+          ATLAS_KEY,
           tileKey
         );
         block.setSize(TILE_SIZE, TILE_SIZE);
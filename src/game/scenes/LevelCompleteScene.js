@@ -1,6 +1,7 @@
 import Phaser from 'phaser';
 import { ParticleManager } from '../systems/ParticleManager.js';
 import { FXManager } from '../systems/FXManager.js';
+import { ATLAS_KEY } from '../systems/TextureAtlas.js';
 
 export default class LevelCompleteScene extends Phaser.Scene {
   constructor() {
@@ -60,6 +61,7 @@ export default class LevelCompleteScene extends Phaser.Scene {
       const star = this.add.image(
         starStartX + i * starSpacing,
         starY,
+        ATLAS_KEY,
         starKey
       ).setScale(0);
 
@@ -2,6 +2,7 @@ import Phaser from 'phaser';
 import { loadSave } from '../systems/SaveManager.js';
 import { addFullscreenButton } from '../systems/FullscreenButton.js';
 import { FXManager } from '../systems/FXManager.js';
+import { ATLAS_KEY } from '../systems/TextureAtlas.js';
 
 export default class LevelSelectScene extends Phaser.Scene {
   constructor() {
@@ -116,6 +117,7 @@ export default class LevelSelectScene extends Phaser.Scene {
         const starImg = this.add.image(
           x - 24 + s * 24,
           y + 30,
+          ATLAS_KEY,
           starKey
         ).setScale(0.7);
 
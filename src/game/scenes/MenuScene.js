@@ -3,6 +3,7 @@ import { loadSave } from '../systems/SaveManager.js';
 import { getTitleForXP } from '../systems/TitleSystem.js';
 import { addFullscreenButton } from '../systems/FullscreenButton.js';
 import { FXManager } from '../systems/FXManager.js';
+import { ATLAS_KEY } from '../systems/TextureAtlas.js';
 
 export default class MenuScene extends Phaser.Scene {
   constructor() {
@@ -40,7 +41,7 @@ export default class MenuScene extends Phaser.Scene {
     });
 
     // ── Botty (idle animation) ─────────────────────
-    const botty = this.add.sprite(width / 2, 280, 'botty-idle');
+    const botty = this.add.sprite(width / 2, 280, ATLAS_KEY, 'botty-idle-0');
     botty.play('botty-idle');
     botty.setScale(2);
 
@@ -49,7 +50,7 @@ export default class MenuScene extends Phaser.Scene {
     FXManager.addGlow(botty, { color: 0x66ccff, outerStrength: 2, quality: 0.1, distance: 10 });
 
     // ── Play Button ────────────────────────────────
-    const playBtn = this.add.image(width / 2, 420, 'btn-play')
+    const playBtn = this.add.image(width / 2, 420, ATLAS_KEY, 'btn-play')
       .setInteractive({ useHandCursor: true });
 
     // 3D effects on button: shadow + glow on hover
@@ -1,4 +1,6 @@
 import Phaser from 'phaser';
+import { ATLAS_KEY, sheetFrameNames } from '../systems/TextureAtlas.js';
+import { FORMAT_MANIFEST_KEY, SUPPORTED_FORMATS_KEY, pickImageUrl } from '../systems/ImageFormats.js';
 
 export default class PreloadScene extends Phaser.Scene {
   constructor() {
@@ -34,48 +36,20 @@ export default class PreloadScene extends Phaser.Scene {
       loadingText.setText('Ready!');
     });
 
-    // ── Tiles ────────────────────────────────────────
-    this.load.image('grass-top', 'assets/images/tiles/grass-top.png');
-    this.load.image('dirt', 'assets/images/tiles/dirt.png');
-    this.load.image('stone', 'assets/images/tiles/stone.png');
+    // Smallest of PNG/WebP/AVIF this browser decodes (probed in BootScene)
+    const formats = this.cache.json.get(FORMAT_MANIFEST_KEY);
+    const supported = this.registry.get(SUPPORTED_FORMATS_KEY) || [];
+    const imageUrl = (path) => pickImageUrl(path, formats, supported);
 
-    // ── Player Sprite Sheets ─────────────────────────
-    this.load.spritesheet('botty-idle', 'assets/images/player/botty-idle.png', {
-      frameWidth: 64,
-      frameHeight: 64
-    });
-    this.load.spritesheet('botty-walk', 'assets/images/player/botty-walk.png', {
-      frameWidth: 64,
-      frameHeight: 64
-    });
-    this.load.spritesheet('botty-jump', 'assets/images/player/botty-jump.png', {
-      frameWidth: 64,
-      frameHeight: 64
-    });
+    // ── Texture Atlas ────────────────────────────────
+    // Tiles, Botty's sprite sheets, UI, objects, particles and touch
+    // controls, packed by scripts/process_images.py into one image.
+    this.load.atlas(ATLAS_KEY, imageUrl('atlas/atlas.png'), 'assets/images/atlas/atlas.json');
 
     // ── Backgrounds ──────────────────────────────────
-    this.load.image('sky', 'assets/images/backgrounds/sky.png');
-    this.load.image('clouds', 'assets/images/backgrounds/clouds.png');
-    this.load.image('hills', 'assets/images/backgrounds/hills.png');
-
-    // ── UI Elements ──────────────────────────────────
-    this.load.image('btn-play', 'assets/images/ui/btn-play.png');
-    this.load.image('btn-levels', 'assets/images/ui/btn-levels.png');
-    this.load.image('star-filled', 'assets/images/ui/star-filled.png');
-    this.load.image('star-empty', 'assets/images/ui/star-empty.png');
-
-    // ── Objects ──────────────────────────────────────
-    this.load.image('flag', 'assets/images/objects/flag.png');
-    this.load.image('bridge-block', 'assets/images/objects/bridge-block.png');
-
-    // ── Particles ────────────────────────────────────
-    this.load.image('dust', 'assets/images/particles/dust.png');
-    this.load.image('confetti', 'assets/images/particles/confetti.png');
-
-    // ── Touch Controls ─────────────────────────────
-    this.load.image('arrow-left', 'assets/images/ui/arrow-left.png');
-    this.load.image('arrow-right', 'assets/images/ui/arrow-right.png');
-    this.load.image('arrow-jump', 'assets/images/ui/arrow-jump.png');
+    this.load.image('sky', imageUrl('backgrounds/sky.png'));
+    this.load.image('clouds', imageUrl('backgrounds/clouds.png'));
+    this.load.image('hills', imageUrl('backgrounds/hills.png'));
 
     // ── Audio ──────────────────────────────────────
     this.load.audio('sfx-jump', 'assets/audio/jump.wav');
@@ -87,23 +61,27 @@ export default class PreloadScene extends Phaser.Scene {
 
   create() {
     // ── Define Player Animations ─────────────────────
+    const atlasFrames = this.textures.get(ATLAS_KEY).getFrameNames();
+    const sheetFrames = (sheetKey) => sheetFrameNames(atlasFrames, sheetKey)
+      .map((frame) => ({ key: ATLAS_KEY, frame }));
+
     this.anims.create({
       key: 'botty-idle',
-      frames: this.anims.generateFrameNumbers('botty-idle', { start: 0, end: 3 }),
+      frames: sheetFrames('botty-idle'),
       frameRate: 6,
       repeat: -1
     });
 
     this.anims.create({
       key: 'botty-walk',
-      frames: this.anims.generateFrameNumbers('botty-walk', { start: 0, end: 5 }),
+      frames: sheetFrames('botty-walk'),
       frameRate: 10,
       repeat: -1
     });
 
     this.anims.create({
       key: 'botty-jump',
-      frames: this.anims.generateFrameNumbers('botty-jump', { start: 0, end: 1 }),
+      frames: sheetFrames('botty-jump'),
       frameRate: 4,
       repeat: 0
     });
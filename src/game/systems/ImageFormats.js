@@ -0,0 +1,52 @@
+/**
+ * Image format selection.
+ * scripts/process_images.py writes WebP and AVIF variants next to the large
+ * PNGs (atlas, backgrounds) and records every variant's byte size in
+ * assets/images/formats.json. BootScene loads that manifest and decodes a
+ * tiny probe image per format; a probe that fails to decode marks a format
+ * the browser cannot use. PreloadScene then fetches the smallest usable one.
+ */
+
+export const FORMAT_MANIFEST_KEY = 'image-formats';
+export const FORMAT_MANIFEST_URL = 'assets/images/formats.json';
+
+// Registry key holding the formats the probes found decodable
+export const SUPPORTED_FORMATS_KEY = 'supportedImageFormats';
+
+// 1x1 transparent images, each with an alpha channel like the real assets
+export const FORMAT_PROBES = {
+  webp: 'data:image/webp;base64,UklGRhoAAABXRUJQVlA4TA0AAAAvAAAAEAcQERGIiP4HAA==',
+  avif: 'data:image/avif;base64,AAAAIGZ0eXBhdmlmAAAAAGF2aWZtaWYxbWlhZk1BMUIAAAGGbWV0YQAAAAAAAAAhaGRscgAAAAAAAAAAcGljdAAAAAAAAAAAAAAAAAAAAAAOcGl0bQAAAAAAAQAAACxpbG9jAAAAAEQAAAIAAQAAAAEAAAHCAAAAIQACAAAAAQAAAa4AAAAUAAAAQmlpbmYAAAAAAAIAAAAaaW5mZQIAAAAAAQAAYXYwMUNvbG9yAAAAABppbmZlAgAAAAACAABhdjAxQWxwaGEAAAAAGmlyZWYAAAAAAAAADmF1eGwAAgABAAEAAADDaXBycAAAAJ1pcGNvAAAAFGlzcGUAAAAAAAAAAQAAAAEAAAAQcGl4aQAAAAADCAgIAAAADGF2MUOBAAwAAAAAE2NvbHJuY2x4AAEADQAGgAAAAA5waXhpAAAAAAEIAAAADGF2MUOBABwAAAAAOGF1eEMAAAAAdXJuOm1wZWc6bXBlZ0I6Y2ljcDpzeXN0ZW1zOmF1eGlsaWFyeTphbHBoYQAAAAAeaXBtYQAAAAAAAAACAAEEAQKDBAACBAEFhgcAAAA9bWRhdBIACgQYAAYVMgoYACihAAIhHctgEgAKCBgABogIaDQgMhMZR4eGIYeeeeaAAACQQMkcYUK+'
+};
+
+/**
+ * Texture key a format's probe image is loaded under.
+ */
+export function probeKey(format) {
+  return `__format-probe-${format}`;
+}
+
+/**
+ * Formats whose probe image decoded, i.e. exists in the texture manager.
+ * PNG is always supported and is not listed.
+ */
+export function supportedFormats(textures) {
+  return Object.keys(FORMAT_PROBES).filter((format) => textures.exists(probeKey(format)));
+}
+
+/**
+ * URL of the smallest variant of a PNG the browser supports.
+ * path is the PNG's path under assets/images (the manifest key); without a
+ * manifest entry the PNG itself is used.
+ */
+export function pickImageUrl(path, manifest, supported) {
+  const sizes = (manifest && manifest[path]) || {};
+  let best = 'png';
+  for (const format of supported) {
+    if (sizes[format] !== undefined && (sizes[best] === undefined || sizes[format] < sizes[best])) {
+      best = format;
+    }
+  }
+  const url = `assets/images/${path}`;
+  return best === 'png' ? url : url.replace(/\.png$/, `.${best}`);
+}
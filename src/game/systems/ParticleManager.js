@@ -1,10 +1,13 @@
+import { ATLAS_KEY } from './TextureAtlas.js';
+
 export class ParticleManager {
   /**
    * Dust burst at a specific position.
    * Used when bridge blocks are placed.
    */
   static dustBurst(scene, x, y) {
-    const emitter = scene.add.particles(x, y, 'dust', {
+    const emitter = scene.add.particles(x, y, ATLAS_KEY, {
+      frame: 'dust',
       speed: { min: 50, max: 150 },
       angle: { min: 200, max: 340 },
       lifespan: 400,
@@ -26,7 +29,8 @@ export class ParticleManager {
    * Used on level complete scene.
    */
   static confetti(scene) {
-    const emitter = scene.add.particles(400, -20, 'confetti', {
+    const emitter = scene.add.particles(400, -20, ATLAS_KEY, {
+      frame: 'confetti',
       x: { min: 0, max: 800 },
       speed: { min: 80, max: 250 },
       angle: { min: 75, max: 105 },
@@ -51,7 +55,8 @@ export class ParticleManager {
    * Used when a filled star pops in on the level complete screen.
    */
   static sparkle(scene, x, y) {
-    const emitter = scene.add.particles(x, y, 'confetti', {
+    const emitter = scene.add.particles(x, y, ATLAS_KEY, {
+      frame: 'confetti',
       speed: { min: 30, max: 100 },
       angle: { min: 0, max: 360 },
       lifespan: 300,
@@ -0,0 +1,42 @@
+/**
+ * Texture atlas lookups.
+ * The small game textures (tiles, Botty, UI, objects, particles) are packed
+ * into one atlas by scripts/process_images.py. Frame names match the old
+ * per-file texture keys; sprite sheet frames are named "<key>-<index>".
+ * Frames are trimmed to their content. The touch control arrows, which
+ * TouchControls draws through applyFrameFlip(), may share pixels with an
+ * exact mirror image and carry a flipX/flipY flag; no other frame is
+ * stored flipped (see "mirrorable" in scripts/assets.json).
+ */
+
+export const ATLAS_KEY = 'atlas';
+
+/**
+ * Frame names of a sprite sheet packed into the atlas, in frame order.
+ * The frame count comes from the atlas, so sheets can grow or shrink
+ * without touching the animation definitions.
+ */
+export function sheetFrameNames(frameNames, sheetKey) {
+  const prefix = `${sheetKey}-`;
+  const index = (name) => Number(name.slice(prefix.length));
+  return frameNames
+    .filter((name) => name.startsWith(prefix) && /^\d+$/.test(name.slice(prefix.length)))
+    .sort((a, b) => index(a) - index(b));
+}
+
+/**
+ * The mirror flags the atlas stored for a frame, from its customData.
+ */
+export function frameFlip(frame) {
+  const data = (frame && frame.customData) || {};
+  return { flipX: data.flipX === true, flipY: data.flipY === true };
+}
+
+/**
+ * Mirror a game object whose atlas frame is stored flipped, so it draws
+ * like the original texture. Returns the game object for chaining.
+ */
+export function applyFrameFlip(gameObject) {
+  const { flipX, flipY } = frameFlip(gameObject.frame);
+  return gameObject.setFlip(flipX, flipY);
+}
@@ -1,4 +1,5 @@
 import Phaser from 'phaser';
+import { ATLAS_KEY, applyFrameFlip } from './TextureAtlas.js';
 
 export class TouchControls {
   constructor(scene) {
@@ -18,8 +19,8 @@ export class TouchControls {
     this.createButton(scene, width - padding, btnY, 'arrow-jump', 'jump');
   }
 
-  createButton(scene, x, y, textureKey, direction) {
-    const btn = scene.add.image(x, y, textureKey)
+  createButton(scene, x, y, frameName, direction) {
+    const btn = applyFrameFlip(scene.add.image(x, y, ATLAS_KEY, frameName))
       .setScrollFactor(0)
       .setAlpha(0.4)
       .setDepth(1000)
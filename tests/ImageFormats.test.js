@@ -0,0 +1,46 @@
+import { describe, it, expect } from 'vitest';
+import { FORMAT_PROBES, pickImageUrl, probeKey, supportedFormats } from '../src/game/systems/ImageFormats.js';
+
+describe('ImageFormats', () => {
+  const manifest = {
+    'atlas/atlas.png': { png: 113961, webp: 89426, avif: 45617 },
+    'backgrounds/sky.png': { png: 25245, webp: 27000 }
+  };
+
+  describe('pickImageUrl', () => {
+    it('picks the smallest supported format', () => {
+      expect(pickImageUrl('atlas/atlas.png', manifest, ['webp', 'avif']))
+        .toBe('assets/images/atlas/atlas.avif');
+      expect(pickImageUrl('atlas/atlas.png', manifest, ['webp']))
+        .toBe('assets/images/atlas/atlas.webp');
+    });
+
+    it('keeps the PNG when it is the smallest', () => {
+      expect(pickImageUrl('backgrounds/sky.png', manifest, ['webp', 'avif']))
+        .toBe('assets/images/backgrounds/sky.png');
+    });
+
+    it('falls back to the PNG without support or a manifest entry', () => {
+      expect(pickImageUrl('atlas/atlas.png', manifest, [])).toBe('assets/images/atlas/atlas.png');
+      expect(pickImageUrl('backgrounds/hills.png', manifest, ['avif']))
+        .toBe('assets/images/backgrounds/hills.png');
+      expect(pickImageUrl('atlas/atlas.png', undefined, ['avif']))
+        .toBe('assets/images/atlas/atlas.png');
+    });
+  });
+
+  describe('supportedFormats', () => {
+    it('lists the formats whose probe texture loaded', () => {
+      const textures = { exists: (key) => key === probeKey('webp') };
+      expect(supportedFormats(textures)).toEqual(['webp']);
+    });
+  });
+
+  describe('FORMAT_PROBES', () => {
+    it('holds a data URI of the matching type per format', () => {
+      for (const [format, uri] of Object.entries(FORMAT_PROBES)) {
+        expect(uri.startsWith(`data:image/${format};base64,`)).toBe(true);
+      }
+    });
+  });
+});
@@ -0,0 +1,57 @@
+import { describe, it, expect } from 'vitest';
+import { ATLAS_KEY, applyFrameFlip, frameFlip, sheetFrameNames } from '../src/game/systems/TextureAtlas.js';
+
+describe('TextureAtlas', () => {
+  describe('ATLAS_KEY', () => {
+    it('is a non-empty string', () => {
+      expect(typeof ATLAS_KEY).toBe('string');
+      expect(ATLAS_KEY.length).toBeGreaterThan(0);
+    });
+  });
+
+  describe('sheetFrameNames', () => {
+    const frames = [
+      'grass-top', 'botty-walk-1', 'botty-idle-10', 'botty-idle-2',
+      'botty-idle-0', 'botty-idle-1', 'botty-idle-extra'
+    ];
+
+    it('returns only the frames of the requested sheet', () => {
+      expect(sheetFrameNames(frames, 'botty-walk')).toEqual(['botty-walk-1']);
+    });
+
+    it('sorts frames numerically, not lexically', () => {
+      expect(sheetFrameNames(frames, 'botty-idle')).toEqual([
+        'botty-idle-0', 'botty-idle-1', 'botty-idle-2', 'botty-idle-10'
+      ]);
+    });
+
+    it('returns an empty list for an unknown sheet', () => {
+      expect(sheetFrameNames(frames, 'botty-jump')).toEqual([]);
+    });
+  });
+
+  describe('frameFlip', () => {
+    it('reads the mirror flags from the frame data', () => {
+      expect(frameFlip({ customData: { flipX: true } })).toEqual({ flipX: true, flipY: false });
+      expect(frameFlip({ customData: { flipX: true, flipY: true } })).toEqual({ flipX: true, flipY: true });
+    });
+
+    it('treats frames without flags as unflipped', () => {
+      expect(frameFlip({ customData: {} })).toEqual({ flipX: false, flipY: false });
+      expect(frameFlip({})).toEqual({ flipX: false, flipY: false });
+      expect(frameFlip(undefined)).toEqual({ flipX: false, flipY: false });
+    });
+  });
+
+  describe('applyFrameFlip', () => {
+    it('mirrors the game object by its frame flags and chains', () => {
+      const calls = [];
+      const obj = {
+        frame: { customData: { flipX: true } },
+        setFlip(x, y) { calls.push([x, y]); return this; }
+      };
+      expect(applyFrameFlip(obj)).toBe(obj);
+      expect(calls).toEqual([[true, false]]);
+    });
+  });
+});
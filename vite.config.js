@@ -1,7 +1,33 @@
+import path from 'node:path';
 import { defineConfig } from 'vite';
 
+// Rewritten by `python3 scripts/process_images.py --watch` after each rebuild
+const ASSET_BUILD_STAMP = path.resolve('.cache/process_images/watch-stamp.json');
+
+/**
+ * Reload the game when the asset watcher finishes a rebuild, so edited
+ * textures show up without a manual refresh. The watcher writes the stamp
+ * once per rebuild, after every image of it is on disk.
+ */
+function reloadOnAssetRebuild() {
+  return {
+    name: 'reload-on-asset-rebuild',
+    configureServer(server) {
+      server.watcher.add(ASSET_BUILD_STAMP);
+      const onChange = (file) => {
+        if (path.resolve(file) === ASSET_BUILD_STAMP) {
+          server.ws.send({ type: 'full-reload' });
+        }
+      };
+      server.watcher.on('add', onChange);
+      server.watcher.on('change', onChange);
+    }
+  };
+}
+
 export default defineConfig({
   base: './',
+  plugins: [reloadOnAssetRebuild()],
   build: {
     outDir: 'dist',
     assetsInlineLimit: 0